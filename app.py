@@ -1,24 +1,29 @@
 # app.py — 섹션형 Secrets(SCENARIO1/SCENARIO2) 지원 버전
-import os, base64, tempfile
+import io
 from pathlib import Path
 import streamlit as st
+import numpy as np
 import pandas as pd
 from PIL import Image
 
-from ml import read_csv_safe, train_models, get_team_winrate, list_all_champs
+from ml import read_csv_safe, train_models, update_models, score_swaps, what_if_matrix, list_all_champs
 from image import init_vertex, predict_image
+from profiling import span, render_panel
+from synergy import build_synergy_matrix, multi_swap_teams, rerank_top
+from team_cache import render_cache_panel
+from inference_jobs import get_job_manager, upload_hash, render_job_progress
+from inference_service import get_service
+from inference_clients import get_clients
+from live_capture import TileTracker, SwapTracker, latest_frame
+from vocab import CHAMPIONS
+import registry
 
 # ----------------------------
 # 경로/설정
 # ----------------------------
 BASE_DIR = Path(__file__).resolve().parent
-_CSV_CANDIDATES = [
-    BASE_DIR / "data" / "renamed_data.csv",
-    BASE_DIR / "renamed_data.csv",
-    BASE_DIR / "data" / "renamed_data_sample.csv",
-    BASE_DIR / "renamed_data_sample.csv",
-]
-DEFAULT_CSV = next((p for p in _CSV_CANDIDATES if p.exists()), _CSV_CANDIDATES[0])
+# 기본 매치 CSV 후보 순서는 registry 'match_data' 한 곳에서 관리
+DEFAULT_CSV = registry.path("match_data") or registry.candidates("match_data")[0]
 
 # ----------------------------
 # Secrets 로더 (섹션형 지원)
@@ -41,70 +46,26 @@ def get_vertex_secrets(section: str | None):
         creds_b64   = st.secrets.get("GOOGLE_APPLICATION_CREDENTIALS_B64")
     return project_id, region, endpoint_id, creds_b64
 
-def _ensure_adc_from_b64(creds_b64: str | None):
-    """Base64 서비스 계정 JSON을 임시파일로 복원하고 ADC로 등록."""
-    if not creds_b64:
-        return None
-    try:
-        raw = base64.b64decode(creds_b64)
-        tf = tempfile.NamedTemporaryFile(delete=False, suffix=".json")
-        tf.write(raw); tf.flush(); tf.close()
-        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = tf.name
-        return tf.name
-    except Exception as e:
-        st.warning(f"크리덴셜 복원 실패: {e}")
-        return None
-
-# === EN->KO 챔피언 매핑 (완성본) ===
-EN2KO = {
-    "Aatrox":"아트록스","Ahri":"아리","Akali":"아칼리","Akshan":"아크샨","Alistar":"알리스타",
-    "Amumu":"아무무","Anivia":"애니비아","Annie":"애니","Aphelios":"아펠리오스","Ashe":"애쉬",
-    "Aurelion Sol":"아우렐리온 솔","Aurora":"오로라","Azir":"아지르",
-    "Bard":"바드","Bel'Veth":"벨베스","Blitzcrank":"블리츠크랭크","Brand":"브랜드","Braum":"브라움",
-    "Caitlyn":"케이틀린","Camille":"카밀","Cassiopeia":"카시오페아","Cho'Gath":"초가스","Corki":"코르키",
-    "Darius":"다리우스","Diana":"다이애나","Dr. Mundo":"문도 박사","Draven":"드레이븐",
-    "Ekko":"에코","Elise":"엘리스","Evelynn":"이블린","Ezreal":"이즈리얼",
-    "Fiddlesticks":"피들스틱","Fiora":"피오라","Fizz":"피즈",
-    "Galio":"갈리오","Gangplank":"갱플랭크","Garen":"가렌","Gnar":"나르","Gragas":"그라가스","Graves":"그레이브즈","Gwen":"그웬",
-    "Hecarim":"헤카림","Heimerdinger":"하이머딩거",
-    "Illaoi":"일라오이","Irelia":"이렐리아","Ivern":"아이번",
-    "Janna":"잔나","Jarvan IV":"자르반 4세","Jax":"잭스","Jayce":"제이스","Jhin":"진","Jinx":"징크스",
-    "K'Sante":"크산테","Kai'Sa":"카이사","Kalista":"칼리스타","Karma":"카르마","Karthus":"카서스","Kassadin":"카사딘",
-    "Katarina":"카타리나","Kayle":"케일","Kayn":"케인","Kennen":"케넨","Kha'Zix":"카직스","Kindred":"킨드레드",
-    "Kled":"클레드","Kog'Maw":"코그모",
-    "LeBlanc":"르블랑","Lee Sin":"리 신","Leona":"레오나","Lillia":"릴리아","Lissandra":"리산드라",
-    "Lucian":"루시안","Lulu":"룰루","Lux":"럭스",
-    "Malphite":"말파이트","Malzahar":"말자하","Maokai":"마오카이","Master Yi":"마스터 이",
-    "Milio":"밀리오","Miss Fortune":"미스 포츈","Mordekaiser":"모데카이저","Morgana":"모르가나",
-    "Naafiri":"나피리","Nami":"나미","Nasus":"나서스","Nautilus":"노틸러스","Neeko":"니코","Nidalee":"니달리","Nilah":"닐라",
-    "Nocturne":"녹턴","Nunu & Willump":"누누와 윌럼프",
-    "Olaf":"올라프","Orianna":"오리아나","Ornn":"오른",
-    "Pantheon":"판테온","Poppy":"뽀삐","Pyke":"파이크",
-    "Qiyana":"키아나","Quinn":"퀸",
-    "Rakan":"라칸","Rammus":"람머스","Rek'Sai":"렉사이","Rell":"렐","Renata Glasc":"레나타 글라스크",
-    "Renekton":"레넥톤","Rengar":"렝가","Riven":"리븐","Rumble":"럼블","Ryze":"라이즈",
-    "Samira":"사미라","Sejuani":"세주아니","Senna":"세나","Seraphine":"세라핀","Sett":"세트","Shaco":"샤코","Shen":"쉔",
-    "Shyvana":"쉬바나","Singed":"신지드","Sion":"사이온","Sivir":"시비르","Skarner":"스카너","Smolder":"스몰더","Sona":"소나",
-    "Soraka":"소라카","Swain":"스웨인","Sylas":"사일러스","Syndra":"신드라",
-    "Tahm Kench":"탐 켄치","Taliyah":"탈리야","Talon":"탈론","Taric":"타릭","Teemo":"티모","Thresh":"쓰레쉬",
-    "Tristana":"트리스타나","Trundle":"트런들","Tryndamere":"트린다미어","Twisted Fate":"트위스티드 페이트","Twitch":"트위치",
-    "Udyr":"우디르","Urgot":"우르곳",
-    "Varus":"바루스","Vayne":"베인","Veigar":"베이가","Vel'Koz":"벨코즈","Vex":"벡스","Vi":"바이","Viego":"비에고",
-    "Viktor":"빅토르","Vladimir":"블라디미르","Volibear":"볼리베어",
-    "Warwick":"워윅","Wukong":"오공","Xayah":"자야","Xerath":"제라스","Xin Zhao":"신 짜오",
-    "Yasuo":"야스오","Yone":"요네","Yorick":"요릭","Yuumi":"유미",
-    "Zac":"자크","Zed":"제드","Zeri":"제리","Ziggs":"직스","Zilean":"질리언","Zoe":"조이","Zyra":"자이라",
-}
-
 def _map_and_filter_detected(names_list, options):
+    """감지 라벨(영문/한글, 표기 차이 무관) → options 에 있는 챔피언 이름. 챔피언 id 로 맞춘다."""
+    by_id = {}
+    for o in options or []:
+        by_id.setdefault(CHAMPIONS.id(o), o)
+    by_id.pop(-1, None)
     opt = set(options or [])
     out = []
     for n in names_list or []:
-        k = EN2KO.get(n, n)
-        if k in opt and k not in out:
+        k = by_id.get(CHAMPIONS.id(n), n if n in opt else None)
+        if k is not None and k not in out:
             out.append(k)
     return out
 
+def _render_detect_partial(partial):
+    """진행 중 감지 작업의 타일별 부분 결과 (앞 5개 = 현재 픽, 뒤 10개 = 대기석)."""
+    cells = [(p[0] or "—") if p else "…" for p in partial]
+    st.caption("현재 픽: " + " · ".join(cells[:5]))
+    st.caption("대기석: " + " · ".join(cells[5:]))
+
 st.set_page_config(page_title="ARAM 픽 최적화", layout="wide")
 st.title("⭐ ARAM 픽 최적화 (샘플 CSV 기반 시연)")
 
@@ -114,10 +75,13 @@ st.title("⭐ ARAM 픽 최적화 (샘플 CSV 기반 시연)")
 st.sidebar.header("데이터")
 mode = st.sidebar.radio("CSV", ["기본 경로", "파일 업로드"], horizontal=True)
 df = None
+shared_df = False
 if mode == "기본 경로":
     st.sidebar.caption(f"기본 경로 후보: {DEFAULT_CSV}")
-    if DEFAULT_CSV.exists():
-        df = read_csv_safe(str(DEFAULT_CSV))
+    if registry.path("match_data"):
+        # 프로세스당 한 번 읽어 모든 세션이 공유 (읽기 전용 — 학습에는 사본을 넘긴다)
+        df = registry.get("match_data")
+        shared_df = True
     else:
         st.sidebar.warning("샘플 CSV가 없습니다.")
 else:
@@ -130,6 +94,8 @@ if df is None:
     st.stop()
 
 st.dataframe(df.head(3), use_container_width=True)
+render_panel()
+render_cache_panel()
 
 # ----------------------------
 # 2) 학습
@@ -139,14 +105,35 @@ if "models" not in st.session_state:
 
 if st.button("학습 시작 / 다시 학습", type="primary"):
     with st.spinner("학습 중..."):
-        st.session_state.models = train_models(df)
+        # train_models 는 df 에 all_tags 열을 더하므로 공유 프레임이면 사본으로
+        st.session_state.models = train_models(df.copy() if shared_df else df)
+        st.session_state.update_state = None
+        st.session_state.synergy = None
 
 if not st.session_state.models:
     st.stop()
 
+# 증분 학습: 새로 쌓인 매치 행만 업로드해 기존 모델을 이어서 학습
+with st.sidebar.expander("증분 학습 (새 매치만)"):
+    new_up = st.file_uploader("신규 매치 CSV", type=["csv"], key="incremental_csv")
+    n_rounds = st.number_input("추가 트리 수", 5, 200, 20, 5)
+    if new_up and st.button("증분 학습 실행"):
+        with st.spinner("증분 학습 중..."):
+            st.session_state.models, st.session_state.update_state = update_models(
+                st.session_state.models, read_csv_safe(new_up),
+                state=st.session_state.get("update_state"), n_rounds=int(n_rounds),
+            )
+            st.session_state.synergy = None
+        st.success("증분 학습 완료")
+
 models = st.session_state.models
 all_champs = list_all_champs(models)
 
+# 시너지 행렬(근사 스코어러)은 모델이 바뀔 때만 다시 만든다
+if st.session_state.get("synergy") is None:
+    with st.spinner("시너지 행렬 계산 중..."):
+        st.session_state.synergy = build_synergy_matrix(models)
+
 # ----------------------------
 # 3) 스크린샷 감지 (옵션)
 # ----------------------------
@@ -162,31 +149,97 @@ section_choice = st.sidebar.selectbox(
 use_vertex = section_choice != "사용 안 함"
 threshold = st.sidebar.slider("신뢰도(%)", 50, 95, 50, 1)
 
-# 캐시: 파라미터가 바뀌면 다른 리소스로 간주되어 재초기화
-@st.cache_resource
+# 엔드포인트는 inference_clients 가 프로세스 전역으로 공유 (자격증명은 메모리에서 복원, 임시 파일 없음)
 def get_endpoint_cached(project, region, endpoint_id, creds_b64):
     if not (project and endpoint_id):
         return None
-    _ensure_adc_from_b64(creds_b64)
-    return init_vertex(project, region, endpoint_id)
+    return init_vertex(project, region, endpoint_id, creds_b64)
 
 detected_current, detected_bench = [], []
-uploaded = st.file_uploader("픽 화면 스크린샷 (png/jpg)", type=["png","jpg","jpeg"]) if use_vertex else None
-
-if uploaded and use_vertex:
+endpoint = None
+if use_vertex:
+    # 섹션을 고르는 즉시 채널/토큰 예열 → 업로드 후 첫 타일 지연 감소
     PROJECT_ID, REGION, ENDPOINT_ID, CREDS_B64 = get_vertex_secrets(section_choice)
-    endpoint = get_endpoint_cached(PROJECT_ID, REGION, ENDPOINT_ID, CREDS_B64)
+    try:
+        endpoint = get_endpoint_cached(PROJECT_ID, REGION, ENDPOINT_ID, CREDS_B64)
+    except Exception as e:
+        st.sidebar.warning(f"엔드포인트 초기화 실패: {e}")
+    failure = get_clients().failures().get(f"vertex.{ENDPOINT_ID}")
+    if endpoint is None and failure:
+        st.sidebar.warning(f"엔드포인트 초기화 실패: {failure}")
+source = st.sidebar.radio("입력", ["스크린샷 업로드", "라이브 (폴더 감시)"], horizontal=True) if use_vertex else None
+live = source == "라이브 (폴더 감시)"
+uploaded = st.file_uploader("픽 화면 스크린샷 (png/jpg)", type=["png","jpg","jpeg"]) if use_vertex and not live else None
 
+if live:
+    watch_dir = st.sidebar.text_input("스크린샷 폴더", value=st.session_state.get("watch_dir", ""))
+    st.session_state.watch_dir = watch_dir
     if endpoint is None:
         st.warning("Secrets에서 엔드포인트 설정을 찾지 못했습니다. (해당 섹션의 PROJECT_ID/ENDPOINT_ID/자격증명 Base64 확인)")
+    elif not (watch_dir and Path(watch_dir).is_dir()):
+        st.info("캡처 도구가 스크린샷을 저장하는 폴더를 입력하세요. 가장 최근 프레임을 1초마다 확인합니다.")
     else:
-        image = Image.open(uploaded).convert("RGB")
-        st.image(image, caption="업로드 이미지", use_container_width=True)
-        with st.spinner("감지 중..."):
-            cur, bench, overlay = predict_image(endpoint, image, threshold=threshold)
-        st.image(overlay, caption="탐지 영역", use_container_width=True)
+        # 세션별 타일 추적기: 바뀐 타일만 다시 분류하고, 픽/대기석이 바뀌었을 때만 전체 rerun
+        live_key = (section_choice, ENDPOINT_ID, threshold, watch_dir)
+        if st.session_state.get("live_key") != live_key:
+            st.session_state.live_key = live_key
+            st.session_state.live_tracker = TileTracker(endpoint, threshold=threshold)
+            st.session_state.live_frame = None
+            st.session_state.live_picks = ([], [None] * 10)
+
+        @st.experimental_fragment(run_every=1.0)
+        def _poll_live():
+            latest = latest_frame(st.session_state.watch_dir)
+            tracker = st.session_state.live_tracker
+            picks = None
+            # 키 = (이름, 수정 시각): 같은 파일을 덮어쓰는 캡처 도구도 새 프레임으로 읽는다
+            if latest is not None and latest[0] != st.session_state.live_frame:
+                try:
+                    state = tracker.update(latest[1])
+                except Exception as e:  # 서킷 열림 등: 이 프레임은 다음 폴링 때 다시 시도
+                    st.warning(f"라이브 분류 실패: {e}")
+                else:
+                    st.session_state.live_frame = latest[0]
+                    picks = (state["current"], state["bench"])
+            if picks is not None and picks != st.session_state.live_picks:
+                st.session_state.live_picks = picks
+                st.rerun()
+            s = tracker.stats()
+            frame_key = st.session_state.live_frame
+            st.caption(f"라이브: {frame_key[0] if frame_key else '프레임 대기 중'} · 프레임 {s['frames']} · "
+                       f"재분류 타일 {s['inferred']} (프레임당 {s['tiles_per_frame']})")
+
+        _poll_live()
+        cur, bench = st.session_state.live_picks
         detected_current = _map_and_filter_detected(cur, all_champs)[:5]
         detected_bench   = _map_and_filter_detected(bench, all_champs)[:10]
+        st.caption("현재 픽: " + " · ".join(detected_current or ["—"]))
+        st.caption("대기석: " + " · ".join(detected_bench or ["—"]))
+
+if uploaded and use_vertex:
+    if endpoint is None:
+        st.warning("Secrets에서 엔드포인트 설정을 찾지 못했습니다. (해당 섹션의 PROJECT_ID/ENDPOINT_ID/자격증명 Base64 확인)")
+    else:
+        data = uploaded.getvalue()
+        with span("app.decode_upload"):
+            image = Image.open(io.BytesIO(data)).convert("RGB")
+        st.image(image, caption="업로드 이미지", use_container_width=True)
+
+        # 감지는 백그라운드 작업으로: 같은 업로드/설정이면 rerun 해도 진행 중 작업에 다시 붙는다
+        job = get_job_manager().submit(
+            ("scenario1", upload_hash(data, section_choice, ENDPOINT_ID, threshold)),
+            predict_image, endpoint, image, threshold=threshold, total=15,
+        )
+        st.session_state.detect_job = job.key
+        if job.status == "done":
+            cur, bench, overlay = job.result
+            st.image(overlay, caption="탐지 영역", use_container_width=True)
+            detected_current = _map_and_filter_detected(cur, all_champs)[:5]
+            detected_bench   = _map_and_filter_detected(bench, all_champs)[:10]
+        elif job.status == "error":
+            st.error(f"감지 실패: {job.error}")
+        else:
+            render_job_progress(job, "감지 중...", _render_detect_partial)
 
 # ----------------------------
 # 4) 우리 팀 5명 선택
@@ -198,32 +251,74 @@ if len(my_team) != 5:
     st.warning("5명을 선택하세요.")
     st.stop()
 
-wr = get_team_winrate(my_team, models)
+# 승률 채점은 공유 추론 서비스로: 동시 세션의 요청이 한 배치로 묶인다 (결과는 team_cache 공유)
+service = get_service()
+wr = service.team_winrate(my_team, models)
 st.markdown(f"### 현재 픽 승률: **{wr*100:.2f}%**")
 
+# 라이브 모드: 감지된 팀 × 대기석 교체 승률을 새로 들어온 후보만 채점해 갱신
+if live and detected_current:
+    if st.session_state.get("live_swaps") is None or st.session_state.live_swaps.models is not models:
+        st.session_state.live_swaps = SwapTracker(models, candidates_filter=all_champs)
+    live_rows = st.session_state.live_swaps.update(detected_current, detected_bench)
+    if live_rows:
+        st.caption("라이브 교체 추천 (감지된 팀 × 대기석)")
+        st.dataframe(pd.DataFrame(live_rows).head(10), use_container_width=True)
+
 # ----------------------------
 # 5) 교체 추천
 # ----------------------------
+swap_mode = st.radio("교체 추천 방식", ["교체 대상 지정", "전체 표 (모든 슬롯 × 모든 챔피언)"], horizontal=True)
+
 pool = st.multiselect(
     "교체 후보",
     options=[c for c in all_champs if c not in my_team],
     default=[c for c in detected_bench if c not in my_team],
 )
 
-target = st.selectbox("교체할 내 챔피언", options=my_team)
-rows, best, best_inc = [], None, 0.0
-
-for cand in pool:
-    new_team = [cand if x == target else x for x in my_team]
-    w = get_team_winrate(new_team, models)
-    inc = w - wr
-    rows.append({"교체 챔피언": cand, "새 승률(%)": round(w * 100, 2), "변화량 Δ(%)": round(inc * 100, 2)})
-    if inc > best_inc:
-        best, best_inc = (target, cand, w), inc
-
-if rows:
-    st.dataframe(pd.DataFrame(rows).sort_values("새 승률(%)", ascending=False), use_container_width=True)
-if best:
-    st.success(f"🔷 {best[0]} → {best[1]} 교체 시 **{best[2]*100:.2f}%**")
+if swap_mode == "교체 대상 지정":
+    target = st.selectbox("교체할 내 챔피언", options=my_team)
+    rows, best = score_swaps(my_team, target, pool, models, base_wr=wr, batch_scorer=service.team_winrate_batch)
+
+    if rows:
+        st.dataframe(pd.DataFrame(rows).sort_values("새 승률(%)", ascending=False), use_container_width=True)
+    if best:
+        st.success(f"🔷 {best[0]} → {best[1]} 교체 시 **{best[2]*100:.2f}%**")
+    else:
+        st.info("교체 후보를 선택하면 추천이 표시됩니다.")
 else:
-    st.info("교체 후보를 선택하면 추천이 표시됩니다.")
+    # 후보를 고르지 않으면 전체 챔피언, 열은 최고 Δ 순으로 정렬
+    mat, names = what_if_matrix(my_team, models, candidates=pool or None)
+    delta = pd.DataFrame((mat - wr) * 100, index=my_team, columns=names).round(2)
+    delta = delta[delta.max(axis=0).sort_values(ascending=False).index]
+    st.caption("값은 현재 픽 대비 승률 변화량 Δ(%) · 행 = 교체할 내 챔피언, 열 = 들어올 챔피언")
+    st.dataframe(
+        delta.style.background_gradient(cmap="RdYlGn", axis=None).format("{:+.2f}", na_rep=""),
+        use_container_width=True,
+    )
+    s_best, c_best = divmod(int(np.nanargmax(mat)), mat.shape[1])
+    if mat[s_best, c_best] > wr:
+        st.success(f"🔷 {my_team[s_best]} → {names[c_best]} 교체 시 **{mat[s_best, c_best]*100:.2f}%**")
+    else:
+        st.info("현재 픽보다 나은 단일 교체가 없습니다.")
+
+# ----------------------------
+# 6) 여러 명 동시 교체 탐색 (근사 → 정확 재정렬)
+# ----------------------------
+with st.expander("여러 명 동시 교체 탐색"):
+    sm = st.session_state.synergy
+    # 3명 교체는 전체 챔피언 대상이면 수백만 조합이 되므로 교체 후보 풀을 고른 경우만 허용
+    n_swap = st.radio("동시 교체 인원", [1, 2, 3] if pool else [1, 2], index=1, horizontal=True)
+    top_n = st.slider("정확 재계산할 상위 조합 수", 10, 200, 30, 10)
+    cand = multi_swap_teams(my_team, sm, n_swap=n_swap, candidates=pool or None)
+    ranked = rerank_top(cand, sm, models, top_n=top_n) if len(cand) else []
+    if ranked:
+        st.caption(f"후보 {len(cand):,}개 조합 근사 채점 → 상위 {len(ranked)}개 정확 재계산 (근사 R² {float(sm['fit_r2']):.3f})")
+        st.dataframe(pd.DataFrame([
+            {"조합": ", ".join(t), "근사 승률(%)": round(a * 100, 2), "승률(%)": round(e * 100, 2), "Δ(%)": round((e - wr) * 100, 2)}
+            for t, a, e in ranked
+        ]), use_container_width=True, hide_index=True)
+    elif len(cand):
+        st.info("현재 팀에 시너지 행렬에 없는 챔피언이 있어 정확히 재계산할 조합이 없습니다.")
+    else:
+        st.info("교체 후보가 부족합니다.")
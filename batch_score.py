@@ -0,0 +1,173 @@
+# batch_score.py — 대량 팀 승률 스코어링 (CLI / 파이썬 API)
+"""
+과거/시뮬레이션 5인 조합을 CSV·Parquet 에서 청크 단위로 읽어
+ml.get_team_winrate_batch 로 채점하고, 결과를 바로 파일에 흘려 쓴다.
+입력 크기와 상관없이 메모리는 (청크 크기 × 동시 처리 청크 수) 로 고정된다.
+
+예)
+  python batch_score.py teams.parquet scores.csv --train-csv renamed_data.csv --save-models models.joblib
+  python batch_score.py teams.csv scores.csv --models models.joblib --workers 4 --chunksize 20000
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import joblib
+import pandas as pd
+
+from ml import read_csv_safe, train_models, get_team_winrate_batch
+
+DEFAULT_TEAM_COLS = [f"champ{i}_name" for i in range(1, 6)]
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 입력 / 출력
+# ─────────────────────────────────────────────────────────────────────
+def iter_team_chunks(path, chunksize: int = 50_000, columns=None):
+    """CSV/Parquet 를 DataFrame 청크로 순회. Parquet 는 row group 배치 단위로 읽는다."""
+    path = Path(path)
+    if path.suffix.lower() in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+        pf = pq.ParquetFile(path)
+        for batch in pf.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=columns, low_memory=False)
+
+
+class _ChunkWriter:
+    """결과 청크를 CSV(append) 또는 Parquet(ParquetWriter) 로 스트리밍 저장."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._parquet = self.path.suffix.lower() in (".parquet", ".pq")
+        self._writer = None
+        self._first = True
+
+    def write(self, chunk: pd.DataFrame):
+        if self._parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            chunk.to_csv(self.path, mode="w" if self._first else "a", header=self._first,
+                         index=False, encoding="utf-8-sig" if self._first else "utf-8")
+        self._first = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 워커
+# ─────────────────────────────────────────────────────────────────────
+_WORKER_MODELS = None
+
+
+def _init_worker(models_path):
+    global _WORKER_MODELS
+    _WORKER_MODELS = joblib.load(models_path)
+
+
+def score_chunk(chunk: pd.DataFrame, models, team_cols=DEFAULT_TEAM_COLS, keep_cols=None):
+    """청크 하나를 채점. keep_cols 가 주어지면 해당 입력 컬럼을 결과에 같이 남긴다."""
+    teams = chunk[team_cols].astype(str).values.tolist()
+    out = chunk[keep_cols or team_cols].reset_index(drop=True)
+    out["winrate"] = get_team_winrate_batch(teams, models)
+    return out
+
+
+def _score_chunk_worker(chunk, team_cols, keep_cols):
+    return score_chunk(chunk, _WORKER_MODELS, team_cols, keep_cols)
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 실행
+# ─────────────────────────────────────────────────────────────────────
+def score_file(input_path, output_path, models=None, models_path=None,
+               team_cols=DEFAULT_TEAM_COLS, keep_cols=None,
+               chunksize: int = 50_000, workers: int = 1, log=sys.stderr):
+    """
+    input_path 의 모든 팀을 채점해 output_path 로 저장하고 (행 수, 초, 행/초) 를 반환.
+    workers > 1 이면 models_path(joblib 번들)를 각 프로세스가 한 번씩 로드한다.
+    """
+    if workers > 1 and models_path is None:
+        raise ValueError("workers > 1 에는 models_path(joblib 번들)가 필요합니다.")
+    if models is None and workers <= 1:
+        models = joblib.load(models_path)
+
+    columns = list(dict.fromkeys(list(team_cols) + list(keep_cols or [])))
+    chunks = iter_team_chunks(input_path, chunksize, columns)
+    writer = _ChunkWriter(output_path)
+    n_rows, t0 = 0, time.perf_counter()
+
+    def _report(df_out):
+        nonlocal n_rows
+        writer.write(df_out)
+        n_rows += len(df_out)
+        if log:
+            dt = time.perf_counter() - t0
+            print(f"[batch_score] {n_rows:,} rows  {n_rows / dt:,.0f} rows/s", file=log, flush=True)
+
+    try:
+        if workers <= 1:
+            for chunk in chunks:
+                _report(score_chunk(chunk, models, team_cols, keep_cols))
+        else:
+            # 동시에 떠 있는 청크 수를 제한해 메모리를 고정하고, 입력 순서대로 기록
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(str(models_path),)) as ex:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(ex.submit(_score_chunk_worker, chunk, team_cols, keep_cols))
+                    if len(pending) >= 2 * workers:
+                        _report(pending.popleft().result())
+                while pending:
+                    _report(pending.popleft().result())
+    finally:
+        writer.close()
+
+    dt = time.perf_counter() - t0
+    return n_rows, dt, (n_rows / dt if dt > 0 else 0.0)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ARAM 5인 조합 대량 승률 스코어링")
+    ap.add_argument("input", help="팀 CSV/Parquet (기본 컬럼 champ1_name..champ5_name)")
+    ap.add_argument("output", help="결과 CSV/Parquet")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--models", help="joblib 로 저장한 train_models 결과 튜플")
+    src.add_argument("--train-csv", help="학습용 매치 CSV (이 자리에서 train_models 실행)")
+    ap.add_argument("--save-models", help="--train-csv 로 학습한 모델을 저장할 경로")
+    ap.add_argument("--team-cols", nargs=5, default=DEFAULT_TEAM_COLS)
+    ap.add_argument("--keep-cols", nargs="*", default=None, help="결과에 함께 남길 입력 컬럼")
+    ap.add_argument("--chunksize", type=int, default=50_000)
+    ap.add_argument("--workers", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    models, models_path = None, args.models
+    if args.train_csv:
+        models = train_models(read_csv_safe(args.train_csv))
+        if args.save_models:
+            joblib.dump(models, args.save_models)
+            models_path = args.save_models
+        elif args.workers > 1:
+            ap.error("--train-csv 와 --workers > 1 을 함께 쓰려면 --save-models 가 필요합니다.")
+
+    n, dt, rps = score_file(args.input, args.output, models=models, models_path=models_path,
+                            team_cols=args.team_cols, keep_cols=args.keep_cols,
+                            chunksize=args.chunksize, workers=args.workers)
+    print(f"완료: {n:,} rows / {dt:.1f}s ({rps:,.0f} rows/s) → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
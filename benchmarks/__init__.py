@@ -0,0 +1,3 @@
+# benchmarks — 재현 가능한 성능 측정 (합성 데이터 + 스텁 엔드포인트)
+#   python -m benchmarks.run --rows 5000 --out bench_results.json
+#   python -m benchmarks.run --compare old.json new.json
@@ -0,0 +1,455 @@
+# loadtest.py — 동시 세션 부하 테스트 (Streamlit 배포 용량 측정)
+"""
+  python -m benchmarks.loadtest --sessions 1 4 16 --duration 30 --out load_results.json
+  python -m benchmarks.loadtest --sessions 8 --procs 2 --models train        # 세션마다 train_models (앱 기본 동작)
+  python -m benchmarks.loadtest --sessions 16 --budget-p95-ms 3000 --budget-rss-mb 1500   # 넘으면 종료 코드 1
+  python -m benchmarks.loadtest --compare before.json after.json
+
+세션 하나 = Streamlit 세션 스레드 하나. 서버 프로세스 하나 = 워커 하위 프로세스 하나 (--procs 개로 세션을 나눔).
+N 단계마다 새 프로세스를 띄우므로 최대 RSS 는 단계별로 따로 잰다.
+
+시나리오1 (app.py):  upload(디코드) → detect(predict_image 작업, 폴링) → team(현재 승률) → swaps(score_swaps)
+시나리오2 (pages/02): upload(업로드 저장소) → detect(OCR/룬 작업, 폴링) → select → recommend(빌드 추천)
+  - 시나리오2 는 매 rerun 마다 pages/02 처럼 item_recommender / rune_champion 을 import 하고 추천기를 초기화한다
+    (다른 위치의 같은 이름 모듈만 캐시에서 뺀다, --no-page-reload 로 끔). 스텁이 없는 rune_champion 에는
+    스텁 Vision/Vertex 를 넣는다. 흐름 중 예외는 모두 오류로 세고, 오류가 하나라도 있으면 종료 코드 1.
+  - 작업 완료는 render_job_progress 와 같은 간격(--poll-ms)으로 확인한다.
+  - --models: train = 세션마다 train_models (앱처럼 session_state 에 보관), copy = 공유 번들의 pickle 사본,
+    shared = 모든 세션이 같은 번들.
+
+결과: 시나리오/단계별 p50/p95/p99 지연, 처리량(흐름/초), 오류 수, 프로세스별 기준/최대 RSS.
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import importlib
+import json
+import os
+import pickle
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from benchmarks import synth, stubs
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+SCENARIO2_DIR = ROOT_DIR / "시나리오2"
+for p in (ROOT_DIR, SCENARIO2_DIR):
+    if str(p) not in sys.path:
+        sys.path.append(str(p))
+
+SCENARIOS = ("scenario1", "scenario2")
+STEPS = {
+    "scenario1": ("train", "upload", "detect", "team", "swaps"),
+    "scenario2": ("upload", "detect", "select", "recommend"),
+}
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 메모리
+# ─────────────────────────────────────────────────────────────────────
+def rss_mb():
+    """현재 RSS (MB). /proc 이 없으면 psutil, 둘 다 없으면 None."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        return None
+
+
+def peak_rss_mb():
+    """프로세스 최대 RSS (MB)."""
+    if resource is None:
+        return rss_mb()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024.0
+
+
+def percentiles(ms):
+    if not ms:
+        return {"n": 0}
+    a = np.asarray(ms)
+    return {"n": len(a), "p50_ms": round(float(np.percentile(a, 50)), 2),
+            "p95_ms": round(float(np.percentile(a, 95)), 2), "p99_ms": round(float(np.percentile(a, 99)), 2),
+            "max_ms": round(float(a.max()), 2)}
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 워커 (서버 프로세스 하나)
+# ─────────────────────────────────────────────────────────────────────
+def _unique(png: bytes, tag: str) -> bytes:
+    """PNG 끝(IEND 뒤)에 태그를 붙여 업로드마다 내용 해시가 달라지게 한다 (디코드 결과는 같음)."""
+    return png + tag.encode("ascii")
+
+
+def _png(img) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class Worker:
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.champions = synth.champion_names()
+        self.latency_s = cfg["latency_ms"] / 1000.0
+        self.poll_s = cfg["poll_ms"] / 1000.0
+        self.lock = threading.Lock()
+        self.steps = {s: {k: [] for k in STEPS[s]} for s in SCENARIOS}
+        self.flows = {s: [] for s in SCENARIOS}
+        self.errors = {s: 0 for s in SCENARIOS}
+        self.last_error = None
+
+    # 준비: 모듈 import, 공유 번들, 스크린샷 — 측정 전에 끝낸다
+    def setup(self):
+        from ml import train_models
+        self.df = synth.make_match_df(self.cfg["rows"], seed=self.cfg["seed"])
+        self.shared = train_models(self.df.copy(), verbose=False) if self.cfg["models"] != "train" else None
+        self.pick_endpoint = stubs.StubEndpoint(self.champions, latency_s=self.latency_s)
+        self.pick_png = [_png(synth.make_pick_screenshot(seed=k, n_empty_bench=k % 4)) for k in range(4)]
+        self.loading_png = [_png(synth.make_loading_screenshot(seed=k)) for k in range(4)]
+        if "scenario2" in self.cfg["mix"]:
+            self._page_modules(reload=False)
+        self.rss_base = rss_mb()
+
+    def _models(self, session):
+        if "models" not in session:
+            mode = self.cfg["models"]
+            if mode == "train":
+                from ml import train_models
+                session["models"] = train_models(self.df.copy(), verbose=False)
+            elif mode == "copy":
+                session["models"] = pickle.loads(pickle.dumps(self.shared, protocol=pickle.HIGHEST_PROTOCOL))
+            else:
+                session["models"] = self.shared
+        return session["models"]
+
+    def _page_modules(self, reload=True):
+        """pages/02_시나리오2.py 의 rerun 동작: 다른 위치의 같은 이름 모듈만 캐시에서 빼고 import + 추천기 초기화."""
+        if reload:
+            for mod in ("item_recommender", "rune_champion"):
+                cached = sys.modules.get(mod)
+                if cached is not None and Path(getattr(cached, "__file__", "") or "").resolve().parent != SCENARIO2_DIR:
+                    sys.modules.pop(mod, None)
+        ir = importlib.import_module("item_recommender")
+        rc = importlib.import_module("rune_champion")
+        if not isinstance(rc.RUNE_endpoint, stubs.StubEndpoint):
+            stubs.install_scenario2_stubs(rc, self.champions[:10], list(rc.RUNE_NAME_MAP), latency_s=self.latency_s)
+        if not ir.initialize_recommender():
+            raise RuntimeError("initialize_recommender 실패")
+        return ir, rc
+
+    def _rerun(self):
+        if self.cfg["page_reload"]:
+            return self._page_modules()
+        return sys.modules["item_recommender"], sys.modules["rune_champion"]
+
+    def _wait(self, job):
+        while job.active:
+            time.sleep(self.poll_s)
+        if job.status == "error":
+            raise job.error
+        return job.result
+
+    # 흐름
+    def scenario1(self, sid, n, session, record):
+        from PIL import Image
+        from inference_jobs import get_job_manager, upload_hash
+        from inference_service import get_service
+        from ml import list_all_champs, score_swaps
+
+        if "models" not in session:
+            with record("train"):
+                self._models(session)
+        models = session["models"]
+        data = _unique(self.pick_png[(sid + n) % len(self.pick_png)], f"s{sid}f{n}p{os.getpid()}")
+        with record("upload"):
+            image = Image.open(io.BytesIO(data)).convert("RGB")
+        with record("detect"):
+            job = get_job_manager().submit(("scenario1", upload_hash(data, "load", 50)), _predict_image,
+                                           self.pick_endpoint, image, threshold=50, total=15)
+            current, bench, _ = self._wait(job)
+        service = get_service()
+        with record("team"):
+            champs = list_all_champs(models)
+            team = [c for c in dict.fromkeys(current) if c in champs][:5]
+            team += [c for c in champs if c not in team][:5 - len(team)]
+            wr = service.team_winrate(team, models)
+        with record("swaps"):
+            pool = [c for c in dict.fromkeys(b for b in bench if b) if c in champs and c not in team]
+            pool = pool or [c for c in champs if c not in team][:self.cfg["pool"]]
+            score_swaps(team, team[0], pool, models, base_wr=wr, batch_scorer=service.team_winrate_batch)
+
+    def scenario2(self, sid, n, session, record):
+        from inference_jobs import get_job_manager
+        from inference_service import get_service
+        from upload_store import get_upload_store
+
+        data = _unique(self.loading_png[(sid + n) % len(self.loading_png)], f"s{sid}f{n}p{os.getpid()}")
+        with record("upload"):
+            self._rerun()
+            key, shot = get_upload_store().put(data)
+        with record("detect"):
+            _, rc = self._rerun()
+            jobs = get_job_manager()
+            champ_job = jobs.submit(("champions", key), rc.extract_champions, shot, total=10, with_scores=True)
+            rune_job = jobs.submit(("runes", key), rc.crop_and_predict_RUNEs, shot, total=10)
+            champs10 = [c for c, _ in self._wait(champ_job)]
+            runes = self._wait(rune_job)
+        with record("select"):
+            self._rerun()
+        with record("recommend"):
+            _, rc = self._rerun()
+            my_team, enemy_team = rc.assemble_teams(champs10, runes, champs10[0])
+            get_service().build_recommendations(champs10[0], enemy_team)
+
+    def session(self, sid, barrier):
+        mix = self.cfg["mix"]
+        session = {}  # st.session_state 대용
+        barrier.wait()
+        n = 0
+        while time.perf_counter() < self.deadline and (not self.cfg["flows"] or n < self.cfg["flows"]):
+            scenario = mix[(sid + n) % len(mix)]
+            times = {}
+
+            class _Record:
+                def __init__(self, step):
+                    self.step = step
+
+                def __enter__(self):
+                    self.t0 = time.perf_counter()
+
+                def __exit__(self, *exc):
+                    times[self.step] = (time.perf_counter() - self.t0) * 1000.0
+
+            t0 = time.perf_counter()
+            try:
+                getattr(self, scenario)(sid, n, session, _Record)
+                ok = True
+            except Exception as e:
+                ok = False
+                self.last_error = repr(e)
+            total = (time.perf_counter() - t0) * 1000.0
+            with self.lock:
+                if ok:
+                    self.flows[scenario].append(total)
+                    for k, v in times.items():
+                        self.steps[scenario][k].append(v)
+                else:
+                    self.errors[scenario] += 1
+            n += 1
+            if self.cfg["think_ms"]:
+                time.sleep(self.cfg["think_ms"] / 1000.0)
+
+    def run(self):
+        self.setup()
+        n = self.cfg["sessions"]
+        # 모든 세션 스레드가 준비된 뒤 같은 시각에 시작
+        barrier = threading.Barrier(n + 1)
+        threads = [threading.Thread(target=self.session, args=(sid, barrier), daemon=True) for sid in range(n)]
+        for t in threads:
+            t.start()
+        self.deadline = time.perf_counter() + self.cfg["duration"]
+        t0 = time.perf_counter()
+        barrier.wait()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - t0
+
+        from inference_service import get_service
+        return {
+            "pid": os.getpid(),
+            "sessions": n,
+            "wall_s": round(wall, 3),
+            "rss_base_mb": _round(self.rss_base),
+            "rss_end_mb": _round(rss_mb()),
+            "rss_peak_mb": _round(peak_rss_mb()),
+            "flows": self.flows,
+            "steps": self.steps,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "service": get_service().stats(),
+        }
+
+
+def _predict_image(endpoint, image, threshold, on_tile=None):
+    from image import predict_image
+    return predict_image(endpoint, image, threshold=threshold, on_tile=on_tile)
+
+
+def _round(x):
+    return None if x is None else round(x, 1)
+
+
+def worker_main(cfg_json):
+    result = Worker(json.loads(cfg_json)).run()
+    print("LOADTEST_RESULT " + json.dumps(result, ensure_ascii=False, default=str), flush=True)
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 드라이버
+# ─────────────────────────────────────────────────────────────────────
+def _spawn(cfg):
+    return subprocess.Popen([sys.executable, "-m", "benchmarks.loadtest", "--worker", json.dumps(cfg)],
+                            cwd=ROOT_DIR, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            text=True, encoding="utf-8")
+
+
+def _collect(proc):
+    out, err = proc.communicate()
+    for line in reversed(out.splitlines()):
+        if line.startswith("LOADTEST_RESULT "):
+            return json.loads(line[len("LOADTEST_RESULT "):])
+    raise RuntimeError(f"워커 실패 (종료 코드 {proc.returncode}): {err.strip()[-2000:]}")
+
+
+def run_level(args, n):
+    """세션 n 개를 --procs 개 프로세스에 나눠 동시에 돌리고 합친다."""
+    procs = max(1, min(args.procs, n))
+    share = [n // procs + (i < n % procs) for i in range(procs)]
+    base = {"rows": args.rows, "seed": args.seed, "latency_ms": args.latency_ms, "poll_ms": args.poll_ms,
+            "duration": args.duration, "flows": args.flows, "think_ms": args.think_ms, "pool": args.pool,
+            "models": args.models, "mix": args.mix, "page_reload": not args.no_page_reload}
+    running = [_spawn(dict(base, sessions=k)) for k in share]
+    workers = [_collect(p) for p in running]
+
+    wall = max(w["wall_s"] for w in workers)
+    level = {"sessions": n, "procs": procs, "wall_s": wall, "scenarios": {},
+             "processes": [{k: w[k] for k in ("pid", "sessions", "rss_base_mb", "rss_end_mb", "rss_peak_mb",
+                                              "service", "last_error")} for w in workers]}
+    for s in SCENARIOS:
+        flows = [x for w in workers for x in w["flows"][s]]
+        errors = sum(w["errors"][s] for w in workers)
+        if not flows and not errors:
+            continue
+        level["scenarios"][s] = {
+            "flow": percentiles(flows),
+            "throughput_per_s": round(len(flows) / wall, 3) if wall else None,
+            "errors": errors,
+            "steps": {k: percentiles([x for w in workers for x in w["steps"][s][k]]) for k in STEPS[s]},
+        }
+    peaks = [w["rss_peak_mb"] for w in workers if w["rss_peak_mb"] is not None]
+    level["rss_peak_mb_max"] = max(peaks) if peaks else None
+    level["rss_peak_mb_sum"] = round(sum(peaks), 1) if peaks else None
+    return level
+
+
+def print_level(level):
+    rss = level["rss_peak_mb_max"]
+    print(f"N={level['sessions']:<4d} procs={level['procs']}  wall {level['wall_s']:.1f}s  "
+          f"최대 RSS/프로세스 {rss if rss is not None else '-'} MB")
+    for s, r in level["scenarios"].items():
+        f = r["flow"]
+        if f["n"]:
+            print(f"  {s:10s} {r['throughput_per_s']:7.2f} 흐름/s  p50 {f['p50_ms']:9.1f}  p95 {f['p95_ms']:9.1f}  "
+                  f"p99 {f['p99_ms']:9.1f} ms  오류 {r['errors']}")
+        else:
+            print(f"  {s:10s} 완료된 흐름 없음  오류 {r['errors']}")
+        for k, st in r["steps"].items():
+            if st["n"]:
+                print(f"      {k:10s} p50 {st['p50_ms']:9.1f}  p95 {st['p95_ms']:9.1f}  p99 {st['p99_ms']:9.1f} ms")
+    for p in level["processes"]:
+        if p["last_error"]:
+            print(f"  pid {p['pid']} 마지막 오류: {p['last_error']}")
+
+
+def check_budget(report, p95_ms=None, rss_mb=None):
+    """실패 항목 목록 (비어 있으면 통과). 흐름 오류는 예산 인자와 무관하게 항상 실패."""
+    failures = []
+    for level in report["levels"]:
+        for s, r in level["scenarios"].items():
+            p95 = r["flow"].get("p95_ms")
+            if p95_ms is not None and p95 is not None and p95 > p95_ms:
+                failures.append(f"N={level['sessions']} {s} p95 {p95:.0f} ms > {p95_ms:.0f} ms")
+            if r["errors"]:
+                failures.append(f"N={level['sessions']} {s} 오류 {r['errors']}건 (0건이어야 함)")
+        peak = level["rss_peak_mb_max"]
+        if rss_mb is not None and peak is not None and peak > rss_mb:
+            failures.append(f"N={level['sessions']} 최대 RSS {peak:.0f} MB > {rss_mb:.0f} MB")
+    return failures
+
+
+def compare(old_path, new_path):
+    old = {l["sessions"]: l for l in json.loads(Path(old_path).read_text(encoding="utf-8"))["levels"]}
+    new = {l["sessions"]: l for l in json.loads(Path(new_path).read_text(encoding="utf-8"))["levels"]}
+    print(f"{'N':>4s} {'scenario':10s} {'old p95':>10s} {'new p95':>10s} {'old /s':>8s} {'new /s':>8s} "
+          f"{'old RSS':>8s} {'new RSS':>8s}")
+    for n in sorted(set(old) & set(new)):
+        for s in SCENARIOS:
+            a, b = old[n]["scenarios"].get(s), new[n]["scenarios"].get(s)
+            if a is None or b is None:
+                continue
+            print(f"{n:4d} {s:10s} {a['flow'].get('p95_ms', float('nan')):10.1f} {b['flow'].get('p95_ms', float('nan')):10.1f} "
+                  f"{a['throughput_per_s']:8.2f} {b['throughput_per_s']:8.2f} "
+                  f"{old[n]['rss_peak_mb_max'] or 0:8.0f} {new[n]['rss_peak_mb_max'] or 0:8.0f}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ARAM 최적화 동시 세션 부하 테스트")
+    ap.add_argument("--worker", help=argparse.SUPPRESS)
+    ap.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16], help="동시 세션 수 단계")
+    ap.add_argument("--procs", type=int, default=1, help="서버 프로세스 수 (세션을 나눠 맡음)")
+    ap.add_argument("--duration", type=float, default=30.0, help="단계별 측정 시간(초)")
+    ap.add_argument("--flows", type=int, default=0, help="세션당 흐름 수 상한 (0 = 시간까지)")
+    ap.add_argument("--mix", nargs="+", choices=SCENARIOS, default=list(SCENARIOS), help="세션이 번갈아 돌릴 시나리오")
+    ap.add_argument("--models", choices=["train", "copy", "shared"], default="train",
+                    help="세션별 모델: train(앱 기본) / copy / shared")
+    ap.add_argument("--no-page-reload", action="store_true", help="시나리오2 rerun 마다 모듈 재import 안 함")
+    ap.add_argument("--rows", type=int, default=3000, help="합성 매치 행 수")
+    ap.add_argument("--pool", type=int, default=10, help="대기석이 비었을 때 교체 후보 수")
+    ap.add_argument("--latency-ms", type=float, default=50.0, help="스텁 엔드포인트 지연")
+    ap.add_argument("--poll-ms", type=float, default=500.0, help="작업 완료 확인 간격 (render_job_progress)")
+    ap.add_argument("--think-ms", type=float, default=0.0, help="흐름 사이 대기")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--budget-p95-ms", type=float, help="흐름 p95 상한 (넘으면 종료 코드 1)")
+    ap.add_argument("--budget-rss-mb", type=float, help="프로세스 최대 RSS 상한 (넘으면 종료 코드 1)")
+    ap.add_argument("--out", default="load_results.json")
+    ap.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = ap.parse_args(argv)
+
+    if args.worker:
+        worker_main(args.worker)
+        return
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    from benchmarks.run import _git_rev
+    levels = []
+    for n in args.sessions:
+        level = run_level(args, n)
+        print_level(level)
+        levels.append(level)
+    report = {
+        "meta": {"git_rev": _git_rev(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "cpu_count": os.cpu_count(),
+                 "params": {k: v for k, v in vars(args).items() if k not in ("compare", "out", "worker")}},
+        "levels": levels,
+    }
+    Path(args.out).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"저장: {args.out}")
+    failures = check_budget(report, args.budget_p95_ms, args.budget_rss_mb)
+    for f in failures:
+        print(f"실패: {f}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
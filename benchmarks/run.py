@@ -0,0 +1,242 @@
+# run.py — 벤치마크 실행기
+"""
+  python -m benchmarks.run --rows 5000 --repeat 20 --latency-ms 50 --out bench_results.json
+  python -m benchmarks.run --only team_winrate swap_loop
+  python -m benchmarks.run --compare before.json after.json
+
+측정 항목:
+  train_models, team_winrate, swap_loop, build_recommendation,
+  what_if_after_update (update_models 뒤 what_if_matrix 가 get_team_winrate 와 다르면 error 로 기록),
+  predict_image (스텁 Vertex), extract_champions_and_runes (스텁 Vision/Vertex),
+  crop_tiles / crop_tiles_legacy (15타일 자르기+리사이즈+JPEG, 일괄 엔진 / 기존 박스별 PIL)
+필요한 라이브러리가 없으면 해당 항목은 skipped 로 기록된다.
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks import synth, stubs
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+SCENARIO2_DIR = ROOT_DIR / "시나리오2"
+for p in (ROOT_DIR, SCENARIO2_DIR):
+    if str(p) not in sys.path:
+        sys.path.append(str(p))
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 측정 유틸
+# ─────────────────────────────────────────────────────────────────────
+def measure(fn, repeat: int = 10, warmup: int = 1):
+    for _ in range(warmup):
+        fn()
+    wall, cpu = [], []
+    for _ in range(repeat):
+        w0, c0 = time.perf_counter(), time.process_time()
+        fn()
+        wall.append((time.perf_counter() - w0) * 1000.0)
+        cpu.append((time.process_time() - c0) * 1000.0)
+    wall, cpu = np.asarray(wall), np.asarray(cpu)
+    return {
+        "repeat": repeat,
+        "mean_ms": round(float(wall.mean()), 3),
+        "p50_ms": round(float(np.percentile(wall, 50)), 3),
+        "p95_ms": round(float(np.percentile(wall, 95)), 3),
+        "min_ms": round(float(wall.min()), 3),
+        "max_ms": round(float(wall.max()), 3),
+        "cpu_mean_ms": round(float(cpu.mean()), 3),
+    }
+
+
+def _git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip()
+    except Exception:
+        return None
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 벤치마크 항목
+# ─────────────────────────────────────────────────────────────────────
+class Context:
+    def __init__(self, args):
+        self.args = args
+        self._models = None
+        self.champions = synth.champion_names()
+
+    @property
+    def models(self):
+        if self._models is None:
+            from ml import train_models
+            self._models = train_models(synth.make_match_df(self.args.rows, seed=self.args.seed), verbose=False)
+        return self._models
+
+
+def bench_train_models(ctx):
+    from ml import train_models
+    df = synth.make_match_df(ctx.args.rows, seed=ctx.args.seed)
+    return measure(lambda: train_models(df.copy(), verbose=False), repeat=max(1, ctx.args.repeat // 10), warmup=0)
+
+
+def bench_team_winrate(ctx):
+    from ml import get_team_winrate, list_all_champs
+    team = list_all_champs(ctx.models)[:5]
+    return measure(lambda: get_team_winrate(team, ctx.models), repeat=ctx.args.repeat)
+
+
+def bench_swap_loop(ctx):
+    from ml import list_all_champs, score_swaps
+    champs = list_all_champs(ctx.models)
+    team, pool = champs[:5], champs[5:5 + ctx.args.pool]
+    return measure(lambda: score_swaps(team, team[0], pool, ctx.models), repeat=max(1, ctx.args.repeat // 5))
+
+
+def bench_what_if_after_update(ctx):
+    """update_models 뒤 what_if_matrix (캐시된 팀 / 새 팀) 가 단일 팀 점수와 같은지 확인하고 재계산 시간을 잰다."""
+    from ml import check_what_if, list_all_champs, update_models, what_if_matrix
+    champs = list_all_champs(ctx.models)
+    cached, fresh, pool = champs[:5], champs[5:10], champs[10:10 + ctx.args.pool]
+    what_if_matrix(cached, ctx.models, candidates=pool)  # 갱신 전 모델로 캐시를 채운다
+    new_df = synth.make_match_df(max(ctx.args.rows // 10, 100), seed=ctx.args.seed + 1)
+    updated, _ = update_models(ctx.models, new_df, verbose=False)
+    for team in (cached, fresh):
+        check = check_what_if(team, updated, pool)
+        if not check["ok"]:
+            raise AssertionError(f"update_models 뒤 what_if 불일치: {team} {check}")
+    teams = itertools.cycle([champs[i:i + 5] for i in range(15, len(champs) - 5)])  # LRU 크기보다 많은 팀을 돌려 매번 미스
+    return measure(lambda: what_if_matrix(next(teams), updated, candidates=pool), repeat=ctx.args.repeat)
+
+
+def bench_build_recommendation(ctx):
+    import item_recommender as ir
+    if not ir.initialize_recommender():
+        raise RuntimeError("initialize_recommender 실패")
+    champ = next(iter(ir.champion_to_roles_map))
+    enemy = [(c, "정복자", r) for c, r in zip(ctx.champions[:5], ["AD전사", "AP암살자", "탱커", "서포터", "AD원딜"])]
+    return measure(lambda: ir.get_all_build_recommendations(champ, enemy), repeat=ctx.args.repeat)
+
+
+def bench_predict_image(ctx):
+    import image
+    endpoint = stubs.StubEndpoint(ctx.champions, latency_s=ctx.args.latency_ms / 1000.0)
+    shot = synth.make_pick_screenshot(seed=ctx.args.seed, n_empty_bench=ctx.args.empty_bench)
+    return measure(lambda: image.predict_image(endpoint, shot, threshold=50), repeat=max(1, ctx.args.repeat // 5))
+
+
+def bench_extract_champions_and_runes(ctx):
+    import rune_champion as rc
+    names = ctx.champions[:10]
+    stubs.install_scenario2_stubs(rc, names, list(rc.RUNE_NAME_MAP), latency_s=ctx.args.latency_ms / 1000.0)
+    shot = synth.make_loading_screenshot(seed=ctx.args.seed)
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "loading.png")
+        shot.save(path)
+        return measure(lambda: rc.extract_champions_and_runes(path, names[0]), repeat=max(1, ctx.args.repeat // 5))
+
+
+def _bench_crop(ctx, engine):
+    import image
+    from crop_engine import crop_encode
+    shot = synth.make_pick_screenshot(seed=ctx.args.seed, n_empty_bench=ctx.args.empty_bench)
+    w, h = shot.size
+    boxes = image._scale_coords(w, h, image.BLUE) + image._scale_coords(w, h, image.RED)
+    return measure(lambda: crop_encode(shot, boxes, (128, 128), quality=50, engine=engine), repeat=ctx.args.repeat)
+
+
+def bench_crop_tiles(ctx):
+    return _bench_crop(ctx, "batch")
+
+
+def bench_crop_tiles_legacy(ctx):
+    return _bench_crop(ctx, "pil")
+
+
+BENCHES = {
+    "train_models": bench_train_models,
+    "team_winrate": bench_team_winrate,
+    "swap_loop": bench_swap_loop,
+    "what_if_after_update": bench_what_if_after_update,
+    "build_recommendation": bench_build_recommendation,
+    "predict_image": bench_predict_image,
+    "extract_champions_and_runes": bench_extract_champions_and_runes,
+    "crop_tiles": bench_crop_tiles,
+    "crop_tiles_legacy": bench_crop_tiles_legacy,
+}
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 실행 / 비교
+# ─────────────────────────────────────────────────────────────────────
+def run(args):
+    ctx = Context(args)
+    results = {}
+    for name in args.only or BENCHES:
+        try:
+            results[name] = BENCHES[name](ctx)
+            print(f"{name:32s} p50 {results[name]['p50_ms']:10.2f} ms   mean {results[name]['mean_ms']:10.2f} ms")
+        except ImportError as e:
+            results[name] = {"skipped": f"import 실패: {e}"}
+            print(f"{name:32s} skipped ({e})")
+        except Exception as e:
+            results[name] = {"error": repr(e)}
+            print(f"{name:32s} error ({e!r})")
+    return {
+        "meta": {
+            "git_rev": _git_rev(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("compare", "out")},
+        },
+        "results": results,
+    }
+
+
+def compare(old_path, new_path):
+    old = json.loads(Path(old_path).read_text(encoding="utf-8"))["results"]
+    new = json.loads(Path(new_path).read_text(encoding="utf-8"))["results"]
+    print(f"{'bench':32s} {'old p50':>10s} {'new p50':>10s} {'ratio':>7s}")
+    for name in sorted(set(old) | set(new)):
+        a, b = old.get(name, {}).get("p50_ms"), new.get(name, {}).get("p50_ms")
+        if a is None or b is None:
+            print(f"{name:32s} {str(a):>10s} {str(b):>10s}       -")
+        else:
+            print(f"{name:32s} {a:10.2f} {b:10.2f} {b / a if a else float('inf'):7.2f}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ARAM 최적화 벤치마크")
+    ap.add_argument("--rows", type=int, default=5000, help="합성 매치 행 수")
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--pool", type=int, default=10, help="swap_loop 교체 후보 수")
+    ap.add_argument("--latency-ms", type=float, default=50.0, help="스텁 엔드포인트 지연")
+    ap.add_argument("--empty-bench", type=int, default=0, help="합성 픽 화면의 빈 대기석 수")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--only", nargs="*", choices=list(BENCHES))
+    ap.add_argument("--out", default="bench_results.json")
+    ap.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = ap.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    report = run(args)
+    Path(args.out).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"저장: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
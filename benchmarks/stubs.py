@@ -0,0 +1,75 @@
+# stubs.py — Vertex / Vision 엔드포인트 스텁 (지연 시간 설정 가능)
+from __future__ import annotations
+
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+
+class StubEndpoint:
+    """
+    aiplatform.Endpoint 대용. predict(instances=[...]) 마다 latency_s 만큼 쉬고
+    인스턴스마다 {'displayNames', 'confidences'} 를 돌려준다.
+    """
+
+    def __init__(self, labels, latency_s: float = 0.05, confidence: float = 0.9,
+                 fail_rate: float = 0.0, seed: int = 0):
+        self.labels = list(labels)
+        self.latency_s = latency_s
+        self.confidence = confidence
+        self.fail_rate = fail_rate
+        self.calls = 0
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+    def predict(self, instances, **kwargs):
+        with self._lock:
+            self.calls += 1
+            k = self._rng.integers(0, len(self.labels), len(instances))
+            fail = self._rng.random() < self.fail_rate
+        time.sleep(self.latency_s)
+        if fail:
+            raise RuntimeError("stub endpoint failure")
+        preds = []
+        for i in k:
+            rest = (1.0 - self.confidence) / max(len(self.labels) - 1, 1)
+            confs = [rest] * len(self.labels)
+            confs[i] = self.confidence
+            preds.append({"displayNames": self.labels, "confidences": confs})
+        return SimpleNamespace(predictions=preds)
+
+
+class StubVisionClient:
+    """vision.ImageAnnotatorClient 대용. text_detection 호출 순서대로 names 를 돌려준다."""
+
+    def __init__(self, names, latency_s: float = 0.05):
+        self.names = list(names)
+        self.latency_s = latency_s
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def text_detection(self, image=None, **kwargs):
+        with self._lock:
+            name = self.names[self.calls % len(self.names)]
+            self.calls += 1
+        time.sleep(self.latency_s)
+        return SimpleNamespace(
+            error=SimpleNamespace(message=""),
+            text_annotations=[SimpleNamespace(description=name)],
+        )
+
+
+# google.cloud.vision 모듈 대용 (vision.Image(content=...) 만 쓰임)
+stub_vision_module = SimpleNamespace(Image=lambda content=None, **kw: SimpleNamespace(content=content))
+
+
+def install_scenario2_stubs(rc, champion_names, rune_labels, latency_s: float = 0.05):
+    """rune_champion 모듈의 Vision/Vertex 클라이언트를 스텁으로 교체하고 (vision, rune) 스텁을 반환."""
+    vision = StubVisionClient(champion_names, latency_s)
+    rune = StubEndpoint(rune_labels, latency_s)
+    rc.vision_client = vision
+    rc.vision = stub_vision_module
+    rc.RUNE_endpoint = rune
+    return vision, rune
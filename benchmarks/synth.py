@@ -0,0 +1,128 @@
+# synth.py — 벤치마크용 합성 데이터 (renamed_data 형태 매치 CSV, 1920×1080 스크린샷)
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from PIL import Image, ImageDraw
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+AURA_KEYS = [
+    "damage_dealt", "damage_taken", "attack_speed", "skill_haste",
+    "hp_regen", "tenacity", "shield_absorb", "energy_regen",
+]
+ROLE_KEYS = ["ad_items", "ap_items", "tank_items", "ranged"]
+TAGS = ["Fighter", "Tank", "Mage", "Assassin", "Marksman", "Support"]
+STAT_TYPES = ["hp", "mp", "armor", "spellblock", "attackdamage", "attackspeed"]
+LVL_SUFFIXES = ["_lvl3", "_lvl6", "_lvl11", "_lvl16", "_lvl18"]
+
+# image.py / rune_champion.py 의 1920×1080 기준 좌표
+PICK_BLUE = [(83, 157 + 120 * i, 175, 248 + 120 * i) for i in range(5)]
+PICK_RED = [(529 + 88 * i, 16, 602 + 88 * i, 89) for i in range(10)]
+NAME_REGIONS = [
+    (243, 407, 487, 433), (539, 407, 783, 433), (834, 407, 1080, 433),
+    (1128, 407, 1375, 433), (1425, 407, 1671, 433), (243, 928, 487, 958),
+    (539, 928, 783, 958), (834, 928, 1080, 958), (1128, 928, 1375, 958),
+    (1425, 928, 1671, 958),
+]
+RUNE_BOXES = [
+    (255, 447, 281, 474), (551, 447, 577, 474), (847, 447, 873, 474),
+    (1144, 447, 1169, 474), (1440, 447, 1466, 474), (255, 971, 281, 999),
+    (551, 971, 577, 999), (847, 971, 873, 999), (1144, 971, 1169, 999),
+    (1440, 971, 1466, 999),
+]
+EMPTY_SLOT_RGB = (30, 35, 40)
+
+
+def champion_names():
+    return pd.read_csv(ROOT_DIR / "lol_champions.csv", encoding="utf-8")["name"].tolist()
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 매치 데이터
+# ─────────────────────────────────────────────────────────────────────
+def make_match_df(n_rows: int, seed: int = 0, champions=None) -> pd.DataFrame:
+    """
+    train_models 가 읽는 컬럼 구성의 합성 매치 데이터.
+    챔피언별 고정 오라/CC/역할/태그와 숨은 강함(strength)을 두고 승패를 만든다.
+    """
+    rng = np.random.default_rng(seed)
+    champs = np.asarray(champions or champion_names())
+    C = len(champs)
+    aura = rng.choice([0.9, 0.95, 1.0, 1.05, 1.1], size=(C, len(AURA_KEYS)))
+    cc = rng.integers(0, 4, C)
+    roles = rng.integers(0, 2, (C, len(ROLE_KEYS)))
+    tags = np.asarray([",".join(rng.choice(TAGS, rng.integers(1, 3), replace=False)) for _ in range(C)])
+    strength = rng.normal(0, 0.3, C)
+
+    # 행마다 서로 다른 5명: 난수 키의 argsort 앞 5개
+    idx = np.argsort(rng.random((n_rows, C)), axis=1)[:, :5]
+    cols = {}
+    for i in range(5):
+        ci = idx[:, i]
+        cols[f"champ{i + 1}_name"] = champs[ci]
+        for a, key in enumerate(AURA_KEYS):
+            cols[f"champ{i + 1}_name_{key}"] = aura[ci, a]
+        cols[f"champ{i + 1}_name_CCcount"] = cc[ci]
+        for r, role in enumerate(ROLE_KEYS):
+            cols[f"champ{i + 1}_is_{role}"] = roles[ci, r]
+        cols[f"champ{i + 1}_tags"] = tags[ci]
+    for s in STAT_TYPES:
+        for lvl in LVL_SUFFIXES:
+            cols[f"{s}{lvl}"] = rng.normal(100, 20, n_rows)
+    cols["win"] = (strength[idx].sum(axis=1) + rng.normal(0, 1, n_rows) > 0).astype(int)
+    return pd.DataFrame(cols)
+
+
+def make_match_csv(path, n_rows: int, seed: int = 0, chunk_rows: int = 100_000):
+    """큰 CSV 도 메모리 일정하게: chunk_rows 씩 만들어 이어 쓴다."""
+    path = Path(path)
+    for k, start in enumerate(range(0, n_rows, chunk_rows)):
+        part = make_match_df(min(chunk_rows, n_rows - start), seed=seed + k)
+        part.to_csv(path, mode="w" if k == 0 else "a", header=(k == 0), index=False, encoding="utf-8")
+    return path
+
+
+def make_teams(n: int, seed: int = 0, champions=None):
+    rng = np.random.default_rng(seed)
+    champs = np.asarray(champions or champion_names())
+    idx = np.argsort(rng.random((n, len(champs))), axis=1)[:, :5]
+    return champs[idx].tolist()
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 스크린샷
+# ─────────────────────────────────────────────────────────────────────
+def _noise_tile(rng, w, h):
+    base = rng.integers(40, 220, 3)
+    tile = np.clip(base + rng.normal(0, 25, (h, w, 3)), 0, 255).astype(np.uint8)
+    return Image.fromarray(tile)
+
+
+def make_pick_screenshot(seed: int = 0, n_empty_bench: int = 0, size=(1920, 1080)) -> Image.Image:
+    """ARAM 픽 화면 모양: BLUE 5칸 + RED(대기석) 10칸. 뒤쪽 n_empty_bench 칸은 빈 슬롯 단색."""
+    rng = np.random.default_rng(seed)
+    img = Image.new("RGB", (1920, 1080), (12, 16, 24))
+    for box in PICK_BLUE:
+        img.paste(_noise_tile(rng, box[2] - box[0], box[3] - box[1]), box[:2])
+    for k, box in enumerate(PICK_RED):
+        if k >= 10 - n_empty_bench:
+            ImageDraw.Draw(img).rectangle(box, fill=EMPTY_SLOT_RGB)
+        else:
+            img.paste(_noise_tile(rng, box[2] - box[0], box[3] - box[1]), box[:2])
+    return img if size == (1920, 1080) else img.resize(size)
+
+
+def make_loading_screenshot(seed: int = 0, size=(1920, 1080)) -> Image.Image:
+    """로딩 화면 모양: 챔피언 이름 칸 10개 + 룬 아이콘 10개."""
+    rng = np.random.default_rng(seed)
+    img = Image.new("RGB", (1920, 1080), (8, 10, 14))
+    dr = ImageDraw.Draw(img)
+    for k, box in enumerate(NAME_REGIONS):
+        dr.rectangle(box, fill=(20, 22, 28))
+        dr.text((box[0] + 8, box[1] + 6), f"CHAMP {k}", fill=(230, 220, 180))
+    for box in RUNE_BOXES:
+        img.paste(_noise_tile(rng, box[2] - box[0], box[3] - box[1]), box[:2])
+    return img if size == (1920, 1080) else img.resize(size)
@@ -0,0 +1,392 @@
+# build_compact.py — 시나리오2 빌드 LGBM 을 유효 입력 영역으로 가지치기한 소형 모델 (CompiledTrees) 로 내보내기
+"""
+빌드 점수 모델은 championName_* / enemy_role_* / item_* 원-핫 273열을 받지만, 실제 질의는
+  - 챔피언 열은 빌드 저장소에 있는 챔피언 중 하나만 1 (또는 모두 0),
+  - 아이템 열은 그 챔피언의 빌드에 나오는 아이템만 1,
+  - enemy_role_* 는 0~5 정수
+뿐이다. 각 트리를 이 영역 안에서 경로 제약(구간 + 챔피언 원-핫 + 챔피언별 아이템 집합)을 따라 내려가며
+절대 가지 않는 가지를 잘라내고, 리프 하나로 줄어든 트리는 base_margin 으로 접고, 남은 분기가 쓰는 열만 남긴다.
+유효 입력에 대해서는 원본과 같은 값을 내는 (float32 반올림 오차 안) 정확한 축소다.
+--max-prob-error 를 주면 영역 표본에서 기여 편차가 작은 트리부터 평균값으로 접어 더 줄인다 (근사).
+
+  python -m build_compact --out lgbm_model_compact.joblib --report build_compact_report.json
+  python -m build_compact --out lgbm_model_compact.joblib --max-prob-error 0.002
+
+item_recommender 는 registry 'build_model_compact' 가 있고 원본 모델/빌드 저장소 체크섬이 맞으면 이것을 쓴다
+(ARAM_BUILD_MODEL=lgbm 이면 항상 원본). 충실도 보고: 확률 오차, 질의별 역할 순위 / 챔피언·역할별 빌드 순위 일치율.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+import registry
+from profiling import span
+from tree_eval import CompiledTrees
+
+ROOT_DIR = Path(__file__).resolve().parent
+SCENARIO2_DIR = ROOT_DIR / "시나리오2"
+ENEMY_MAX = 5
+TIE_TOL = 1e-6
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 유효 입력 영역
+# ─────────────────────────────────────────────────────────────────────
+class InputDomain:
+    """
+    열별 정수 구간 [lo, hi] 와 챔피언 원-핫 제약.
+      champ_cols: 빌드가 있는 챔피언의 열 (나머지 챔피언 열은 hi=0)
+      champ_items: 챔피언 열 → 그 챔피언 빌드의 아이템 열 배열
+    """
+
+    def __init__(self, n_features, champ_cols, champ_items, item_cols, enemy_cols):
+        self.lo = np.zeros(n_features, dtype=np.int64)
+        self.hi = np.zeros(n_features, dtype=np.int64)
+        self.champ_cols = np.asarray(sorted(champ_cols), dtype=np.int64)
+        self.champ_items = {int(k): np.asarray(sorted(v), dtype=np.int64) for k, v in champ_items.items()}
+        self.item_cols = np.asarray(sorted(item_cols), dtype=np.int64)
+        self.is_champ = np.zeros(n_features, dtype=bool)
+        self.is_champ[self.champ_cols] = True
+        self.hi[self.champ_cols] = 1
+        self.hi[self.item_cols] = 1
+        self.hi[np.asarray(enemy_cols, dtype=np.int64)] = ENEMY_MAX
+
+    @classmethod
+    def from_recommender(cls, ir):
+        """초기화된 item_recommender 의 컬럼 위치 테이블(FEATURES) + 빌드 저장소로 영역을 만든다."""
+        from vocab import CHAMPIONS, norm
+        F = ir.FEATURES
+        champ_items, all_items = {}, set()
+        for champ in ir.champion_to_roles_map:
+            cid = CHAMPIONS.id(champ)
+            builds = ir.build_data.get(cid if cid >= 0 else champ) or {}
+            items = {F["item"][norm(it)] for sits in builds.values() for b in sits.values() for it in b
+                     if norm(it) in F["item"]}
+            all_items |= items
+            if cid >= 0 and F["champ"][cid] >= 0:
+                champ_items.setdefault(int(F["champ"][cid]), set()).update(items)
+        enemy = F["enemy_role"][F["enemy_role"] >= 0]
+        return cls(len(ir.trained_features), champ_items.keys(), champ_items, all_items, enemy)
+
+    def fix_champion(self, lo, hi, col):
+        """경로에서 챔피언 col 이 1 로 정해졌을 때: 다른 챔피언 열과 그 챔피언 빌드에 없는 아이템 열을 0 으로."""
+        hi[self.champ_cols] = 0
+        lo[col] = hi[col] = 1
+        allowed = np.zeros(len(hi), dtype=bool)
+        allowed[self.champ_items.get(int(col), self.item_cols)] = True
+        drop = self.item_cols[~allowed[self.item_cols]]
+        hi[drop] = 0
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 트리 가지치기
+# ─────────────────────────────────────────────────────────────────────
+def prune_tree(node, domain: InputDomain, lo=None, hi=None):
+    """
+    LightGBM tree_structure (dict) → 영역 안에서 도달 가능한 가지만 남긴 새 dict.
+    모든 입력이 정수이므로 x <= thr 은 x <= floor(thr) 와 같다.
+    """
+    lo = domain.lo.copy() if lo is None else lo
+    hi = domain.hi.copy() if hi is None else hi
+    if "split_feature" not in node:
+        return {"leaf_value": node["leaf_value"]}
+    f, thr = node["split_feature"], float(np.floor(node["threshold"]))
+    if hi[f] <= thr:
+        return prune_tree(node["left_child"], domain, lo, hi)
+    if lo[f] > thr:
+        return prune_tree(node["right_child"], domain, lo, hi)
+
+    llo, lhi = lo.copy(), hi.copy()
+    lhi[f] = min(lhi[f], int(thr))
+    rlo, rhi = lo.copy(), hi.copy()
+    rlo[f] = max(rlo[f], int(thr) + 1)
+    if domain.is_champ[f] and rlo[f] >= 1:
+        domain.fix_champion(rlo, rhi, f)
+    left = prune_tree(node["left_child"], domain, llo, lhi)
+    right = prune_tree(node["right_child"], domain, rlo, rhi)
+    if "leaf_value" in left and "leaf_value" in right and left["leaf_value"] == right["leaf_value"]:
+        return left
+    out = {k: node[k] for k in ("split_feature", "threshold", "decision_type", "default_left", "missing_type")
+           if k in node}
+    out["left_child"], out["right_child"] = left, right
+    return out
+
+
+def _used_features(node, acc):
+    if "split_feature" in node:
+        acc.add(node["split_feature"])
+        _used_features(node["left_child"], acc)
+        _used_features(node["right_child"], acc)
+    return acc
+
+
+def _remap(node, index):
+    if "split_feature" not in node:
+        return node
+    out = dict(node)
+    out["split_feature"] = index[node["split_feature"]]
+    out["left_child"] = _remap(node["left_child"], index)
+    out["right_child"] = _remap(node["right_child"], index)
+    return out
+
+
+def _count_nodes(node):
+    return 1 if "split_feature" not in node else 1 + _count_nodes(node["left_child"]) + _count_nodes(node["right_child"])
+
+
+def compact_model(model, domain: InputDomain, feature_names):
+    """LGBMClassifier → (남은 열만 받는 CompiledTrees, 통계)."""
+    dump = model.booster_.dump_model()
+    trees = [t["tree_structure"] for t in dump["tree_info"]]
+    with span("build_compact.prune"):
+        pruned = [prune_tree(t, domain) for t in trees]
+    base = sum(t["leaf_value"] for t in pruned if "split_feature" not in t)
+    kept = [t for t in pruned if "split_feature" in t]
+    used = sorted(set().union(*(_used_features(t, set()) for t in kept))) if kept else []
+    index = {f: i for i, f in enumerate(used)}
+    ct = CompiledTrees.from_lightgbm_trees([_remap(t, index) for t in kept], n_features=len(used),
+                                           feature_names=[feature_names[f] for f in used], base_margin=base)
+    stats = {
+        "trees": [len(trees), len(kept)],
+        "nodes": [sum(map(_count_nodes, trees)), sum(map(_count_nodes, kept))],
+        "features": [len(feature_names), len(used)],
+        "max_depth": ct.max_depth,
+    }
+    return ct, np.asarray(used, dtype=np.int64), stats
+
+
+def select_trees(ct: CompiledTrees, keep, extra_margin: float = 0.0) -> CompiledTrees:
+    """트리 인덱스 keep 만 남긴 새 CompiledTrees (버린 트리는 extra_margin 으로 접는다)."""
+    keep = np.asarray(sorted(keep), dtype=np.int64)
+    ends = np.append(ct.roots[1:], len(ct.feature))
+    nodes = np.concatenate([np.arange(ct.roots[t], ends[t]) for t in keep]) if len(keep) else np.zeros(0, np.int64)
+    new_index = np.full(len(ct.feature), -1, dtype=np.int64)
+    new_index[nodes] = np.arange(len(nodes))
+    leaf = ct.is_leaf[nodes]
+    remap = lambda a: np.where(leaf, -1, new_index[np.maximum(a[nodes], 0)])
+    return CompiledTrees(
+        ct.feature[nodes], ct.threshold[nodes], remap(ct.left), remap(ct.right), ct.default_left[nodes],
+        ct.value[nodes], new_index[ct.roots[keep]], base_margin=ct.base_margin + extra_margin, op=ct.op,
+        zero_missing=None if ct.zero_missing is None else ct.zero_missing[nodes],
+        n_features=ct.n_features_in_, feature_names=getattr(ct, "feature_names_in_", None),
+    )
+
+
+def drop_trees(ct: CompiledTrees, X, max_prob_error: float):
+    """
+    표본 X 에서 기여 표준편차가 작은 트리부터 평균값으로 접는다. 확률 최대 오차가 max_prob_error 를
+    넘기 직전까지 (이분 탐색). 반환: (새 CompiledTrees, 접은 트리 수).
+    """
+    V = ct.leaf_values(X).astype(np.float64)
+    ref = 1.0 / (1.0 + np.exp(-(V.sum(axis=1) + ct.base_margin)))
+    order = np.argsort(V.std(axis=0), kind="stable")
+    mean = V.mean(axis=0)
+
+    def error(k):
+        drop = order[:k]
+        m = V.sum(axis=1) - V[:, drop].sum(axis=1) + mean[drop].sum() + ct.base_margin
+        return float(np.abs(1.0 / (1.0 + np.exp(-m)) - ref).max())
+
+    lo, hi = 0, len(order)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if error(mid) <= max_prob_error:
+            lo = mid
+        else:
+            hi = mid - 1
+    drop = order[:lo]
+    keep = np.setdiff1d(np.arange(len(order)), drop)
+    return select_trees(ct, keep, float(mean[drop].sum())), int(lo)
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 충실도 검증
+# ─────────────────────────────────────────────────────────────────────
+def _load_recommender():
+    """원본 LGBM 기준으로 초기화한 item_recommender (이미 만든 소형 번들을 집지 않도록)."""
+    os.environ["ARAM_BUILD_MODEL"] = "lgbm"
+    if str(SCENARIO2_DIR) not in sys.path:
+        sys.path.append(str(SCENARIO2_DIR))
+    import item_recommender as ir
+    if not ir.initialize_recommender():
+        raise RuntimeError("item_recommender 초기화 실패")
+    return ir
+
+
+def sample_queries(ir, teams_per_champion: int = 20, seed: int = 0):
+    """빌드가 있는 챔피언마다 무작위 적 팀 teams_per_champion 개 → [(챔피언, 적 팀), ...]"""
+    from vocab import CHAMPIONS, ROLES
+    rng = np.random.default_rng(seed)
+    roles = list(ROLES.names)
+    out = []
+    for champ in ir.champion_to_roles_map:
+        for _ in range(teams_per_champion):
+            enemy = [(CHAMPIONS.names[k], "", roles[rng.integers(len(roles))])
+                     for k in rng.choice(len(CHAMPIONS), 5, replace=False)]
+            out.append((champ, enemy))
+    return out
+
+
+def all_build_rows(ir, champ, enemy_team):
+    """챔피언의 모든 (역할군, 상황키) 빌드를 같은 적 팀으로 채운 입력 행 → ([(역할군, 상황키)], X)."""
+    from vocab import CHAMPIONS, ROLES, norm
+    F = ir.FEATURES
+    cid = CHAMPIONS.id(champ)
+    builds = ir.build_data.get(cid if cid >= 0 else champ) or {}
+    enemy_ids = ROLES.ids([r for _, _, r in enemy_team])
+    counts = np.bincount(enemy_ids[enemy_ids >= 0], minlength=len(ROLES))
+    keys, rows = [], []
+    for role, sits in builds.items():
+        for sit, build in sits.items():
+            x = np.zeros(len(ir.trained_features))
+            if cid >= 0 and F["champ"][cid] >= 0:
+                x[F["champ"][cid]] = 1
+            pos = F["enemy_role"]
+            x[pos[pos >= 0]] = counts[pos >= 0]
+            for it in build:
+                p = F["item"].get(norm(it))
+                if p is not None:
+                    x[p] = 1
+            keys.append((role, sit))
+            rows.append(x)
+    return keys, (np.vstack(rows) if rows else np.zeros((0, len(ir.trained_features))))
+
+
+def _concordance(a, b):
+    """같은 후보 집합의 두 점수 → (쌍 일치 비율, 1위 일치, 순위 전체 일치). 기준 a 에서 동점인 쌍은 일치로 본다."""
+    n = len(a)
+    if n < 2:
+        return 1.0, True, True
+    i, j = np.triu_indices(n, 1)
+    da, db = a[i] - a[j], b[i] - b[j]
+    ok = (np.abs(da) <= TIE_TOL) | (np.sign(da) == np.sign(db))
+    top = np.abs(a - a.max()) <= TIE_TOL
+    return float(ok.mean()), bool(top[int(np.argmax(b))]), bool(ok.all())
+
+
+def fidelity(ir, reference, surrogate, cols, queries):
+    """원본(reference, 전체 열) 과 축소 모델(surrogate, cols 열) 을 같은 질의로 비교."""
+    import pandas as pd
+    report = {}
+    for name, make in (("served_role_ranking", lambda c, e: ir._build_candidates(c, e)[1]),
+                       ("builds_per_champion_role", lambda c, e: all_build_rows(ir, c, e)[1])):
+        groups, pa, pb = [], [], []
+        for champ, enemy in queries:
+            X = make(champ, enemy)
+            if not len(X):
+                continue
+            a = reference.predict_proba(pd.DataFrame(X, columns=ir.trained_features))[:, 1]
+            b = surrogate.predict_proba(X[:, cols])[:, 1]
+            pa.append(a)
+            pb.append(b)
+            if name == "served_role_ranking":
+                groups.append((a, b))
+            else:
+                keys = all_build_rows(ir, champ, enemy)[0]
+                for role in dict.fromkeys(r for r, _ in keys):
+                    m = np.array([r == role for r, _ in keys])
+                    groups.append((a[m], b[m]))
+        a, b = np.concatenate(pa), np.concatenate(pb)
+        conc = [_concordance(x, y) for x, y in groups]
+        report[name] = {
+            "rows": int(len(a)),
+            "rankings": len(conc),
+            "max_abs_prob_error": float(np.abs(a - b).max()),
+            "mean_abs_prob_error": float(np.abs(a - b).mean()),
+            "pair_agreement": float(np.mean([c[0] for c in conc])),
+            "top1_agreement": float(np.mean([c[1] for c in conc])),
+            "exact_order": float(np.mean([c[2] for c in conc])),
+        }
+    return report
+
+
+def _load_seconds(path, module_imports):
+    """새 프로세스에서 import + joblib.load 시간 (초)."""
+    code = (f"import time; t=time.perf_counter(); {module_imports}; import joblib; "
+            f"joblib.load({str(path)!r}); print(time.perf_counter()-t)")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True, timeout=300)
+    try:
+        return round(float(out.stdout.strip().splitlines()[-1]), 3)
+    except (ValueError, IndexError):
+        return None
+
+
+def serving_report(ir, reference, surrogate, cols, queries, ref_path, out_path):
+    import pandas as pd
+    from benchmarks.run import measure
+    one = ir._build_candidates(*queries[0])[1]
+    batch = np.vstack([ir._build_candidates(c, e)[1] for c, e in queries[:200]])
+    frame = lambda X: pd.DataFrame(X, columns=ir.trained_features)
+    return {
+        "file_bytes": [Path(ref_path).stat().st_size, Path(out_path).stat().st_size],
+        "pickle_bytes": [len(pickle.dumps(reference)), len(pickle.dumps(surrogate))],
+        "load_s": [_load_seconds(ref_path, "import lightgbm"), _load_seconds(out_path, "import tree_eval")],
+        "predict_one_query_ms": [measure(lambda: reference.predict_proba(frame(one)), repeat=50)["p50_ms"],
+                                 measure(lambda: surrogate.predict_proba(one[:, cols]), repeat=50)["p50_ms"]],
+        f"predict_{len(batch)}_rows_ms": [measure(lambda: reference.predict_proba(frame(batch)), repeat=10)["p50_ms"],
+                                          measure(lambda: surrogate.predict_proba(batch[:, cols]), repeat=10)["p50_ms"]],
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 번들 / CLI
+# ─────────────────────────────────────────────────────────────────────
+def make_bundle(model, stamps):
+    """서빙 번들: {"model": CompiledTrees(feature_names_in_ = 남은 열), "source": {아티팩트: sha256}}"""
+    return {"model": model, "source": stamps}
+
+
+def source_stamps():
+    return {name: registry.checksum(name) for name in ("build_model", "build_store")}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="빌드 LGBM → 유효 입력 영역 가지치기 소형 모델")
+    ap.add_argument("--out", default="lgbm_model_compact.joblib")
+    ap.add_argument("--report", default=None, help="충실도/서빙 보고 JSON 경로")
+    ap.add_argument("--max-prob-error", type=float, default=0.0, help="0 보다 크면 이 오차 안에서 트리를 더 접는다 (근사)")
+    ap.add_argument("--teams", type=int, default=20, help="챔피언당 검증용 무작위 적 팀 수")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    ir = _load_recommender()
+    reference = registry.get("build_model")
+    domain = InputDomain.from_recommender(ir)
+    t0 = time.perf_counter()
+    surrogate, cols, stats = compact_model(reference, domain, list(ir.trained_features))
+    stats["prune_s"] = round(time.perf_counter() - t0, 2)
+
+    if args.max_prob_error > 0:
+        # 트리 접기는 검증과 다른 시드의 표본으로 고른다
+        fit_q = sample_queries(ir, args.teams, seed=args.seed + 1)
+        X = np.vstack([all_build_rows(ir, c, e)[1] for c, e in fit_q])[:, cols]
+        surrogate, dropped = drop_trees(surrogate, X, args.max_prob_error)
+        stats["trees_folded"] = dropped
+        stats["trees"].append(surrogate.n_trees)
+
+    joblib.dump(make_bundle(surrogate, source_stamps()), args.out, compress=3)
+    target = registry.path("build_model_compact")
+    if target is not None and target.resolve() == Path(args.out).resolve():
+        registry.write_manifest(["build_model_compact"])  # 서빙 경로에 썼으면 매니페스트 sha256 도 갱신
+    queries = sample_queries(ir, args.teams, seed=args.seed)
+    report = {"stats": stats, "fidelity": fidelity(ir, reference, surrogate, cols, queries),
+              "serving": serving_report(ir, reference, surrogate, cols, queries,
+                                        registry.path("build_model"), args.out)}
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.report:
+        Path(args.report).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"저장: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+# build_store.py — 아이템 빌드 JSON → 컴파일된 바이너리 저장소 (mmap, 챔피언별 지연 디코드)
+"""
+템트리_converted_fixed.json ({챔피언: {역할군: {상황키: [아이템, ...]}}}) 을 한 번 컴파일해
+  - 문자열(챔피언/역할군/상황키/아이템)은 한 테이블에 인턴하고 정수 id 로만 참조
+  - 챔피언 색인 (이름 id, vocab 챔피언 id, 레코드 위치) + 챔피언별 u32 레코드
+로 저장하고, 읽을 때는 mmap 으로 열어 색인만 읽은 뒤 챔피언 레코드는 처음 조회할 때 디코드한다.
+
+  store = get_build_store("템트리_converted_fixed.json")   # 같은 경로면 프로세스에서 하나
+  store.roles("리 신")                                    # ['AD전사', ...]  ('리신' 표기도 같은 챔피언)
+  store.get("가렌")                                       # {역할군: {상황키: [아이템]}}
+  python -m build_store 템트리_converted_fixed.json       # 수동 컴파일 → 템트리_converted_fixed.store
+
+.store 파일은 JSON 옆에 만들고, JSON 크기/수정시각이 헤더와 다르면 다시 컴파일한다.
+쓸 수 없는 위치면 메모리에서 컴파일한 바이트를 그대로 쓴다.
+
+파일 구조 (리틀 엔디언):
+  헤더      <4sHHIIIQQ  magic 'ARBS', 버전, 0, 문자열 수, 챔피언 수, 레코드 시작, 원본 크기, 원본 mtime_ns
+  문자열    u32[문자열 수 + 1] 오프셋 + UTF-8 blob
+  챔피언    (이름 sid u32, vocab id i32, 레코드 오프셋 u32, 레코드 길이 u32) × 챔피언 수
+            vocab id 는 컴파일 시점 값(참고용). 열 때는 이름으로 다시 구한다 — lol_champions.csv 가 바뀌어도
+            JSON 이 그대로면 다시 컴파일하지 않으므로 저장된 id 는 다른 챔피언을 가리킬 수 있다.
+  레코드    u32 열: n_roles, (role_sid, n_sits, (sit_sid, n_items, item_sid × n_items) × n_sits) × n_roles
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+
+import numpy as np
+
+from profiling import timed
+from vocab import CHAMPIONS
+
+MAGIC = b"ARBS"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHIIIQQ")
+_CHAMP = np.dtype([("name", "<u4"), ("vocab", "<i4"), ("offset", "<u4"), ("length", "<u4")])
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 컴파일
+# ─────────────────────────────────────────────────────────────────────
+def _source_stamp(json_path):
+    st = os.stat(json_path)
+    return st.st_size, st.st_mtime_ns
+
+
+def compile_builds(build_data: dict, source_stamp=(0, 0)) -> bytes:
+    """빌드 dict → 바이너리 바이트."""
+    strings, sid = [], {}
+
+    def intern(s):
+        s = str(s)
+        i = sid.get(s)
+        if i is None:
+            i = sid[s] = len(strings)
+            strings.append(s)
+        return i
+
+    champs, records = [], []
+    offset = 0
+    for champ, roles in build_data.items():
+        rec = [len(roles)]
+        for role, sits in roles.items():
+            rec += [intern(role), len(sits)]
+            for sit, items in sits.items():
+                rec += [intern(sit), len(items)]
+                rec += [intern(it) for it in items]
+        champs.append((intern(champ), CHAMPIONS.id(champ), offset, len(rec)))
+        records.append(np.asarray(rec, dtype="<u4"))
+        offset += len(rec)
+
+    blobs = [s.encode("utf-8") for s in strings]
+    str_off = np.zeros(len(blobs) + 1, dtype="<u4")
+    np.cumsum([len(b) for b in blobs], out=str_off[1:])
+    blob = b"".join(blobs)
+    pad = b"\0" * (-len(blob) % 4)  # 레코드 u32 정렬
+
+    table = np.array(champs, dtype=_CHAMP)
+    head_len = _HEADER.size + str_off.nbytes + len(blob) + len(pad) + table.nbytes
+    header = _HEADER.pack(MAGIC, VERSION, 0, len(strings), len(champs), head_len, *source_stamp)
+    body = np.concatenate(records).tobytes() if records else b""
+    return b"".join([header, str_off.tobytes(), blob, pad, table.tobytes(), body])
+
+
+def compile_build_store(json_path, out_path=None) -> Path:
+    """JSON 파일 → .store 파일 (기본: JSON 옆, 확장자 .store)."""
+    json_path = Path(json_path)
+    out_path = Path(out_path) if out_path else json_path.with_suffix(".store")
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = compile_builds(json.load(f), _source_stamp(json_path))
+    tmp = out_path.with_name(f"{out_path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, out_path)
+    return out_path
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 읽기
+# ─────────────────────────────────────────────────────────────────────
+class BuildStore:
+    """컴파일된 빌드 저장소. 버퍼는 mmap 또는 bytes."""
+
+    def __init__(self, buf, source=None):
+        self._buf = buf
+        self.source = source
+        magic, version, _, n_strings, n_champs, rec_start, *stamp = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"빌드 저장소 형식이 아닙니다: {source}")
+        self.source_stamp = tuple(stamp)
+        pos = _HEADER.size
+        self._str_off = np.frombuffer(buf, dtype="<u4", count=n_strings + 1, offset=pos)
+        pos += self._str_off.nbytes
+        self._blob_start = pos
+        pos += int(self._str_off[-1])
+        pos += -pos % 4
+        self._champs = np.frombuffer(buf, dtype=_CHAMP, count=n_champs, offset=pos)
+        self._rec_start = rec_start
+        self._strings = {}
+        self._decoded = {}
+        self._lock = threading.Lock()
+        self.champions = [self._string(s) for s in self._champs["name"]]
+        self._by_name = {n: i for i, n in enumerate(self.champions)}
+        # vocab id 는 현재 어휘로 이름에서 구한다 (저장된 id 는 어휘가 바뀌면 낡는다, 챔피언 ~170명)
+        self._by_vocab = {}
+        for i, n in enumerate(self.champions):
+            v = CHAMPIONS.id(n)
+            if v >= 0:
+                self._by_vocab[v] = i
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mm, source=str(path))
+
+    def _string(self, i):
+        s = self._strings.get(i)
+        if s is None:
+            a, b = int(self._str_off[i]), int(self._str_off[i + 1])
+            s = self._strings[i] = bytes(self._buf[self._blob_start + a:self._blob_start + b]).decode("utf-8")
+        return s
+
+    def _index(self, champ):
+        """챔피언 이름(표기 무관) 또는 vocab 챔피언 id → 저장소 내 인덱스 (없으면 -1)."""
+        if isinstance(champ, (int, np.integer)):
+            return self._by_vocab.get(int(champ), -1)
+        i = self._by_name.get(champ)
+        if i is None:
+            i = self._by_vocab.get(CHAMPIONS.id(champ), -1)
+        return i
+
+    def _decode(self, i):
+        hit = self._decoded.get(i)
+        if hit is not None:
+            return hit
+        row = self._champs[i]
+        rec = np.frombuffer(self._buf, dtype="<u4", count=int(row["length"]),
+                            offset=self._rec_start + 4 * int(row["offset"])).tolist()
+        out, p = {}, 1
+        for _ in range(rec[0]):
+            role, n_sits = self._string(rec[p]), rec[p + 1]
+            p += 2
+            sits = out[role] = {}
+            for _ in range(n_sits):
+                sit, n_items = self._string(rec[p]), rec[p + 1]
+                sits[sit] = [self._string(s) for s in rec[p + 2:p + 2 + n_items]]
+                p += 2 + n_items
+        with self._lock:
+            self._decoded[i] = out
+        return out
+
+    def __len__(self):
+        return len(self.champions)
+
+    def __contains__(self, champ):
+        return self._index(champ) >= 0
+
+    def __iter__(self):
+        return iter(self.champions)
+
+    def get(self, champ, default=None):
+        """{역할군: {상황키: [아이템]}} (처음 조회 때 디코드 후 캐시)."""
+        i = self._index(champ)
+        return self._decode(i) if i >= 0 else default
+
+    def roles(self, champ):
+        return list((self.get(champ) or {}).keys())
+
+    def roles_map(self):
+        """{챔피언: [역할군]} 읽기 전용 뷰 (조회한 챔피언만 디코드)."""
+        return _RolesView(self)
+
+    def stats(self):
+        return {"champions": len(self), "decoded": len(self._decoded), "strings": len(self._str_off) - 1,
+                "bytes": len(self._buf), "source": self.source}
+
+
+class _RolesView(Mapping):
+    def __init__(self, store):
+        self._store = store
+
+    def __getitem__(self, champ):
+        if champ not in self._store:
+            raise KeyError(champ)
+        return self._store.roles(champ)
+
+    def __iter__(self):
+        return iter(self._store)
+
+    def __len__(self):
+        return len(self._store)
+
+
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+
+@timed("build_store.get_build_store")
+def get_build_store(json_path) -> BuildStore:
+    """
+    JSON 경로 → BuildStore (프로세스당 경로별 하나). 옆의 .store 가 없거나 JSON 과 맞지 않으면 컴파일한다.
+    페이지 모듈이 다시 실행돼도 이 모듈은 남으므로 JSON 을 다시 파싱하지 않는다.
+    """
+    json_path = Path(json_path)
+    key = str(json_path.resolve())
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is not None:
+            return store
+        store_path = json_path.with_suffix(".store")
+        stamp = _source_stamp(json_path)
+        store = None
+        if store_path.exists():
+            try:
+                store = BuildStore.open(store_path)
+                if store.source_stamp != stamp:
+                    store = None
+            except (OSError, ValueError, struct.error):
+                store = None
+        if store is None:
+            try:
+                store = BuildStore.open(compile_build_store(json_path, store_path))
+            except OSError:  # 읽기 전용 배포 등: 메모리에서 컴파일
+                with open(json_path, "r", encoding="utf-8") as f:
+                    store = BuildStore(compile_builds(json.load(f), stamp), source=str(json_path))
+        _STORES[key] = store
+        return store
+
+
+if __name__ == "__main__":
+    for p in sys.argv[1:]:
+        out = compile_build_store(p)
+        s = BuildStore.open(out)
+        print(f"{p} → {out} ({out.stat().st_size:,} bytes, 챔피언 {len(s)}, 문자열 {s.stats()['strings']})")
@@ -1,8 +1,6 @@
 # image.py — GitHub/Streamlit 배포용 (절대경로 제거, Secrets/ADC, 엔드포인트 캐싱)
 from __future__ import annotations
 
-import os
-import io
 import time
 import base64
 from typing import Tuple, Optional, List
@@ -10,9 +8,10 @@ from typing import Tuple, Optional, List
 import numpy as np
 from PIL import Image, ImageDraw
 
-# google-cloud
-from google.cloud import aiplatform
-from google.oauth2 import service_account
+from crop_engine import crop_encode
+from inference_clients import get_clients, CircuitOpenError
+from inference_service import get_service
+from profiling import timed, span
 
 # ─────────────────────────────────────────────────────────────────────
 # 좌표/스케일 설정
@@ -41,19 +40,67 @@ def _scale_coords(w: int, h: int, base: List[Tuple[int,int,int,int]],
     return [(int(l * rx) + dx, int(t * ry) + dy, int(r * rx) + dx, int(b * ry) + dy) for (l, t, r, b) in base]
 
 
-def _crop(image: Image.Image, dx: int = 0, dy: int = 0, sx: float = 1.0, sy: float = 1.0):
+def _crop(image: Image.Image, dx: int = 0, dy: int = 0, sx: float = 1.0, sy: float = 1.0, skip=()):
+    """skip 에 든 타일 인덱스는 리사이즈/JPEG 인코딩을 건너뛰고 None 을 넣는다."""
     w, h = image.size
     b = _scale_coords(w, h, BLUE, dx, dy, sx, sy)
     r = _scale_coords(w, h, RED,  dx, dy, sx, sy)
-    tiles = []
-    for (l, t, rr, bb) in b + r:
-        im = image.crop((l, t, rr, bb)).convert("RGB").resize((128, 128), Image.Resampling.LANCZOS)
-        buf = io.BytesIO()
-        im.save(buf, format="JPEG", quality=50)
-        tiles.append(buf.getvalue())
+    tiles = crop_encode(image, b + r, (128, 128), quality=50, skip=skip)
     return tiles, b, r
 
 
+# ─────────────────────────────────────────────────────────────────────
+# 타일 사전 필터 (빈 대기석 / 중복 타일은 추론 없이 결정)
+# ─────────────────────────────────────────────────────────────────────
+# 빈 슬롯 시그니처: 거의 단색 (회색조 표준편차가 작고, 색 히스토그램이 한 bin 에 몰림)
+EMPTY_MAX_STD = 6.0
+EMPTY_MIN_PEAK = 0.85
+# 중복 판정: 16×16 회색조 축소본 평균 절대차 + 히스토그램 교집합
+DUP_MAX_DIFF = 3.0
+DUP_MIN_HIST = 0.9
+
+
+def _tile_stats(arr: np.ndarray):
+    """arr: (H, W, 3) uint8 → (회색조 표준편차, 512-bin 색 히스토그램, 16×16 축소본)"""
+    gray = arr.astype(np.float32).mean(axis=2)
+    q = (arr >> 5).astype(np.int32)  # 채널당 8단계
+    codes = (q[..., 0] << 6) | (q[..., 1] << 3) | q[..., 2]
+    hist = np.bincount(codes.ravel(), minlength=512) / codes.size
+    h, w = gray.shape
+    ys = np.linspace(0, h, 17).astype(int)
+    xs = np.linspace(0, w, 17).astype(int)
+    thumb = np.add.reduceat(np.add.reduceat(gray, ys[:-1], axis=0), xs[:-1], axis=1)
+    thumb /= np.outer(np.diff(ys), np.diff(xs))
+    return float(gray.std()), hist, thumb
+
+
+def classify_tiles(image: Image.Image, boxes):
+    """
+    각 박스를 ("empty", None) / ("dup", 앞선 박스 인덱스) / ("infer", None) 로 분류.
+    화면을 한 번만 배열로 바꾸고 박스는 뷰로 잘라 본다 (리사이즈/인코딩 없음).
+    """
+    arr = np.asarray(image.convert("RGB"))
+    H, W = arr.shape[:2]
+    plan, seen = [], []
+    for i, (l, t, r, b) in enumerate(boxes):
+        tile = arr[max(t, 0):min(b, H), max(l, 0):min(r, W)]
+        if tile.size == 0:
+            plan.append(("infer", None))
+            continue
+        std, hist, thumb = _tile_stats(tile)
+        if std <= EMPTY_MAX_STD and hist.max() >= EMPTY_MIN_PEAK:
+            plan.append(("empty", None))
+            continue
+        dup = next((j for j, (h2, t2) in seen
+                    if np.minimum(hist, h2).sum() >= DUP_MIN_HIST and np.abs(thumb - t2).mean() <= DUP_MAX_DIFF), None)
+        if dup is not None:
+            plan.append(("dup", dup))
+        else:
+            plan.append(("infer", None))
+            seen.append((i, (hist, thumb)))
+    return plan
+
+
 def draw_overlay(img: Image.Image, b: List[Tuple[int,int,int,int]], r: List[Tuple[int,int,int,int]]):
     im = img.copy()
     dr = ImageDraw.Draw(im)
@@ -65,82 +112,50 @@ def draw_overlay(img: Image.Image, b: List[Tuple[int,int,int,int]], r: List[Tupl
 
 
 # ─────────────────────────────────────────────────────────────────────
-# Vertex 초기화 / 엔드포인트 캐시
+# Vertex 초기화 (공유 클라이언트 관리자)
 # ─────────────────────────────────────────────────────────────────────
-_ENDPOINT_CACHE = {}
-
-def _creds_from_env_or_b64(b64_str: Optional[str] = None):
-    """
-    우선순위:
-    1) 환경변수 GOOGLE_APPLICATION_CREDENTIALS 가 가리키는 JSON 파일
-    2) Base64 인코딩된 서비스계정 JSON(문자열) — Streamlit Secrets로 전달된 경우
-    3) None (ADC에 맡김; Cloud 런타임 서비스 계정 등)
-    """
-    # 1) 파일 경로(환경변수)
-    cred_path = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS")
-    if cred_path and os.path.exists(cred_path):
-        try:
-            return service_account.Credentials.from_service_account_file(cred_path)
-        except Exception:
-            pass  # fallthrough
-
-    # 2) Base64 문자열
-    if b64_str:
-        try:
-            raw = base64.b64decode(b64_str)
-            return service_account.Credentials.from_service_account_info(__import__("json").loads(raw))
-        except Exception:
-            pass  # fallthrough
-
-    # 3) None → ADC
-    return None
-
-
 def init_vertex(project_id: str, region: str, endpoint_id: str, credentials_b64: Optional[str] = None):
     """
     NOTE:
-      - 기존 코드의 credentials_path 인자는 제거.
-      - Streamlit Secrets의 GOOGLE_APPLICATION_CREDENTIALS_B64를 전달하거나,
-        환경변수 GOOGLE_APPLICATION_CREDENTIALS 또는 ADC를 사용.
+      - aiplatform.init(전역) 대신 inference_clients 의 공유 gRPC 클라이언트를 쓴다.
+      - 자격증명: 환경변수 GOOGLE_APPLICATION_CREDENTIALS → Base64(Secrets, 메모리 복원) → ADC.
+      - 같은 인자면 같은 ManagedEndpoint(동시성 제한 + 서킷 브레이커)를 돌려준다.
+      - ID 가 비었거나 예시 기본값이면 None (엔드포인트 미설정).
     """
-    region_l = region.strip().lower()
-    creds = _creds_from_env_or_b64(credentials_b64)
-
-    key = (project_id, region_l, endpoint_id, bool(creds))
-    if key in _ENDPOINT_CACHE:
-        return _ENDPOINT_CACHE[key]
-
-    aiplatform.init(
-        project=project_id,
-        location=region_l,
-        credentials=creds,  # None이면 ADC 사용
-        api_endpoint=f"{region_l}-aiplatform.googleapis.com",
-    )
-    ep = aiplatform.Endpoint(endpoint_id)
-    _ENDPOINT_CACHE[key] = ep
+    ep = get_clients().endpoint(project_id, region, endpoint_id, credentials_b64=credentials_b64)
+    if ep is not None:
+        get_clients().warm_up()
     return ep
 
 
 # ─────────────────────────────────────────────────────────────────────
 # 예측
 # ─────────────────────────────────────────────────────────────────────
-def _predict_one(endpoint, img_bytes: bytes, retries: int = 3, delay: float = 0.5) -> Tuple[Optional[str], float]:
-    inst = {"content": base64.b64encode(img_bytes).decode("utf-8")}
+def _parse_prediction(pred) -> Tuple[Optional[str], float]:
+    """Vertex 예측 하나 {'displayNames': [...], 'confidences': [...]} → (최고 라벨, 신뢰도 %)."""
+    pred = pred or {}
+    names = pred.get("displayNames", []) or pred.get("labels", [])
+    confs = pred.get("confidences", []) or pred.get("scores", [])
+    if not names or not confs:
+        return (None, 0.0)
+    i = int(np.argmax(confs))
+    return (str(names[i]), float(confs[i]) * 100.0)
+
+
+@timed("image._predict_many")
+def _predict_many(endpoint, tiles: List[bytes], retries: int = 3, delay: float = 0.5) -> List[Tuple[Optional[str], float]]:
+    """타일 여러 장을 predict 한 번 (인스턴스 여러 개) 으로. inference_service 의 타일 배치가 쓴다."""
+    instances = [{"content": base64.b64encode(t).decode("utf-8")} for t in tiles]
     last_err = None
     for _ in range(retries):
         try:
-            resp = endpoint.predict(instances=[inst])
+            resp = endpoint.predict(instances=instances)
             # Vertex 예측 응답 포맷: {'predictions': [{'displayNames': [...], 'confidences': [...]}], ...}
-            preds = getattr(resp, "predictions", None)
-            if not preds:
-                return (None, 0.0)
-            pred = preds[0] or {}
-            names = pred.get("displayNames", []) or pred.get("labels", [])
-            confs = pred.get("confidences", []) or pred.get("scores", [])
-            if not names or not confs:
-                return (None, 0.0)
-            i = int(np.argmax(confs))
-            return (str(names[i]), float(confs[i]) * 100.0)
+            preds = list(getattr(resp, "predictions", None) or [])
+            preds += [None] * (len(tiles) - len(preds))
+            return [_parse_prediction(p) for p in preds[:len(tiles)]]
+        except CircuitOpenError:
+            raise  # 엔드포인트 장애 중: 재시도/대기 없이 바로 실패
         except Exception as e:
             last_err = e
             time.sleep(delay)
@@ -148,24 +163,19 @@ def _predict_one(endpoint, img_bytes: bytes, retries: int = 3, delay: float = 0.
     raise last_err
 
 
-def predict_image(endpoint,
-                  image: Image.Image,
-                  threshold: float = 70.0,
-                  dx: int = 0, dy: int = 0,
-                  scale_w: float = 1.0, scale_h: float = 1.0):
-    """
-    반환값:
-      current: 상위 5개(픽) 라벨 목록 (threshold 미만은 제외)
-      bench:   뒤 10개(대기석) 라벨 목록 (Hwei/흐웨이 등은 None 처리)
-      overlay: 박스가 그려진 PIL.Image
-    """
-    tiles, b, r = _crop(image, dx, dy, scale_w, scale_h)
+@timed("image._predict_one")
+def _predict_one(endpoint, img_bytes: bytes, retries: int = 3, delay: float = 0.5) -> Tuple[Optional[str], float]:
+    return _predict_many(endpoint, [img_bytes], retries, delay)[0]
 
-    named = []
-    for t in tiles:
-        n, c = _predict_one(endpoint, t)
-        named.append((n if (n and c >= threshold) else None, c if c >= threshold else 0.0))
 
+def apply_threshold(pred: Tuple[Optional[str], float], threshold: float) -> Tuple[Optional[str], float]:
+    """(라벨, 신뢰도 %) → threshold 미만이면 (None, 0.0)."""
+    n, c = pred
+    return (n if (n and c >= threshold) else None, c if c >= threshold else 0.0)
+
+
+def split_picks(named):
+    """타일 15개 (라벨, 신뢰도) → (현재 픽 라벨 목록, 대기석 10칸 라벨 목록)."""
     # 앞 5개 = 현재 픽
     current = [n for (n, _) in named[:5] if n]
 
@@ -178,6 +188,54 @@ def predict_image(endpoint,
             bench.append(None)
         else:
             bench.append(n)
+    return current, bench
+
+
+@timed("image.predict_image")
+def predict_image(endpoint,
+                  image: Image.Image,
+                  threshold: float = 70.0,
+                  dx: int = 0, dy: int = 0,
+                  scale_w: float = 1.0, scale_h: float = 1.0,
+                  on_tile=None, prefilter: bool = True):
+    """
+    반환값:
+      current: 상위 5개(픽) 라벨 목록 (threshold 미만은 제외)
+      bench:   뒤 10개(대기석) 라벨 목록 (Hwei/흐웨이 등은 None 처리)
+      overlay: 박스가 그려진 PIL.Image
+    on_tile(i, (라벨, 신뢰도)) 는 타일 하나가 끝날 때마다 호출된다 (진행률/부분 결과 표시용).
+    prefilter=True 면 빈 대기석은 (None, 0.0), 같은 화면의 중복 대기석 타일은 앞 타일 결과를 그대로 써서
+    해당 타일의 리사이즈/인코딩/엔드포인트 호출을 생략한다.
+    """
+    plan = [("infer", None)] * len(BLUE)
+    if prefilter:
+        with span("image.prefilter"):
+            w, h = image.size
+            bench_plan = classify_tiles(image, _scale_coords(w, h, RED, dx, dy, scale_w, scale_h))
+            plan += [(k, None if j is None else len(BLUE) + j) for k, j in bench_plan]
+    else:
+        plan += [("infer", None)] * len(RED)
+    skip = {i for i, (kind, _) in enumerate(plan) if kind != "infer"}
+
+    with span("image.crop"):
+        tiles, b, r = _crop(image, dx, dy, scale_w, scale_h, skip=skip)
+
+    # 추론할 타일은 한꺼번에 공유 서비스 큐로 (다른 세션 타일과 묶여 엔드포인트 동시성 한도 안에서 처리)
+    futures = get_service().submit_tiles(endpoint, [t for i, t in enumerate(tiles) if i not in skip])
+    pending = iter(futures)
+
+    named = []
+    for i, t in enumerate(tiles):
+        kind, ref = plan[i]
+        if kind == "empty":
+            named.append((None, 0.0))
+        elif kind == "dup":
+            named.append(named[ref])
+        else:
+            named.append(apply_threshold(next(pending).result(), threshold))
+        if on_tile is not None:
+            on_tile(i, named[-1])
 
+    current, bench = split_picks(named)
     overlay = draw_overlay(image, b, r)
     return current, bench, overlay
@@ -0,0 +1,385 @@
+# inference_clients.py — 두 시나리오가 공유하는 Vertex/Vision 클라이언트 관리자
+"""
+- Vertex 엔드포인트: aiplatform.init(전역 상태)을 쓰지 않고 리전별 PredictionServiceClient(gRPC 채널)를
+  자격증명별로 하나만 만들어 재사용한다. 자격증명은 Base64 → 메모리에서 바로 복원 (임시 파일 없음).
+- 엔드포인트별 동시 호출 수 제한 (BoundedSemaphore)
+- 서킷 브레이커: 연속 실패가 failure_threshold 를 넘으면 reset_timeout 동안 즉시 CircuitOpenError.
+  이후 한 번의 시험 호출(half-open)이 성공하면 닫힌다.
+- warm_up(): gRPC 채널 연결과 액세스 토큰 발급을 백그라운드에서 미리 해 둔다.
+
+  from inference_clients import get_clients, CircuitOpenError
+  ep = get_clients().endpoint(project, region, endpoint_id, credentials_b64=b64)   # 미설정이면 None
+  ep.predict(instances=[{"content": ...}]).predictions      # aiplatform.Endpoint 와 같은 모양
+  vision_client = get_clients().vision(credentials_b64=b64)   # 생성 실패면 None (get_clients().failures())
+  생성 실패는 reset_timeout 동안 캐시하고 그 뒤 첫 호출이 다시 시도한다. 생성(ADC 탐색 수 초)은 관리자 락 밖에서.
+  get_clients().warm_up()
+
+환경변수 ARAM_ENDPOINT_CONCURRENCY (기본 8), ARAM_BREAKER_FAILURES (기본 5), ARAM_BREAKER_RESET_S (기본 30)
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+from typing import Optional
+
+try:
+    from google.cloud import aiplatform_v1, vision
+    from google.oauth2 import service_account
+    from google.protobuf import json_format
+    _GOOGLE_OK = True
+except Exception:
+    _GOOGLE_OK = False
+    aiplatform_v1 = vision = service_account = json_format = None
+
+from profiling import record
+
+_SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
+_PLACEHOLDER_PROJECTS = {"your-project-id", "project-id", "your-project"}
+
+
+def is_configured(project_id, endpoint_id) -> bool:
+    """
+    프로젝트/엔드포인트 ID 가 실제 값인지. 비었거나 예시 기본값 ("your-project-id", "0000…") 이면 False.
+    gapic 클라이언트는 생성 때 네트워크를 쓰지 않으므로, 여기서 걸러야 가짜 엔드포인트에 재시도·서킷 비용을 내지 않는다.
+    """
+    project, ep = str(project_id or "").strip(), str(endpoint_id or "").strip()
+    if not project or not ep:
+        return False
+    if project.lower() in _PLACEHOLDER_PROJECTS or project.lower().startswith("your-"):
+        return False
+    return set(ep) != {"0"}
+
+
+class CircuitOpenError(RuntimeError):
+    """서킷이 열려 있어 호출하지 않고 바로 실패."""
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 서킷 브레이커
+# ─────────────────────────────────────────────────────────────────────
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = int(failure_threshold)
+        self.reset_timeout = float(reset_timeout)
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half_open" if time.monotonic() - self._opened_at >= self.reset_timeout else "open"
+
+    def before_call(self, name: str = ""):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            waited = time.monotonic() - self._opened_at
+            if waited < self.reset_timeout or self._trial:
+                raise CircuitOpenError(f"{name} 서킷 열림 ({self.reset_timeout - waited:.0f}s 후 재시도)")
+            self._trial = True  # half-open: 시험 호출 하나만 통과
+
+    def record_success(self):
+        with self._lock:
+            self._failures, self._opened_at, self._trial = 0, None, False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 엔드포인트
+# ─────────────────────────────────────────────────────────────────────
+def _warm(channel, credentials, timeout: float):
+    """채널 연결 + 토큰 발급. 실패해도 조용히 넘어간다 (첫 호출 때 다시 시도됨)."""
+    try:
+        if credentials is not None and not credentials.valid:
+            from google.auth.transport.requests import Request
+            credentials.refresh(Request())
+    except Exception:
+        pass
+    try:
+        if channel is not None:
+            import grpc
+            grpc.channel_ready_future(channel).result(timeout=timeout)
+    except Exception:
+        pass
+
+
+class _GapicPredictor:
+    """PredictionServiceClient 호출을 aiplatform.Endpoint.predict 응답 모양으로 변환."""
+
+    def __init__(self, client, resource_name: str):
+        self.client = client
+        self.resource_name = resource_name
+
+    def predict(self, instances, parameters=None, timeout=None):
+        resp = self.client.predict(endpoint=self.resource_name, instances=instances,
+                                   parameters=parameters, timeout=timeout)
+        return SimpleNamespace(
+            predictions=[json_format.MessageToDict(v) for v in resp.predictions.pb],
+            deployed_model_id=resp.deployed_model_id,
+        )
+
+
+class ManagedEndpoint:
+    """동시성 제한 + 서킷 브레이커가 붙은 predict(instances=...) 래퍼."""
+
+    def __init__(self, name: str, predictor, max_concurrency: int = 8,
+                 breaker: Optional[CircuitBreaker] = None, timeout: Optional[float] = 30.0,
+                 channel=None, credentials=None):
+        self.name = name
+        self.predictor = predictor
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.max_concurrency = int(max_concurrency)
+        self._sem = threading.BoundedSemaphore(self.max_concurrency)
+        self._channel = channel
+        self._credentials = credentials
+        self._counts = {"calls": 0, "failures": 0, "rejected": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, key):
+        with self._lock:
+            self._counts[key] += 1
+
+    def predict(self, instances, parameters=None, timeout=None, **kwargs):
+        try:
+            self.breaker.before_call(self.name)
+        except CircuitOpenError:
+            self._count("rejected")
+            raise
+        with self._sem:
+            t0 = time.perf_counter()
+            self._count("calls")
+            try:
+                if isinstance(self.predictor, _GapicPredictor):
+                    resp = self.predictor.predict(instances, parameters, timeout or self.timeout)
+                else:
+                    resp = self.predictor.predict(instances=instances, **kwargs)
+            except Exception:
+                self._count("failures")
+                self.breaker.record_failure()
+                record(f"inference_clients.{self.name}", (time.perf_counter() - t0) * 1000.0, True)
+                raise
+        self.breaker.record_success()
+        record(f"inference_clients.{self.name}", (time.perf_counter() - t0) * 1000.0)
+        return resp
+
+    def warm_up(self, timeout: float = 10.0):
+        _warm(self._channel, self._credentials, timeout)
+
+    def stats(self):
+        with self._lock:
+            c = dict(self._counts)
+        return {**c, "state": self.breaker.state, "max_concurrency": self.max_concurrency}
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 관리자
+# ─────────────────────────────────────────────────────────────────────
+def _fingerprint(*parts) -> str:
+    h = hashlib.sha1()
+    for p in parts:
+        h.update(repr(p).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+class InferenceClients:
+    def __init__(self, max_concurrency: int = 8, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.max_concurrency = max_concurrency
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.RLock()
+        self._creds = {}
+        self._prediction_clients = {}
+        self._endpoints = {}
+        self._vision = {}
+        self._failed = {}  # 설정 키 → (이름, 생성 실패 사유, 실패 시각). reset_timeout 이 지나면 다시 시도
+        self._building = {}  # 클라이언트 키 → 생성 락 (같은 키만 직렬화)
+        self._warmed = set()
+
+    # 자격증명 -----------------------------------------------------------
+    def credentials(self, credentials_b64: Optional[str] = None):
+        """
+        우선순위 (image.py 기존 동작과 동일):
+        1) 환경변수 GOOGLE_APPLICATION_CREDENTIALS 가 가리키는 JSON 파일
+        2) Base64 서비스계정 JSON (메모리에서 바로 복원)
+        3) None (ADC)
+        반환: (credentials 또는 None, 캐시 키)
+        """
+        if not _GOOGLE_OK:
+            return None, "none"
+        cred_path = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS")
+        use_file = bool(cred_path and os.path.exists(cred_path))
+        key = _fingerprint("file", cred_path) if use_file else (
+            _fingerprint("b64", credentials_b64) if credentials_b64 else "adc")
+        with self._lock:
+            if key in self._creds:
+                return self._creds[key], key
+            creds = None
+            try:
+                if use_file:
+                    creds = service_account.Credentials.from_service_account_file(cred_path, scopes=_SCOPES)
+                elif credentials_b64:
+                    info = json.loads(base64.b64decode(credentials_b64))
+                    creds = service_account.Credentials.from_service_account_info(info, scopes=_SCOPES)
+            except Exception:
+                creds = None  # 복원 실패 → ADC
+            self._creds[key] = creds
+            return creds, key
+
+    def _build(self, cache, key, fail_key, fail_name, factory):
+        """
+        cache[key] 가 없으면 factory() 로 만든다. 생성은 관리자 락 밖에서 하고 같은 키끼리만 기다린다
+        (ADC 탐색은 수 초 걸리므로 그동안 stats()/failures()/다른 엔드포인트를 막지 않는다).
+        실패는 fail_key 로 reset_timeout 초 동안 캐시하고 None — 일시적 오류면 그 뒤 첫 호출이 다시 시도한다.
+        """
+        def cached():
+            with self._lock:
+                obj = cache.get(key)
+                failed = self._failed.get(fail_key)
+                if obj is None and failed is not None and time.monotonic() - failed[2] < self.reset_timeout:
+                    return None, True
+                return obj, False
+
+        obj, failed = cached()
+        if obj is not None or failed:
+            return obj
+        with self._lock:
+            build_lock = self._building.setdefault(key, threading.Lock())
+        with build_lock:
+            obj, failed = cached()  # 기다리는 동안 다른 스레드가 만들었거나 실패했을 수 있다
+            if obj is not None or failed:
+                return obj
+            try:
+                obj = factory()
+            except Exception as e:
+                with self._lock:
+                    self._failed[fail_key] = (fail_name, f"{type(e).__name__}: {e}", time.monotonic())
+                return None
+            with self._lock:
+                cache[key] = obj
+                self._failed.pop(fail_key, None)
+            return obj
+
+    # Vertex -------------------------------------------------------------
+    def endpoint(self, project_id: str, region: str, endpoint_id: str,
+                 credentials_b64: Optional[str] = None,
+                 max_concurrency: Optional[int] = None) -> Optional[ManagedEndpoint]:
+        """
+        공유 ManagedEndpoint. ID 가 비었거나 예시 기본값이면 (is_configured) None.
+        클라이언트 생성에 실패해도 None 이고, 실패는 같은 설정 키로 reset_timeout 동안 캐시한다 (사유: failures()).
+        """
+        if not _GOOGLE_OK:
+            raise RuntimeError("google-cloud-aiplatform 이 설치되어 있지 않습니다.")
+        if not is_configured(project_id, endpoint_id):
+            return None
+        region_l = region.strip().lower()
+        creds, ckey = self.credentials(credentials_b64)
+        ekey = (project_id, region_l, str(endpoint_id), ckey)
+        with self._lock:
+            ep = self._endpoints.get(ekey)
+        if ep is not None:
+            return ep
+        # 자격증명이 없으면 생성 중 ADC 탐색 (GCE 메타데이터 재시도로 수 초) 후 실패한다
+        client = self._build(
+            self._prediction_clients, (region_l, ckey), ekey, f"vertex.{endpoint_id}",
+            lambda: aiplatform_v1.PredictionServiceClient(
+                credentials=creds,
+                client_options={"api_endpoint": f"{region_l}-aiplatform.googleapis.com"},
+            ),
+        )
+        if client is None:
+            return None
+        with self._lock:
+            ep = self._endpoints.get(ekey)
+            if ep is None:
+                resource = f"projects/{project_id}/locations/{region_l}/endpoints/{endpoint_id}"
+                ep = self._endpoints[ekey] = ManagedEndpoint(
+                    f"vertex.{endpoint_id}", _GapicPredictor(client, resource),
+                    max_concurrency=max_concurrency or self.max_concurrency,
+                    breaker=CircuitBreaker(self.failure_threshold, self.reset_timeout),
+                    channel=getattr(client.transport, "grpc_channel", None),
+                    credentials=creds,
+                )
+            self._failed.pop(ekey, None)
+            return ep
+
+    def wrap(self, name: str, predictor, max_concurrency: Optional[int] = None) -> ManagedEndpoint:
+        """predict(instances=...) 를 가진 임의 객체(aiplatform.Endpoint, 스텁 등)에 같은 보호 장치를 씌운다."""
+        with self._lock:
+            ep = self._endpoints.get(("wrap", name))
+            if ep is None or ep.predictor is not predictor:
+                ep = self._endpoints[("wrap", name)] = ManagedEndpoint(
+                    name, predictor, max_concurrency=max_concurrency or self.max_concurrency,
+                    breaker=CircuitBreaker(self.failure_threshold, self.reset_timeout))
+            return ep
+
+    # Vision -------------------------------------------------------------
+    def vision(self, credentials_b64: Optional[str] = None):
+        """공유 Vision 클라이언트. 생성 실패는 자격증명 키별로 reset_timeout 동안 캐시하고 None (사유: failures())."""
+        if not _GOOGLE_OK:
+            return None
+        creds, ckey = self.credentials(credentials_b64)
+        return self._build(self._vision, ckey, ("vision", ckey), "vision",
+                           lambda: vision.ImageAnnotatorClient(credentials=creds))
+
+    # 예열 / 상태 ---------------------------------------------------------
+    def warm_up(self, background: bool = True, timeout: float = 10.0):
+        """아직 예열하지 않은 엔드포인트·Vision 채널을 예열한다."""
+        with self._lock:
+            todo = [(ep._channel, ep._credentials) for k, ep in self._endpoints.items() if k not in self._warmed]
+            self._warmed.update(self._endpoints)
+            for ckey, client in self._vision.items():
+                if ("vision", ckey) not in self._warmed:
+                    self._warmed.add(("vision", ckey))
+                    todo.append((getattr(client.transport, "grpc_channel", None), self._creds.get(ckey)))
+
+        def _run():
+            for channel, creds in todo:
+                _warm(channel, creds, timeout)
+
+        if background:
+            threading.Thread(target=_run, name="aram-warmup", daemon=True).start()
+        else:
+            _run()
+
+    def stats(self):
+        with self._lock:
+            eps = list(self._endpoints.values())
+        return {ep.name: ep.stats() for ep in eps}
+
+    def failures(self):
+        """{클라이언트 이름: 생성 실패 사유} — 마지막 시도가 실패한 클라이언트 (다시 만들면 지워진다)."""
+        with self._lock:
+            return {name: reason for name, reason, _ in self._failed.values()}
+
+
+_CLIENTS = None
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_clients() -> InferenceClients:
+    """프로세스 전역 관리자 (Streamlit 의 모든 세션·두 시나리오가 공유)."""
+    global _CLIENTS
+    with _CLIENTS_LOCK:
+        if _CLIENTS is None:
+            _CLIENTS = InferenceClients(
+                max_concurrency=int(os.environ.get("ARAM_ENDPOINT_CONCURRENCY", 8)),
+                failure_threshold=int(os.environ.get("ARAM_BREAKER_FAILURES", 5)),
+                reset_timeout=float(os.environ.get("ARAM_BREAKER_RESET_S", 30)),
+            )
+        return _CLIENTS
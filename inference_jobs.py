@@ -0,0 +1,163 @@
+# inference_jobs.py — 스크린샷 추론 백그라운드 작업 (업로드 해시 중복 제거 / 타일 단위 진행률)
+"""
+Streamlit 스크립트 스레드가 네트워크 호출 체인(predict_image, extract_champions …) 동안 막히지 않도록
+추론을 프로세스 전역 스레드 풀로 넘기고, 세션에는 작업 키만 둔다.
+
+  job = get_job_manager().submit(("scenario1", upload_hash(data, threshold)),
+                                 predict_image, endpoint, image, threshold=threshold, total=15)
+  if job.status == "done": current, bench, overlay = job.result
+  else: render_job_progress(job, "감지 중…", render_partial)   # 자동 새로고침, 끝나면 전체 rerun
+
+- 같은 키의 작업이 진행 중이거나 끝나 있으면 새로 만들지 않는다 (rerun/다른 세션 모두).
+  실패한 작업만 다시 제출된다.
+- 대상 함수는 on_tile(i, value) 콜백 키워드를 받아 타일이 끝날 때마다 부분 결과를 알린다.
+
+환경변수 ARAM_JOB_WORKERS (기본 4), ARAM_JOB_KEEP (보관할 작업 수, 기본 64)
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from profiling import record
+
+
+def upload_hash(data: bytes, *params) -> str:
+    """업로드 바이트 + 결과에 영향을 주는 파라미터로 만든 작업 키."""
+    h = hashlib.sha1(data)
+    for p in params:
+        h.update(b"\x1f" + repr(p).encode("utf-8"))
+    return h.hexdigest()
+
+
+class Job:
+    """백그라운드 작업 핸들. partial 은 타일 순서대로 채워지는 부분 결과."""
+
+    def __init__(self, key, total: int = 0):
+        self.key = key
+        self.total = int(total)
+        self.partial = [None] * self.total
+        self.done_tiles = 0
+        self.status = "pending"  # pending → running → done | error
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def report(self, i: int, value):
+        with self._lock:
+            if 0 <= i < self.total:
+                if self.partial[i] is None:
+                    self.done_tiles += 1
+                self.partial[i] = value
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("pending", "running")
+
+    def progress(self) -> float:
+        if self.status == "done":
+            return 1.0
+        return self.done_tiles / self.total if self.total else 0.0
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.partial)
+
+
+class JobManager:
+    def __init__(self, max_workers: int = 4, keep: int = 64):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="aram-infer")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.keep = keep
+
+    def get(self, key):
+        with self._lock:
+            return self._jobs.get(key)
+
+    def submit(self, key, fn, *args, total: int = 0, **kwargs) -> Job:
+        """key 작업이 없거나 실패했을 때만 새로 시작. 항상 해당 키의 Job 을 반환."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status != "error":
+                self._jobs.move_to_end(key)
+                return job
+            job = self._jobs[key] = Job(key, total)
+            self._evict()
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = "running"
+        t0 = time.perf_counter()
+        try:
+            job.result = fn(*args, on_tile=job.report, **kwargs)
+            job.status = "done"
+        except BaseException as e:
+            job.error = e
+            job.status = "error"
+        finally:
+            job.finished = time.time()
+            label = job.key[0] if isinstance(job.key, tuple) else "job"
+            record(f"inference_jobs.{label}", (time.perf_counter() - t0) * 1000.0, job.status == "error")
+
+    def _evict(self):
+        # 끝난 작업부터 오래된 순으로 정리 (진행 중 작업은 유지)
+        for k in [k for k, j in self._jobs.items() if not j.active]:
+            if len(self._jobs) <= self.keep:
+                break
+            del self._jobs[k]
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {s: sum(j.status == s for j in jobs) for s in ("pending", "running", "done", "error")}
+
+
+_MANAGER = None
+_MANAGER_LOCK = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    global _MANAGER
+    with _MANAGER_LOCK:
+        if _MANAGER is None:
+            _MANAGER = JobManager(
+                max_workers=int(os.environ.get("ARAM_JOB_WORKERS", 4)),
+                keep=int(os.environ.get("ARAM_JOB_KEEP", 64)),
+            )
+        return _MANAGER
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Streamlit 진행 표시
+# ─────────────────────────────────────────────────────────────────────
+_POLL = None
+
+
+def render_job_progress(job: Job, label: str, render_partial=None, interval: float = 0.5):
+    """
+    진행 중 작업의 진행률/부분 결과를 fragment 로 주기적으로 다시 그린다.
+    나머지 페이지는 그대로 상호작용 가능하고, 작업이 끝나면 전체 스크립트를 한 번 rerun 한다.
+    """
+    global _POLL
+    import streamlit as st
+
+    if _POLL is None:
+        @st.experimental_fragment(run_every=interval)
+        def _poll(key, label, render_partial):
+            j = get_job_manager().get(key)
+            if j is None or not j.active:
+                st.rerun()
+            st.progress(j.progress(), text=f"{label} ({j.done_tiles}/{j.total})")
+            if render_partial is not None:
+                render_partial(j.snapshot())
+        _POLL = _poll
+
+    _POLL(job.key, label, render_partial)
@@ -0,0 +1,526 @@
+# inference_service.py — 세션 간 마이크로 배치 추론 서비스 (프로세스 내 공유 + 로컬 HTTP)
+"""
+세션마다 모델/엔드포인트를 따로 부르던 것을 요청 큐 하나로 모은다.
+요청은 작업별 큐에 들어가 짧은 창(max_wait_ms) 동안 또는 max_batch 개가 찰 때까지 모였다가
+묶음당 한 번 벡터화 추론으로 처리된다. 큐가 꽉 차면 바로 ServiceOverloaded(역압),
+마감 시각이 지난 요청은 추론하지 않고 DeadlineExceeded.
+
+  from inference_service import get_service
+  svc = get_service()                                    # 프로세스 전역 (Streamlit 세션 스레드가 공유)
+  svc.team_winrate(team, models)                         # → float (같은 모델 요청끼리 get_team_winrate_batch 한 번)
+  svc.team_winrate_batch(teams, models)                  # → np.ndarray
+  svc.build_recommendations(my_champion, enemy_team)     # → item_recommender.get_all_build_recommendations 와 같은 값
+  futs = svc.submit_tiles(endpoint, [jpeg, ...])         # → [Future[(라벨, 신뢰도 %)]] (엔드포인트별 묶음)
+
+작업별 묶음 기준:
+  winrate  모델 번들(team_cache.model_version) 별. team_cache 를 거치므로 같은 팀은 한 번만 계산
+  builds   item_recommender.recommend_builds_batch (LGBM predict_proba 한 번)
+  tiles    엔드포인트별 predict(instances=[...]). AutoML 이미지 엔드포인트는 요청당 인스턴스 1개만
+           받으므로 기본 묶음 크기는 1 이고, 대신 워커 여러 개가 엔드포인트 동시성 한도 안에서 병렬 호출한다.
+
+로컬 HTTP (다른 프로세스/레플리카가 같은 배치를 공유):
+  python -m inference_service --models models.joblib --port 8765
+  ARAM_INFERENCE_URL=http://127.0.0.1:8765 streamlit run Home.py
+    → 서버 번들과 버전이 같은 모델의 승률과 빌드 추천은 서버로, 나머지(세션이 따로 학습한 모델, 타일)는 프로세스 안에서.
+  POST /v1/winrate {"teams": [[5명], ...], "version": 선택, "timeout_ms": 선택} → {"winrate": [...], "version"}
+  POST /v1/builds  {"queries": [{"champion": ..., "enemy_team": [[챔피언, 룬, 역할군], ...]}]} → {"results": [...]}
+  GET  /v1/health, /v1/stats
+  큐 초과 503 (Retry-After), 마감 초과 504, 모르는 모델 버전 409.
+
+환경변수 ARAM_BATCH_MAX (기본 64), ARAM_BATCH_WAIT_MS (기본 5), ARAM_QUEUE_MAX (기본 1024),
+         ARAM_TILE_BATCH (기본 1), ARAM_TILE_WORKERS (기본 ARAM_ENDPOINT_CONCURRENCY 또는 8),
+         ARAM_INFERENCE_URL (설정 시 원격 서버 우선)
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+from profiling import record
+
+ROOT_DIR = Path(__file__).resolve().parent
+
+
+class ServiceOverloaded(RuntimeError):
+    """큐가 가득 차 요청을 받지 않음 (잠시 후 재시도)."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """처리 전에 요청 마감 시각이 지남."""
+
+
+class UnknownModelVersion(LookupError):
+    """원격 서버에 해당 모델 번들이 없음."""
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 마이크로 배처
+# ─────────────────────────────────────────────────────────────────────
+class _Request:
+    __slots__ = ("item", "group", "deadline", "enqueued", "future")
+
+    def __init__(self, item, group, deadline):
+        self.item = item
+        self.group = group
+        self.deadline = deadline
+        self.enqueued = time.monotonic()
+        self.future = Future()
+
+
+class MicroBatcher:
+    """
+    submit 한 항목을 같은 group 끼리 모아 run_batch(group, items) → 결과 목록 (같은 길이) 로 처리.
+    첫 항목이 들어온 뒤 max_wait_ms 가 지나거나 max_batch 개가 차면 묶음을 떼어 낸다.
+    워커가 바쁜 동안 쌓인 요청은 창을 기다리지 않고 바로 큰 묶음이 된다.
+    """
+
+    def __init__(self, name: str, run_batch, max_batch: int = 64, max_wait_ms: float = 5.0,
+                 max_queue: int = 1024, workers: int = 1):
+        self.name = name
+        self.run_batch = run_batch
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.max_queue = int(max_queue)
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._counts = {"submitted": 0, "rejected": 0, "expired": 0, "cancelled": 0,
+                        "batches": 0, "items": 0, "failures": 0, "max_batch_seen": 0}
+        self._threads = [threading.Thread(target=self._loop, name=f"aram-batch-{name}-{i}", daemon=True)
+                         for i in range(max(1, int(workers)))]
+        for t in self._threads:
+            t.start()
+
+    # 제출 ---------------------------------------------------------------
+    def submit_many(self, items, group=None, timeout: float | None = None):
+        """항목들을 한꺼번에 넣고 Future 목록을 반환. 자리가 모자라면 하나도 넣지 않고 ServiceOverloaded."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        reqs = [_Request(it, group, deadline) for it in items]
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"{self.name} 배처가 닫혔습니다.")
+            if len(self._queue) + len(reqs) > self.max_queue:
+                self._counts["rejected"] += len(reqs)
+                raise ServiceOverloaded(f"{self.name} 큐 초과 ({len(self._queue)}/{self.max_queue})")
+            self._queue.extend(reqs)
+            self._counts["submitted"] += len(reqs)
+            self._cond.notify_all()
+        return [r.future for r in reqs]
+
+    def submit(self, item, group=None, timeout: float | None = None) -> Future:
+        return self.submit_many([item], group, timeout)[0]
+
+    # 워커 ---------------------------------------------------------------
+    def _take(self):
+        """같은 group 의 요청을 최대 max_batch 개 떼어 낸다 (잠금 안에서 호출)."""
+        group = self._queue[0].group
+        batch, rest = [], deque()
+        while self._queue and len(batch) < self.max_batch:
+            r = self._queue.popleft()
+            (batch if r.group == group else rest).append(r)
+        rest.extend(self._queue)
+        self._queue = rest
+        return group, batch
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                # 창: 첫 요청이 들어온 시각 기준 (이미 오래 기다린 요청은 더 기다리지 않음)
+                while not self._closed and len(self._queue) < self.max_batch:
+                    remaining = self._queue[0].enqueued + self.max_wait - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                    if not self._queue:
+                        break
+                if not self._queue:
+                    continue
+                group, batch = self._take()
+            self._run(group, batch)
+
+    def _run(self, group, batch):
+        now = time.monotonic()
+        live = []
+        for r in batch:
+            if r.deadline is not None and now > r.deadline:
+                r.future.set_exception(DeadlineExceeded(f"{self.name} 마감 초과 (대기 {now - r.enqueued:.3f}s)"))
+                self._count("expired")
+            elif not r.future.set_running_or_notify_cancel():
+                self._count("cancelled")
+            else:
+                live.append(r)
+        if not live:
+            return
+        t0 = time.perf_counter()
+        try:
+            results = self.run_batch(group, [r.item for r in live])
+            if len(results) != len(live):
+                raise RuntimeError(f"{self.name} 결과 수 불일치 ({len(results)} != {len(live)})")
+        except BaseException as e:
+            for r in live:
+                r.future.set_exception(e)
+            self._count("failures")
+            record(f"inference_service.{self.name}", (time.perf_counter() - t0) * 1000.0, True)
+            return
+        for r, v in zip(live, results):
+            r.future.set_result(v)
+        record(f"inference_service.{self.name}", (time.perf_counter() - t0) * 1000.0)
+        with self._cond:
+            self._counts["batches"] += 1
+            self._counts["items"] += len(live)
+            self._counts["max_batch_seen"] = max(self._counts["max_batch_seen"], len(live))
+
+    def _count(self, key):
+        with self._cond:
+            self._counts[key] += 1
+
+    # 상태 ---------------------------------------------------------------
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            c = dict(self._counts)
+            depth = len(self._queue)
+        return {**c, "queue": depth, "max_queue": self.max_queue, "max_batch": self.max_batch,
+                "mean_batch": round(c["items"] / c["batches"], 2) if c["batches"] else 0.0}
+
+
+def _wait(futures, timeout=None):
+    return [f.result(timeout=timeout) for f in futures]
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 서비스
+# ─────────────────────────────────────────────────────────────────────
+def _load_recommender():
+    """시나리오2 item_recommender (서비스가 자기 참조를 들고 있으므로 페이지가 모듈을 다시 로드해도 유지)."""
+    path = str(ROOT_DIR / "시나리오2")
+    if path not in sys.path:
+        sys.path.append(path)
+    import item_recommender
+    if not item_recommender.initialize_recommender():
+        raise RuntimeError("item_recommender 초기화 실패 (모델/데이터 경로를 확인하세요)")
+    return item_recommender
+
+
+class InferenceService:
+    def __init__(self, max_batch: int = 64, max_wait_ms: float = 5.0, max_queue: int = 1024,
+                 tile_batch: int = 1, tile_workers: int = 8, remote=None, keep_models: int = 8):
+        self.remote = remote
+        self.keep_models = keep_models
+        self._models = OrderedDict()  # 모델 버전 → 번들
+        self._lock = threading.Lock()
+        self._recommender = None
+        self.winrate = MicroBatcher("winrate", self._run_winrate, max_batch, max_wait_ms, max_queue)
+        self.builds = MicroBatcher("builds", self._run_builds, max_batch, max_wait_ms, max_queue)
+        self.tiles = MicroBatcher("tiles", self._run_tiles, tile_batch, max_wait_ms, max_queue, workers=tile_workers)
+
+    # 모델 번들 (HTTP 서버가 버전으로 찾아 쓸 번들) ----------------------
+    def register_models(self, models) -> str:
+        from team_cache import model_version
+        version = model_version(models)
+        with self._lock:
+            self._models[version] = models
+            self._models.move_to_end(version)
+            while len(self._models) > self.keep_models:
+                self._models.popitem(last=False)
+        return version
+
+    def models(self, version):
+        with self._lock:
+            models = self._models.get(version)
+        if models is None:
+            raise UnknownModelVersion(version)
+        return models
+
+    def versions(self):
+        with self._lock:
+            return list(self._models)
+
+    # 배치 실행 ----------------------------------------------------------
+    def _run_winrate(self, version, items):
+        # 항목 = (팀, 모델 번들). 같은 묶음은 모두 같은 버전이므로 첫 번들로 한 번에 채점
+        from team_cache import cached_team_winrate_batch
+        return cached_team_winrate_batch([t for t, _ in items], items[0][1]).tolist()
+
+    def recommender(self):
+        with self._lock:
+            if self._recommender is None:
+                self._recommender = _load_recommender()
+            return self._recommender
+
+    def _run_builds(self, _, queries):
+        return self.recommender().recommend_builds_batch(queries)
+
+    def _run_tiles(self, endpoint, tiles):
+        from image import _predict_many
+        return _predict_many(endpoint, tiles)
+
+    # 공개 API -----------------------------------------------------------
+    def team_winrate_batch(self, teams, models, timeout: float | None = None) -> np.ndarray:
+        from team_cache import model_version
+        teams = [list(map(str, t)) for t in teams]
+        version = model_version(models)
+        if self.remote is not None and self.remote.has_version(version):
+            try:
+                return self.remote.team_winrate_batch(teams, version=version, timeout=timeout)
+            except (UnknownModelVersion, ConnectionError, urllib.error.URLError):
+                self.remote.forget()  # 서버 재시작/중단: 이번 요청부터 프로세스 안에서
+        futures = self.winrate.submit_many([(t, models) for t in teams], version, timeout)
+        return np.array(_wait(futures), dtype=np.float64)
+
+    def team_winrate(self, team, models, timeout: float | None = None) -> float:
+        return float(self.team_winrate_batch([team], models, timeout)[0])
+
+    def build_recommendations(self, my_champion, enemy_team, timeout: float | None = None):
+        if self.remote is not None and self.remote.has_builds():
+            try:
+                return self.remote.build_recommendations(my_champion, enemy_team, timeout=timeout)
+            except (UnknownModelVersion, ConnectionError, urllib.error.URLError):
+                self.remote.forget()
+        return self.builds.submit((my_champion, [tuple(e) for e in enemy_team]), None, timeout).result()
+
+    def submit_tiles(self, endpoint, tiles, timeout: float | None = None):
+        """타일 JPEG 바이트 목록 → Future[(라벨, 신뢰도 %)] 목록 (입력 순서)."""
+        return self.tiles.submit_many(list(tiles), endpoint, timeout)
+
+    def stats(self):
+        return {"winrate": self.winrate.stats(), "builds": self.builds.stats(), "tiles": self.tiles.stats(),
+                "models": len(self._models), "remote": self.remote.url if self.remote is not None else None}
+
+    def close(self):
+        for b in (self.winrate, self.builds, self.tiles):
+            b.close()
+
+
+_SERVICE = None
+_SERVICE_LOCK = threading.Lock()
+
+
+def get_service() -> InferenceService:
+    """프로세스 전역 서비스 (환경변수로 설정). Streamlit 의 모든 세션이 같은 큐를 쓴다."""
+    global _SERVICE
+    with _SERVICE_LOCK:
+        if _SERVICE is None:
+            url = os.environ.get("ARAM_INFERENCE_URL")
+            _SERVICE = InferenceService(
+                max_batch=int(os.environ.get("ARAM_BATCH_MAX", 64)),
+                max_wait_ms=float(os.environ.get("ARAM_BATCH_WAIT_MS", 5)),
+                max_queue=int(os.environ.get("ARAM_QUEUE_MAX", 1024)),
+                tile_batch=int(os.environ.get("ARAM_TILE_BATCH", 1)),
+                tile_workers=int(os.environ.get("ARAM_TILE_WORKERS", os.environ.get("ARAM_ENDPOINT_CONCURRENCY", 8))),
+                remote=ServiceClient(url) if url else None,
+            )
+        return _SERVICE
+
+
+# ─────────────────────────────────────────────────────────────────────
+# HTTP 클라이언트
+# ─────────────────────────────────────────────────────────────────────
+class ServiceClient:
+    """로컬 추론 서버 클라이언트. 서버가 가진 모델 버전은 health_ttl 초 동안 캐시."""
+
+    def __init__(self, url: str, timeout: float = 30.0, health_ttl: float = 30.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.health_ttl = health_ttl
+        self._health = None
+        self._health_at = 0.0
+
+    def _call(self, path, payload=None, timeout=None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else None
+        req = urllib.request.Request(self.url + path, data=data, method="POST" if data is not None else "GET",
+                                     headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(req, timeout=(timeout or self.timeout) + 1.0) as resp:
+                return json.loads(resp.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            detail = e.read().decode("utf-8", "replace")
+            if e.code == 503:
+                raise ServiceOverloaded(detail) from None
+            if e.code == 504:
+                raise DeadlineExceeded(detail) from None
+            if e.code == 409:
+                raise UnknownModelVersion(detail) from None
+            raise RuntimeError(f"추론 서버 오류 {e.code}: {detail}") from None
+
+    def health(self, refresh: bool = False):
+        now = time.monotonic()
+        if refresh or self._health is None or now - self._health_at > self.health_ttl:
+            try:
+                self._health = self._call("/v1/health", timeout=2.0)
+            except (ConnectionError, urllib.error.URLError, OSError):
+                self._health = {"ok": False, "versions": [], "builds": False}
+            self._health_at = now
+        return self._health
+
+    def forget(self):
+        """다음 호출 때 서버 상태를 다시 확인."""
+        self._health = None
+
+    def available(self) -> bool:
+        return bool(self.health().get("ok"))
+
+    def has_version(self, version) -> bool:
+        return version in self.health().get("versions", [])
+
+    def has_builds(self) -> bool:
+        """빌드 추천을 켠 서버인지 (--no-builds 서버는 /v1/builds 에 409)."""
+        return bool(self.health().get("builds"))
+
+    def team_winrate_batch(self, teams, version=None, timeout=None) -> np.ndarray:
+        payload = {"teams": [list(map(str, t)) for t in teams], "version": version}
+        if timeout is not None:
+            payload["timeout_ms"] = timeout * 1000.0
+        return np.asarray(self._call("/v1/winrate", payload, timeout)["winrate"], dtype=np.float64)
+
+    def build_recommendations(self, my_champion, enemy_team, timeout=None):
+        payload = {"queries": [{"champion": my_champion, "enemy_team": [list(e) for e in enemy_team]}]}
+        if timeout is not None:
+            payload["timeout_ms"] = timeout * 1000.0
+        return self._call("/v1/builds", payload, timeout)["results"][0]
+
+    def stats(self):
+        return self._call("/v1/stats")
+
+
+# ─────────────────────────────────────────────────────────────────────
+# HTTP 서버
+# ─────────────────────────────────────────────────────────────────────
+def _jsonable(v):
+    if isinstance(v, dict):
+        return {k: _jsonable(x) for k, x in v.items()}
+    if isinstance(v, (list, tuple)):
+        return [_jsonable(x) for x in v]
+    if isinstance(v, np.generic):
+        return v.item()
+    return v
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service: InferenceService = None
+    default_version: str | None = None
+    builds_enabled: bool = False
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):  # 요청마다 stderr 에 찍지 않음
+        pass
+
+    def _send(self, code, body, headers=()):
+        data = json.dumps(_jsonable(body), ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in headers:
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        svc = self.service
+        if self.path == "/v1/health":
+            self._send(200, {"ok": True, "versions": svc.versions(), "default_version": self.default_version,
+                             "builds": self.builds_enabled})
+        elif self.path == "/v1/stats":
+            self._send(200, svc.stats())
+        else:
+            self._send(404, {"error": f"없는 경로: {self.path}"})
+
+    def do_POST(self):
+        svc = self.service
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            timeout = body["timeout_ms"] / 1000.0 if body.get("timeout_ms") else None
+            if self.path == "/v1/winrate":
+                version = body.get("version") or self.default_version
+                teams = body["teams"]
+                if any(len(t) != 5 for t in teams):
+                    raise ValueError("팀은 5명이어야 합니다.")
+                models = svc.models(version)  # 없으면 409
+                values = _wait(svc.winrate.submit_many([(list(map(str, t)), models) for t in teams], version, timeout))
+                self._send(200, {"winrate": values, "version": version})
+            elif self.path == "/v1/builds":
+                if not self.builds_enabled:
+                    raise UnknownModelVersion("빌드 추천이 비활성화된 서버입니다.")
+                queries = [(q["champion"], [tuple(e) for e in q["enemy_team"]]) for q in body["queries"]]
+                self._send(200, {"results": _wait(svc.builds.submit_many(queries, None, timeout))})
+            else:
+                self._send(404, {"error": f"없는 경로: {self.path}"})
+        except ServiceOverloaded as e:
+            self._send(503, {"error": str(e)}, [("Retry-After", "1")])
+        except DeadlineExceeded as e:
+            self._send(504, {"error": str(e)})
+        except UnknownModelVersion as e:
+            self._send(409, {"error": f"모르는 모델 버전: {e}"})
+        except (KeyError, TypeError, ValueError) as e:
+            self._send(400, {"error": f"잘못된 요청: {e!r}"})
+        except Exception as e:
+            self._send(500, {"error": repr(e)})
+
+
+def make_server(service: InferenceService, host: str = "127.0.0.1", port: int = 8765,
+                default_version=None, builds: bool = True) -> ThreadingHTTPServer:
+    """요청마다 스레드 하나 (각 스레드는 큐에 넣고 기다리기만 하므로 동시 요청이 한 묶음으로 모인다)."""
+    handler = type("Handler", (_Handler,), {"service": service, "default_version": default_version,
+                                            "builds_enabled": builds})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ARAM 로컬 추론 서버 (마이크로 배치)")
+    src = ap.add_mutually_exclusive_group()
+    src.add_argument("--models", help="joblib 로 저장한 train_models 결과 튜플")
+    src.add_argument("--train-csv", help="시작할 때 train_models 로 학습할 매치 CSV")
+    ap.add_argument("--no-builds", action="store_true", help="시나리오2 빌드 추천 비활성화")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--max-batch", type=int, default=int(os.environ.get("ARAM_BATCH_MAX", 64)))
+    ap.add_argument("--max-wait-ms", type=float, default=float(os.environ.get("ARAM_BATCH_WAIT_MS", 5)))
+    ap.add_argument("--max-queue", type=int, default=int(os.environ.get("ARAM_QUEUE_MAX", 1024)))
+    args = ap.parse_args(argv)
+
+    service = InferenceService(args.max_batch, args.max_wait_ms, args.max_queue)
+    version = None
+    if args.models or args.train_csv:
+        import joblib
+        from ml import read_csv_safe, train_models
+        models = joblib.load(args.models) if args.models else train_models(read_csv_safe(args.train_csv), verbose=False)
+        version = service.register_models(models)
+    if not args.no_builds:
+        service.recommender()  # 첫 요청 전에 모델 로드
+
+    server = make_server(service, args.host, args.port, default_version=version, builds=not args.no_builds)
+    print(f"[inference_service] http://{args.host}:{args.port}  모델 {version or '없음'}  "
+          f"빌드 {'사용' if not args.no_builds else '안 함'}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+# live_capture.py — 픽 화면 프레임 스트림 추적 (타일 프레임 차분 → 바뀐 타일만 재분류 → 교체 추천 증분 갱신)
+"""
+챔피언 선택 동안 대기석은 계속 바뀌지만, 프레임마다 15타일을 다시 추론할 필요는 없다.
+image.BLUE / RED 박스마다 16×16 회색조 축소본을 들고 있다가, 마지막으로 분류했을 때보다
+평균 절대차가 diff_threshold 를 넘은 타일만 다시 자르고 공유 추론 서비스로 분류한다.
+
+  tracker = TileTracker(endpoint, threshold=50)
+  swaps = SwapTracker(models)
+  for name, frame in iter_folder("frames/"):           # 폴더에 새로 생기는 스크린샷 (또는 iter_files)
+      st = tracker.update(frame)                        # {"changed": [...], "current": [...], "bench": [...], ...}
+      if st["changed"]:
+          rows = swaps.update(st["current"], st["bench"])   # 새 대기석 후보만 채점
+
+  python -m live_capture --watch frames/ --models models.joblib --project P --region R --endpoint-id E
+  python -m live_capture --watch frames/ --train-csv renamed_data.csv --stub   # 스텁 엔드포인트로 오프라인 시연
+
+- 빈 슬롯(단색)으로 바뀐 타일은 추론 없이 비운다 (image.classify_tiles 와 같은 기준).
+- 프레임 크기가 바뀌면 좌표를 다시 계산하고 모든 타일을 다시 분류한다.
+- SwapTracker 는 (현재 팀) 이 같으면 이미 채점한 (슬롯, 후보) 를 재사용하고 새 후보 열만 what_if_matrix 로 계산한다.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from crop_engine import crop_encode
+from image import (BLUE, RED, EMPTY_MAX_STD, EMPTY_MIN_PEAK, _scale_coords, _tile_stats,
+                   apply_threshold, split_picks)
+from inference_service import get_service
+from profiling import timed, span
+
+# 마지막 분류 시점 대비 16×16 회색조 축소본 평균 절대차 (0~255). JPEG/스트리밍 잡음은 보통 2~3 이하
+DIFF_THRESHOLD = 8.0
+FRAME_SUFFIXES = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 프레임 소스
+# ─────────────────────────────────────────────────────────────────────
+def _open_frame(path):
+    with Image.open(path) as im:
+        img = im.convert("RGB")
+    img.load()
+    return img
+
+
+def iter_files(paths):
+    """이미지 경로 목록 → (이름, 프레임) 순서대로."""
+    for p in paths:
+        yield str(p), _open_frame(p)
+
+
+def iter_folder(folder, poll_s: float = 0.2, once: bool = False, stop=None):
+    """
+    폴더에 새로 생기거나 다시 쓰인 스크린샷을 수정 시각 순서로 (이름, 프레임). once=True 면 지금 있는 파일만.
+    같은 파일(latest.png 등)을 덮어쓰는 캡처 도구도 있으므로 이름과 수정 시각으로 새 프레임을 가린다.
+    아직 쓰는 중이라 열리지 않는 파일은 다음 폴링 때 다시 시도한다. stop() 이 참이면 끝낸다.
+    """
+    folder = Path(folder)
+    seen = {}  # 이름 → 마지막으로 읽은 st_mtime_ns
+    while stop is None or not stop():
+        stamped = [(p.stat().st_mtime_ns, p.name, p) for p in folder.iterdir() if p.suffix.lower() in FRAME_SUFFIXES]
+        new = sorted((t for t in stamped if seen.get(t[1]) != t[0]), key=lambda t: t[:2])
+        for mtime, name, p in new:
+            try:
+                frame = _open_frame(p)
+            except OSError:
+                break  # 쓰는 중: 순서를 지키려고 이후 파일도 다음 폴링으로
+            seen[name] = mtime
+            yield name, frame
+        if once:
+            return
+        time.sleep(poll_s)
+
+
+def latest_frame(folder):
+    """
+    폴더에서 가장 최근 스크린샷 ((이름, st_mtime_ns), 프레임) 또는 None (Streamlit 폴링용).
+    키에 수정 시각이 있으므로 같은 파일을 덮어써도 새 프레임으로 구분된다.
+    """
+    stamped = [(p.stat().st_mtime_ns, p.name, p) for p in Path(folder).iterdir() if p.suffix.lower() in FRAME_SUFFIXES]
+    for mtime, name, p in sorted(stamped, key=lambda t: t[:2], reverse=True):
+        try:
+            return (name, mtime), _open_frame(p)
+        except OSError:
+            continue
+    return None
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 타일 추적
+# ─────────────────────────────────────────────────────────────────────
+class TileTracker:
+    """15타일(BLUE 5 + RED 10)의 마지막 분류 결과와 그때의 축소본."""
+
+    def __init__(self, endpoint, threshold: float = 50.0, diff_threshold: float = DIFF_THRESHOLD,
+                 dx: int = 0, dy: int = 0, scale_w: float = 1.0, scale_h: float = 1.0):
+        self.endpoint = endpoint
+        self.threshold = threshold
+        self.diff_threshold = diff_threshold
+        self.offset = (dx, dy, scale_w, scale_h)
+        self.reset()
+
+    def reset(self):
+        n = len(BLUE) + len(RED)
+        self.size = None
+        self.boxes = []
+        self.thumbs = [None] * n
+        self.labels = [(None, 0.0)] * n
+        self.frames = 0
+        self.counts = {"frames": 0, "changed": 0, "inferred": 0, "empty": 0}
+
+    def _boxes(self, size):
+        w, h = size
+        dx, dy, sx, sy = self.offset
+        return _scale_coords(w, h, BLUE, dx, dy, sx, sy) + _scale_coords(w, h, RED, dx, dy, sx, sy)
+
+    def changed_tiles(self, arr):
+        """(바뀐 타일 인덱스, 빈 슬롯 인덱스 집합, 타일별 축소본) — 프레임 배열 한 번으로."""
+        H, W = arr.shape[:2]
+        changed, empty, thumbs = [], set(), []
+        for i, (l, t, r, b) in enumerate(self.boxes):
+            tile = arr[max(t, 0):min(b, H), max(l, 0):min(r, W)]
+            if tile.size == 0:
+                thumbs.append(None)
+                continue
+            std, hist, thumb = _tile_stats(tile)
+            thumbs.append(thumb)
+            prev = self.thumbs[i]
+            if prev is None or np.abs(thumb - prev).mean() > self.diff_threshold:
+                changed.append(i)
+                if std <= EMPTY_MAX_STD and hist.max() >= EMPTY_MIN_PEAK:
+                    empty.add(i)
+        return changed, empty, thumbs
+
+    @timed("live_capture.update")
+    def update(self, frame: Image.Image, on_tile=None):
+        """
+        프레임 하나 반영. 반환: {"frame", "changed", "inferred", "current", "bench", "labels", "ms"}
+        on_tile(i, (라벨, 신뢰도)) 는 다시 분류한 타일마다 호출된다.
+        """
+        t0 = time.perf_counter()
+        frame = frame if frame.mode == "RGB" else frame.convert("RGB")
+        if frame.size != self.size:
+            self.reset()
+            self.size = frame.size
+            self.boxes = self._boxes(frame.size)
+        with span("live_capture.diff"):
+            changed, empty, thumbs = self.changed_tiles(np.asarray(frame))
+
+        infer = [i for i in changed if i not in empty]
+        if infer:
+            skip = set(range(len(self.boxes))) - set(infer)
+            with span("live_capture.crop"):
+                tiles = crop_encode(frame, self.boxes, (128, 128), quality=50, skip=skip)
+            futures = get_service().submit_tiles(self.endpoint, [tiles[i] for i in infer])
+        else:
+            futures = []
+        pending = dict(zip(infer, futures))
+
+        for i in changed:
+            self.labels[i] = (None, 0.0) if i in empty else apply_threshold(pending[i].result(), self.threshold)
+            self.thumbs[i] = thumbs[i]
+            if on_tile is not None:
+                on_tile(i, self.labels[i])
+
+        self.frames += 1
+        for k, v in (("frames", 1), ("changed", len(changed)), ("inferred", len(infer)), ("empty", len(empty))):
+            self.counts[k] += v
+        current, bench = split_picks(self.labels)
+        return {"frame": self.frames, "changed": changed, "inferred": len(infer), "current": current,
+                "bench": bench, "labels": list(self.labels), "ms": (time.perf_counter() - t0) * 1000.0}
+
+    def stats(self):
+        c = dict(self.counts)
+        c["tiles_per_frame"] = round(c["inferred"] / c["frames"], 2) if c["frames"] else 0.0
+        return c
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 교체 추천 증분 갱신
+# ─────────────────────────────────────────────────────────────────────
+class SwapTracker:
+    """현재 팀 × 대기석 후보 교체 승률. 팀이 같으면 새로 들어온 후보 열만 계산한다."""
+
+    def __init__(self, models, candidates_filter=None):
+        self.models = models
+        self.known = set(candidates_filter) if candidates_filter is not None else None
+        self.team = None
+        self.base = None
+        self.scores = {}  # 후보 → 슬롯별 승률 (5,)
+        self.counts = {"updates": 0, "scored": 0, "reused": 0}
+
+    @timed("live_capture.swaps")
+    def update(self, team, bench):
+        """
+        team: 현재 픽 5명, bench: 대기석 라벨 (None 허용).
+        반환: [{"교체 대상", "교체 챔피언", "새 승률(%)", "변화량 Δ(%)"}, ...] Δ 내림차순 (팀이 5명이 아니면 []).
+        """
+        from ml import what_if_matrix
+        self.counts["updates"] += 1
+        team = list(team)
+        if len(team) != 5:
+            return []
+        if team != self.team:
+            self.team, self.scores = team, {}
+            self.base = get_service().team_winrate(team, self.models)
+        cands = [c for c in dict.fromkeys(b for b in bench if b) if c not in team
+                 and (self.known is None or c in self.known)]
+        new = [c for c in cands if c not in self.scores]
+        self.counts["reused"] += len(cands) - len(new)
+        if new:
+            mat, names = what_if_matrix(team, self.models, candidates=new)
+            for j, c in enumerate(names):
+                self.scores[c] = mat[:, j]
+            self.counts["scored"] += len(new)
+
+        rows = []
+        for c in cands:
+            for s, w in enumerate(self.scores[c]):
+                if np.isfinite(w):
+                    rows.append({"교체 대상": team[s], "교체 챔피언": c, "새 승률(%)": round(float(w) * 100, 2),
+                                 "변화량 Δ(%)": round(float(w - self.base) * 100, 2)})
+        return sorted(rows, key=lambda r: r["변화량 Δ(%)"], reverse=True)
+
+
+# ─────────────────────────────────────────────────────────────────────
+# CLI
+# ─────────────────────────────────────────────────────────────────────
+def _endpoint(args):
+    if args.stub:
+        from benchmarks.stubs import StubEndpoint
+        from vocab import CHAMPIONS
+        return StubEndpoint(CHAMPIONS.names, latency_s=args.stub_latency_ms / 1000.0)
+    from image import init_vertex
+    ep = init_vertex(args.project, args.region, args.endpoint_id)
+    if ep is None:
+        raise SystemExit("엔드포인트가 설정되지 않았습니다 (--project / --endpoint-id 확인, 또는 --stub)")
+    return ep
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ARAM 픽 화면 라이브 추적 (프레임 차분)")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--watch", help="스크린샷이 쌓이는 폴더")
+    src.add_argument("--frames", nargs="+", help="프레임 이미지 경로 (순서대로)")
+    mdl = ap.add_mutually_exclusive_group()
+    mdl.add_argument("--models", help="joblib 로 저장한 train_models 결과 튜플")
+    mdl.add_argument("--train-csv", help="시작할 때 train_models 로 학습할 매치 CSV")
+    ap.add_argument("--project")
+    ap.add_argument("--region", default="us-central1")
+    ap.add_argument("--endpoint-id")
+    ap.add_argument("--stub", action="store_true", help="스텁 엔드포인트 (오프라인 시연)")
+    ap.add_argument("--stub-latency-ms", type=float, default=50.0)
+    ap.add_argument("--threshold", type=float, default=50.0, help="신뢰도(%%) 하한")
+    ap.add_argument("--diff", type=float, default=DIFF_THRESHOLD, help="타일 변화 임계값")
+    ap.add_argument("--once", action="store_true", help="--watch: 지금 있는 파일만 처리하고 종료")
+    ap.add_argument("--top", type=int, default=5, help="출력할 교체 추천 수")
+    args = ap.parse_args(argv)
+    if not args.stub and not (args.project and args.endpoint_id):
+        ap.error("--project/--endpoint-id 또는 --stub 이 필요합니다.")
+
+    models = None
+    if args.models or args.train_csv:
+        import joblib
+        from ml import read_csv_safe, train_models
+        models = joblib.load(args.models) if args.models else train_models(read_csv_safe(args.train_csv), verbose=False)
+
+    tracker = TileTracker(_endpoint(args), threshold=args.threshold, diff_threshold=args.diff)
+    swaps = None
+    if models is not None:
+        from ml import list_all_champs
+        swaps = SwapTracker(models, candidates_filter=list_all_champs(models))
+    frames = iter_folder(args.watch, once=args.once) if args.watch else iter_files(args.frames)
+    try:
+        for name, frame in frames:
+            st = tracker.update(frame)
+            line = f"[{st['frame']:4d}] {name}  바뀐 타일 {len(st['changed']):2d}  추론 {st['inferred']:2d}  {st['ms']:7.1f} ms"
+            if st["changed"]:
+                line += f"\n       픽 {st['current']}\n       대기석 {st['bench']}"
+                if swaps is not None:
+                    for r in swaps.update(st["current"], st["bench"])[:args.top]:
+                        line += f"\n       {r['교체 대상']} → {r['교체 챔피언']}  {r['새 승률(%)']:.2f}% ({r['변화량 Δ(%)']:+.2f})"
+            print(line, flush=True)
+    except KeyboardInterrupt:
+        pass
+    s = tracker.stats()
+    print(f"프레임 {s['frames']}, 바뀐 타일 {s['changed']}, 추론 {s['inferred']} (프레임당 {s['tiles_per_frame']}), "
+          f"빈 슬롯 {s['empty']}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,23 @@
 # ml.py — GitHub/Streamlit 배포용
 import pandas as pd
-import xgboost as xgb
+try:
+    import xgboost as xgb
+except ImportError:  # 서빙 전용 환경: tree_eval 로 컴파일된 모델만 쓰면 xgboost 없이도 동작
+    xgb = None
 from sklearn.preprocessing import StandardScaler, MultiLabelBinarizer
 from sklearn.model_selection import train_test_split
 from sklearn.feature_extraction.text import CountVectorizer
 from sklearn.metrics import accuracy_score
 import numpy as np
+import scipy.sparse as sp
 import random
 import warnings
 import io
+import json
+import threading
+from collections import Counter, OrderedDict
+
+from profiling import timed, span
 
 warnings.filterwarnings('ignore', category=UserWarning, module='xgboost')
 
@@ -33,67 +42,81 @@ def read_csv_safe(path_or_buf):
     return pd.read_csv(path_or_buf, low_memory=False)
 
 
-def train_models(df, verbose: bool = True):
+AURA_KEYS = [
+    "damage_dealt", "damage_taken", "attack_speed", "skill_haste",
+    "hp_regen", "tenacity", "shield_absorb", "energy_regen",
+]
+ROLE_KEYS = ["ad_items", "ap_items", "tank_items", "ranged"]
+CHAMP_FEATURE_COLS = AURA_KEYS + ["CCcount"] + [f"champ1_is_{r}" for r in ROLE_KEYS]
+
+
+def _build_champ_long(df):
+    """
+    매치 행(champ1~5) → 챔피언 1명당 1행인 long 포맷.
+    슬롯별로 컬럼 단위로 만든 뒤 (행, 슬롯) 순서로 정렬해 기존 iterrows 결과와 같은 순서를 유지.
+    """
+    parts = []
+    for i in range(1, 6):
+        part = pd.DataFrame({"champion": df[f"champ{i}_name"].values,
+                             "win": df["win"].astype(int).values})
+        for key in AURA_KEYS:
+            col = f"champ{i}_name_{key}"
+            part[key] = df[col].values if col in df.columns else 0.0
+        col = f"champ{i}_name_CCcount"
+        part["CCcount"] = df[col].values if col in df.columns else 0.0
+        for role in ROLE_KEYS:
+            col = f"champ{i}_is_{role}"
+            part[col] = df[col].values if col in df.columns else 0
+        part["_row"], part["_slot"] = np.arange(len(df)), i
+        parts.append(part[part["champion"].notna()])
+
+    champ_long = pd.concat(parts, ignore_index=True)
+    champ_long = champ_long.sort_values(["_row", "_slot"], kind="stable").drop(columns=["_row", "_slot"])
+    return champ_long.reset_index(drop=True).fillna(0.0)
+
+
+def _split_tags(text):
+    # CountVectorizer 토크나이저 (lambda 대신 모듈 함수여야 joblib 으로 저장 가능)
+    return text.split(",")
+
+
+# 세 모델 기본 하이퍼파라미터 (tune.py 로 찾은 값은 train_models(params=...) 로 덮어쓴다)
+MODEL_PARAMS = {
+    "synergy": {"n_estimators": 200, "max_depth": 4, "learning_rate": 0.1},
+    "champ": {"n_estimators": 150, "max_depth": 5, "learning_rate": 0.1},
+    "stat": {"n_estimators": 200, "max_depth": 4, "learning_rate": 0.1},
+}
+
+# 팀 승률 = 가중합 (synergy, stat, champ)
+BLEND_WEIGHTS = (0.6, 0.25, 0.15)
+
+
+def blend(p_synergy, p_stat, p_champ, weights=None):
+    w_synergy, w_stat, w_champ = weights or BLEND_WEIGHTS
+    return w_synergy * p_synergy + w_stat * p_stat + w_champ * p_champ
+
+
+def make_classifier(kind, params=None, **overrides):
+    """kind ∈ MODEL_PARAMS 의 XGBClassifier. params(해당 모델 dict) → overrides 순으로 기본값을 덮어쓴다."""
+    kw = {"objective": "binary:logistic", "eval_metric": "logloss", "tree_method": "hist", "random_state": SEED}
+    kw.update(MODEL_PARAMS[kind])
+    kw.update(params or {})
+    kw.update(overrides)
+    return xgb.XGBClassifier(**kw)
+
+
+def prepare_training_data(df):
+    """
+    train_models / tune 공용 학습 입력 (df 에 all_tags 컬럼을 추가한다).
+    반환: {champ_cols, mlb, X_onehot, y, vectorizer, X_stat, feature_cols}
+    챔피언 개별 모델 입력은 행 범위에 따라 달라지므로 _build_champ_long(df 부분) 으로 따로 만든다.
+    """
     champ_cols = [f'champ{i}_name' for i in range(1, 6)]
 
-    # --- Synergy ---
+    # --- Synergy: 5-hot ---
     all_champs = sorted(pd.unique(df[champ_cols].values.ravel("K")).tolist())
     mlb = MultiLabelBinarizer(classes=all_champs)
     X_onehot = pd.DataFrame(mlb.fit_transform(df[champ_cols].values.tolist()), columns=mlb.classes_)
-    y = df["win"]
-    X_train, X_test, y_train, y_test = train_test_split(
-        X_onehot, y, test_size=0.2, random_state=SEED, stratify=y
-    )
-    synergy_model = xgb.XGBClassifier(
-        objective="binary:logistic",
-        eval_metric="logloss",
-        n_estimators=200,
-        max_depth=4,
-        learning_rate=0.1,
-        random_state=SEED,
-    )
-    synergy_model.fit(X_train, y_train)
-    synergy_acc = accuracy_score(y_test, synergy_model.predict(X_test))
-
-    # --- Champion-wise ---
-    AURA_KEYS = [
-        "damage_dealt", "damage_taken", "attack_speed", "skill_haste",
-        "hp_regen", "tenacity", "shield_absorb", "energy_regen",
-    ]
-    long_rows = []
-    for _, row in df.iterrows():
-        for i in range(1, 6):
-            champ = row[f"champ{i}_name"]
-            if pd.isna(champ):
-                continue
-            item = {"champion": champ, "win": int(row["win"])}
-            for key in AURA_KEYS:
-                col_name = f"champ{i}_name_{key}"
-                item[key] = row.get(col_name, 0.0)
-            item["CCcount"] = row.get(f"champ{i}_name_CCcount", 0.0)
-            for role in ["ad_items", "ap_items", "tank_items", "ranged"]:
-                col = f"champ{i}_is_{role}"
-                item[col] = row.get(col, 0)
-            long_rows.append(item)
-
-    champ_long = pd.DataFrame(long_rows).fillna(0.0)
-    champ_feature_cols = [
-        c
-        for c in (
-            AURA_KEYS
-            + ["CCcount", "champ1_is_ad_items", "champ1_is_ap_items",
-               "champ1_is_tank_items", "champ1_is_ranged"]
-        )
-        if c in champ_long.columns
-    ]
-    Xc = champ_long[champ_feature_cols]
-    yc = champ_long["win"]
-    champ_model = xgb.XGBClassifier(
-        n_estimators=150, max_depth=5, learning_rate=0.1, random_state=SEED, eval_metric="logloss"
-    )
-    champ_model.fit(Xc, yc)
-    champ_profile = champ_long.groupby("champion")[champ_feature_cols].median().reset_index()
-    champ_acc = accuracy_score(yc, champ_model.predict(Xc))
 
     # --- Stat/Tag ---
     stat_types = ["hp", "mp", "armor", "spellblock", "attackdamage", "attackspeed"]
@@ -108,68 +131,616 @@ def train_models(df, verbose: bool = True):
     tag_cols = [f"champ{i}_tags" for i in range(1, 6)]
     df["all_tags"] = df[tag_cols].fillna("").astype(str).agg(",".join, axis=1)
 
-    vectorizer = CountVectorizer(tokenizer=lambda x: x.split(","))
+    vectorizer = CountVectorizer(tokenizer=_split_tags)
     tag_matrix = vectorizer.fit_transform(df["all_tags"])
     tag_df = pd.DataFrame(tag_matrix.toarray(), columns=[f"tag_{t}" for t in vectorizer.get_feature_names_out()])
 
     feature_cols = lvl_cols + list(tag_df.columns)
     X_stat = pd.concat([df[lvl_cols], tag_df], axis=1)
-    y_stat = df["win"]
-    X_train_s, X_test_s, y_train_s, y_test_s = train_test_split(
-        X_stat, y_stat, test_size=0.2, random_state=SEED, stratify=y_stat
-    )
+    return {"champ_cols": champ_cols, "mlb": mlb, "X_onehot": X_onehot, "y": df["win"],
+            "vectorizer": vectorizer, "X_stat": X_stat, "feature_cols": feature_cols}
+
 
+def split_rows(y, test_size: float = 0.2, seed: int = SEED):
+    """행 번호 (학습, 평가) 층화 분할. train_models 와 같은 seed 면 같은 분할."""
+    return train_test_split(np.arange(len(y)), test_size=test_size, random_state=seed, stratify=y)
+
+
+@timed("ml.train_models")
+def train_models(df, verbose: bool = True, params=None):
+    """
+    세 모델 학습 → models 튜플.
+    params: {"synergy"|"champ"|"stat": {XGB 파라미터}} — MODEL_PARAMS 를 모델별로 덮어쓴다 (tune.load_best 결과).
+    """
+    params = params or {}
+    data = prepare_training_data(df)
+    champ_cols, mlb, y = data["champ_cols"], data["mlb"], data["y"]
+    train_rows, test_rows = split_rows(y)
+
+    # --- Synergy ---
+    X_onehot = data["X_onehot"]
+    synergy_model = make_classifier("synergy", params.get("synergy"))
+    synergy_model.fit(X_onehot.iloc[train_rows], y.iloc[train_rows])
+    synergy_acc = accuracy_score(y.iloc[test_rows], synergy_model.predict(X_onehot.iloc[test_rows]))
+
+    # --- Champion-wise ---
+    champ_long = _build_champ_long(df)
+    champ_feature_cols = [c for c in CHAMP_FEATURE_COLS if c in champ_long.columns]
+    Xc = champ_long[champ_feature_cols]
+    yc = champ_long["win"]
+    champ_model = make_classifier("champ", params.get("champ"))
+    champ_model.fit(Xc, yc)
+    champ_profile = champ_long.groupby("champion")[champ_feature_cols].median().reset_index()
+    champ_acc = accuracy_score(yc, champ_model.predict(Xc))
+
+    # --- Stat/Tag ---
+    X_stat, feature_cols = data["X_stat"], data["feature_cols"]
     scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train_s)
+    X_train_scaled = scaler.fit_transform(X_stat.iloc[train_rows])
 
-    stat_model = xgb.XGBClassifier(
-        n_estimators=200, max_depth=4, learning_rate=0.1, random_state=SEED, eval_metric="logloss"
-    )
-    stat_model.fit(X_train_scaled, y_train_s)
-    stat_acc = accuracy_score(y_test_s, stat_model.predict(X_test_s))
+    stat_model = make_classifier("stat", params.get("stat"))
+    stat_model.fit(X_train_scaled, y.iloc[train_rows])
+    # 평가도 학습과 같은 스케일 공간에서 (예전에는 스케일 전 값을 넣어 정확도가 틀리게 나왔다)
+    stat_acc = accuracy_score(y.iloc[test_rows], stat_model.predict(scaler.transform(X_stat.iloc[test_rows])))
 
     if verbose:
         print(f"[Synergy 모델 정확도]: {synergy_acc:.2%}")
         print(f"[챔피언 개별 모델 정확도]: {champ_acc:.2%}")
         print(f"[스탯/태그 모델 정확도]: {stat_acc:.2%}")
 
-    return synergy_model, champ_model, mlb, champ_profile, stat_model, scaler, feature_cols, vectorizer, df, champ_cols
+    return synergy_model, champ_model, mlb, champ_profile, stat_model, scaler, feature_cols, data["vectorizer"], df, champ_cols
 
 
-def get_team_winrate(team_champs, models):
+@timed("ml.get_team_winrate")
+def get_team_winrate(team_champs, models, weights=None):
     synergy_model, champ_model, mlb, champ_profile, stat_model, scaler, feature_cols, vectorizer, df, champ_cols = models
 
     # Synergy
-    onehot_vec = mlb.transform([team_champs])
-    p_synergy = synergy_model.predict_proba(onehot_vec)[0][1]
+    with span("ml.get_team_winrate.synergy"):
+        onehot_vec = mlb.transform([team_champs])
+        p_synergy = synergy_model.predict_proba(onehot_vec)[0][1]
 
     # Champ-wise
-    scores = []
-    for cand in team_champs:
-        r = champ_profile[champ_profile["champion"] == cand]
-        if not r.empty:
-            p = champ_model.predict_proba(r[[c for c in champ_profile.columns if c != "champion"]])[0][1]
-        else:
-            p = 0.5
-        scores.append(p)
-    p_champ = sum(scores) / len(scores)
+    with span("ml.get_team_winrate.champ"):
+        scores = []
+        for cand in team_champs:
+            r = champ_profile[champ_profile["champion"] == cand]
+            if not r.empty:
+                p = champ_model.predict_proba(r[[c for c in champ_profile.columns if c != "champion"]])[0][1]
+            else:
+                p = 0.5
+            scores.append(p)
+        p_champ = sum(scores) / len(scores)
 
     # Stat/Tag
-    team_rows = df[df[champ_cols].apply(lambda row: any(c in row.values for c in team_champs), axis=1)]
+    with span("ml.get_team_winrate.stat_features"):
+        team_rows = df[df[champ_cols].apply(lambda row: any(c in row.values for c in team_champs), axis=1)]
+        lvl_cols = [c for c in feature_cols if not c.startswith("tag_")]
+        team_avg_stats = team_rows[lvl_cols].mean()
+        team_tag_texts = team_rows[champ_cols].fillna("").astype(str).agg(",".join, axis=1)
+        tag_matrix_candidate = vectorizer.transform(team_tag_texts)
+        tag_df_candidate = pd.DataFrame(tag_matrix_candidate.toarray(), columns=[f"tag_{t}" for t in vectorizer.get_feature_names_out()])
+        tag_mean = tag_df_candidate.mean()
+        feature_vector = pd.concat([team_avg_stats, tag_mean])
+        fv_dict = {col: float(feature_vector.get(col, 0.0)) for col in feature_cols}
+        fv_df = pd.DataFrame([fv_dict])
+        fv_scaled = scaler.transform(fv_df)
+    with span("ml.get_team_winrate.stat_model"):
+        p_stat = stat_model.predict_proba(fv_scaled)[0][1]
+
+    # 가중합 (weights 생략 시 BLEND_WEIGHTS)
+    return blend(p_synergy, p_stat, p_champ, weights)
+
+
+@timed("ml.score_swaps")
+def score_swaps(my_team, target, pool, models, base_wr=None, scorer=None, batch_scorer=None):
+    """
+    교체 추천: my_team 의 target 자리를 pool 의 각 챔피언으로 바꿨을 때 승률.
+    scorer(team, models) 로 단일 팀 채점 함수를 바꿀 수 있다 (기본 get_team_winrate, 예: 캐시 경유).
+    batch_scorer(teams, models) 가 주어지면 후보 팀 전체를 한 번에 채점한다 (예: inference_service).
+    반환: (rows, best) — rows 는 표시용 dict 목록, best 는 (target, 후보, 새 승률) 또는 None
+    """
+    new_teams = [[cand if x == target else x for x in my_team] for cand in pool]
+    if batch_scorer is not None:
+        wr = base_wr if base_wr is not None else float(batch_scorer([my_team], models)[0])
+        scores = batch_scorer(new_teams, models) if new_teams else []
+    else:
+        scorer = scorer or get_team_winrate
+        wr = base_wr if base_wr is not None else scorer(my_team, models)
+        scores = [scorer(t, models) for t in new_teams]
+    rows, best, best_inc = [], None, 0.0
+    for cand, w in zip(pool, scores):
+        w = float(w)
+        inc = w - wr
+        rows.append({"교체 챔피언": cand, "새 승률(%)": round(w * 100, 2), "변화량 Δ(%)": round(inc * 100, 2)})
+        if inc > best_inc:
+            best, best_inc = (target, cand, w), inc
+    return rows, best
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 배치 스코어링 (get_team_winrate 의 벡터화 버전)
+# ─────────────────────────────────────────────────────────────────────
+_BATCH_CTX = OrderedDict()  # id(models) → ctx, 최근 사용 순
+_BATCH_CTX_LOCK = threading.Lock()
+_MAX_BATCH_CTX = 4  # 세션마다 다른 번들 (예: update_models 전후) 을 들고 있어도 서로 밀어내지 않도록
+
+
+def _row_tables(df, col_index, champ_cols, lvl_cols, vectorizer):
+    """df 행별 챔피언 포함 여부(희소)와 스탯·태그 값/NaN 아님 표시."""
+    names = df[champ_cols].to_numpy()
+    idx = np.vectorize(lambda c: col_index.get(c, -1), otypes=[np.int64])(names)
+    rows = np.repeat(np.arange(len(df)), idx.shape[1])
+    flat = idx.ravel()
+    keep = flat >= 0
+    incidence = sp.csr_matrix(
+        (np.ones(keep.sum()), (rows[keep], flat[keep])), shape=(len(df), len(col_index))
+    )
+    incidence.data[:] = 1.0  # 같은 챔피언이 한 행에 두 번 나와도 1
+
+    # get_team_winrate 와 동일하게 챔피언 이름 문자열을 vectorizer 에 통과
+    lvl = df[lvl_cols].to_numpy(dtype=float)
+    tag_texts = df[champ_cols].fillna("").astype(str).agg(",".join, axis=1)
+    tags = vectorizer.transform(tag_texts).toarray().astype(float)
+    feats = np.hstack([np.nan_to_num(lvl), tags])
+    valid = np.hstack([~np.isnan(lvl), np.ones_like(tags, dtype=bool)]).astype(float)
+    return incidence, feats, valid
+
+
+def _champ_probs(champ_model, champ_profile, col_index):
+    """mlb 컬럼 순서의 챔피언 개별 모델 확률 (프로필 없으면 0.5)."""
+    champ_p = np.full(len(col_index), 0.5)
+    if not champ_profile.empty:
+        prof_cols = [c for c in champ_profile.columns if c != "champion"]
+        probs = champ_model.predict_proba(champ_profile[prof_cols])[:, 1]
+        for name, p in zip(champ_profile["champion"], probs):
+            if name in col_index:
+                champ_p[col_index[name]] = p
+    return champ_p
+
+
+def _remember_batch_context(ctx):
+    with _BATCH_CTX_LOCK:
+        _BATCH_CTX[id(ctx["models"])] = ctx
+        _BATCH_CTX.move_to_end(id(ctx["models"]))
+        while len(_BATCH_CTX) > _MAX_BATCH_CTX:
+            _BATCH_CTX.popitem(last=False)
+    return ctx
+
+
+def _batch_context(models):
+    """
+    models 튜플별로 한 번만 만드는 배치용 보조 테이블.
+      - col_index: 챔피언 → mlb 컬럼 인덱스
+      - champ_p:   mlb 컬럼 순서의 챔피언 개별 모델 확률
+      - incidence: df 행 × 챔피언 희소 행렬 (행에 해당 챔피언 포함 여부)
+      - feats/valid: 행별 스탯·태그 값과 NaN 아님 표시 (평균 계산용)
+    what_if_matrix 등이 이 ctx 에 모델 의존 캐시를 덧붙인다 (update_models 는 위 항목만 새 ctx 로 옮긴다).
+    """
+    with _BATCH_CTX_LOCK:
+        ctx = _BATCH_CTX.get(id(models))
+        if ctx is not None and ctx["models"] is models:
+            _BATCH_CTX.move_to_end(id(models))
+            return ctx
+
+    synergy_model, champ_model, mlb, champ_profile, stat_model, scaler, feature_cols, vectorizer, df, champ_cols = models
+    col_index = {c: i for i, c in enumerate(mlb.classes_)}
     lvl_cols = [c for c in feature_cols if not c.startswith("tag_")]
-    team_avg_stats = team_rows[lvl_cols].mean()
-    team_tag_texts = team_rows[champ_cols].fillna("").astype(str).agg(",".join, axis=1)
-    tag_matrix_candidate = vectorizer.transform(team_tag_texts)
-    tag_df_candidate = pd.DataFrame(tag_matrix_candidate.toarray(), columns=[f"tag_{t}" for t in vectorizer.get_feature_names_out()])
-    tag_mean = tag_df_candidate.mean()
-    feature_vector = pd.concat([team_avg_stats, tag_mean])
-    fv_dict = {col: float(feature_vector.get(col, 0.0)) for col in feature_cols}
-    fv_df = pd.DataFrame([fv_dict])
-    fv_scaled = scaler.transform(fv_df)
-    p_stat = stat_model.predict_proba(fv_scaled)[0][1]
-
-    # 가중합
-    return 0.6 * p_synergy + 0.25 * p_stat + 0.15 * p_champ
+    incidence, feats, valid = _row_tables(df, col_index, champ_cols, lvl_cols, vectorizer)
+    return _remember_batch_context({
+        "models": models,
+        "col_index": col_index,
+        "champ_p": _champ_probs(champ_model, champ_profile, col_index),
+        "incidence": incidence,
+        "feats": feats,
+        "valid": valid,
+        "feat_names": lvl_cols + [f"tag_{t}" for t in vectorizer.get_feature_names_out()],
+    })
+
+
+def _team_index(teams, col_index):
+    """팀 목록(챔피언 이름) → (n, 5) mlb 컬럼 인덱스 배열. 모르는 챔피언은 -1."""
+    return np.array([[col_index.get(c, -1) for c in team] for team in teams], dtype=np.int64).reshape(len(teams), -1)
+
+
+@timed("ml.get_team_winrate_batch")
+def get_team_winrate_batch(teams, models, chunk_size: int = 256, parts: bool = False, weights=None):
+    """
+    여러 팀의 승률을 한 번에 계산 (get_team_winrate 와 같은 값).
+    teams: [[챔피언 5명], ...]
+    반환: np.ndarray (len(teams),)
+          parts=True 면 (가중합, p_synergy, p_stat, p_champ) 네 배열
+    weights: (synergy, stat, champ) 가중치, 생략 시 BLEND_WEIGHTS
+    """
+    synergy_model, champ_model, mlb, champ_profile, stat_model, scaler, feature_cols, vectorizer, df, champ_cols = models
+    ctx = _batch_context(models)
+    n_classes = len(ctx["col_index"])
+    out = np.empty(len(teams))
+    comp = np.empty((3, len(teams))) if parts else None
+
+    for start in range(0, len(teams), chunk_size):
+        idx = _team_index(teams[start:start + chunk_size], ctx["col_index"])
+        k = len(idx)
+        known = idx >= 0
+        cols = np.where(known, idx, 0)
+
+        # Synergy: 5-hot 행렬
+        onehot = np.zeros((k, n_classes))
+        r, c = np.nonzero(known)
+        onehot[r, idx[r, c]] = 1.0
+        p_synergy = synergy_model.predict_proba(onehot)[:, 1]
+
+        # Champ-wise: 미리 계산한 챔피언별 확률의 평균
+        p_champ = np.where(known, ctx["champ_p"][cols], 0.5).mean(axis=1)
+
+        # Stat/Tag: 팀 챔피언이 하나라도 포함된 행의 평균
+        team_mat = sp.csr_matrix(onehot.T)
+        sel = (ctx["incidence"] @ team_mat).tocsc()
+        sel.data[:] = 1.0
+        sums = np.asarray((sel.T @ ctx["feats"]))
+        counts = np.asarray((sel.T @ ctx["valid"]))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = sums / counts
+        fv = pd.DataFrame(means, columns=ctx["feat_names"]).reindex(columns=feature_cols, fill_value=0.0)
+        p_stat = stat_model.predict_proba(scaler.transform(fv))[:, 1]
+
+        out[start:start + k] = blend(p_synergy, p_stat, p_champ, weights)
+        if parts:
+            comp[:, start:start + k] = p_synergy, p_stat, p_champ
+    return (out, *comp) if parts else out
+
+
+_WHAT_IF_CACHE_SIZE = 32
+
+
+def _model_cache(ctx, models, name, factory):
+    """ctx 에 붙이는 모델 의존 캐시. 만든 models 객체와 함께 저장해 다른 모델의 값은 쓰지 않는다."""
+    entry = ctx.get(name)
+    if entry is None or entry[0] is not models:
+        entry = ctx[name] = (models, factory())
+    return entry[1]
+
+
+@timed("ml.what_if_matrix")
+def what_if_matrix(team, models, candidates=None):
+    """
+    현재 팀의 각 슬롯(5)을 각 후보 챔피언으로 바꿨을 때의 승률 행렬 (5 × N).
+    candidates 생략 시 list_all_champs 전체. 다른 슬롯에 이미 있는 챔피언 칸은 NaN,
+    자기 슬롯 챔피언 칸은 현재 팀 승률. 결과는 모델별로 (팀, 후보) 키 LRU 캐시.
+    반환: (matrix, candidate_names)
+
+    Stat/Tag 평균은 슬롯마다 포함-배제로 계산한다:
+      rows(나머지 4명 ∪ c) 합 = rows(나머지) 합 + rows(c) 합 - rows(나머지 ∩ c) 합
+    rows(c) 합은 모델별로 한 번, rows(나머지 ∩ c) 는 슬롯마다 희소 곱 한 번.
+    """
+    synergy_model, champ_model, mlb, champ_profile, stat_model, scaler, feature_cols, vectorizer, df, champ_cols = models
+    ctx = _batch_context(models)
+    col_index = ctx["col_index"]
+    cand_names = list(candidates) if candidates is not None else list_all_champs(models)
+    key = (tuple(team), tuple(cand_names))
+    cache = _model_cache(ctx, models, "what_if", OrderedDict)
+    if key in cache:
+        cache.move_to_end(key)
+        mat, names = cache[key]
+        return mat.copy(), list(names)
+
+    A = ctx["incidence"].tocsc()
+    champ_sums, champ_counts = _model_cache(
+        ctx, models, "champ_sums", lambda: (np.asarray(A.T @ ctx["feats"]), np.asarray(A.T @ ctx["valid"])))
+
+    n_classes = len(col_index)
+    t = _team_index([team], col_index)[0]
+    c = _team_index([[x] for x in cand_names], col_index)[:, 0] if cand_names else np.zeros(0, dtype=np.int64)
+    c_known = c >= 0
+    c_cols = np.where(c_known, c, 0)
+    n = len(c)
+
+    onehot = np.zeros((5 * n, n_classes))
+    means = np.empty((5 * n, len(ctx["feat_names"])))
+    p_champ = np.empty(5 * n)
+    for s in range(5):
+        rest = np.delete(t, s)
+        rest = rest[rest >= 0]
+        block = slice(s * n, (s + 1) * n)
+
+        # Synergy: 나머지 4명 + 후보
+        onehot[block, rest] = 1.0
+        onehot[np.arange(s * n, (s + 1) * n)[c_known], c[c_known]] = 1.0
+
+        # Champ-wise
+        rest_p = ctx["champ_p"][rest].sum() + 0.5 * (4 - len(rest))
+        p_champ[block] = (rest_p + np.where(c_known, ctx["champ_p"][c_cols], 0.5)) / 5.0
+
+        # Stat/Tag: 포함-배제
+        mask = np.asarray(A[:, rest].sum(axis=1)).ravel() > 0
+        rest_sum = mask @ ctx["feats"]
+        rest_cnt = mask @ ctx["valid"]
+        A_rest = A[mask]
+        both_sum = np.asarray(A_rest.T @ ctx["feats"][mask])
+        both_cnt = np.asarray(A_rest.T @ ctx["valid"][mask])
+        sums = np.where(c_known[:, None], rest_sum + champ_sums[c_cols] - both_sum[c_cols], rest_sum)
+        counts = np.where(c_known[:, None], rest_cnt + champ_counts[c_cols] - both_cnt[c_cols], rest_cnt)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means[block] = sums / counts
+
+    p_synergy = synergy_model.predict_proba(onehot)[:, 1]
+    fv = pd.DataFrame(means, columns=ctx["feat_names"]).reindex(columns=feature_cols, fill_value=0.0)
+    p_stat = stat_model.predict_proba(scaler.transform(fv))[:, 1]
+    mat = blend(p_synergy, p_stat, p_champ).reshape(5, n)
+
+    # 다른 슬롯에 이미 있는 챔피언은 중복 팀이므로 비움
+    for s in range(5):
+        others = set(np.delete(np.asarray(team, dtype=object), s))
+        mat[s, [i for i, name in enumerate(cand_names) if name in others]] = np.nan
+
+    cache[key] = (mat, tuple(cand_names))
+    while len(cache) > _WHAT_IF_CACHE_SIZE:
+        cache.popitem(last=False)
+    return mat.copy(), list(cand_names)
+
+
+def check_what_if(team, models, candidates, atol: float = 1e-6):
+    """
+    what_if_matrix 결과를 칸마다 get_team_winrate(교체한 팀) 과 비교.
+    반환: {"cells": 비교한 칸 수, "max_abs_error": 최대 오차, "ok": 허용 오차 안인지}
+    (update_models 뒤 캐시/보조 테이블이 새 모델 기준인지 확인용)
+    """
+    mat, names = what_if_matrix(team, models, candidates=candidates)
+    errors = []
+    for s in range(5):
+        for j, name in enumerate(names):
+            if np.isnan(mat[s, j]):
+                continue
+            swapped = list(team)
+            swapped[s] = name
+            errors.append(abs(mat[s, j] - get_team_winrate(swapped, models)))
+    worst = float(max(errors, default=0.0))
+    return {"cells": len(errors), "max_abs_error": worst, "ok": worst <= atol}
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 증분 학습 (새 매치 행만으로 기존 모델 갱신)
+# ─────────────────────────────────────────────────────────────────────
+def init_update_state(models):
+    """
+    증분 학습용 누적 요약. 챔피언×피처별 값 빈도(Counter)를 들고 있어
+    champ_profile 중앙값을 새 행만 더해서 다시 낼 수 있다. (학습 직후 한 번만 전체 df 사용)
+    """
+    champ_profile, df = models[3], models[8]
+    feature_cols = [c for c in champ_profile.columns if c != "champion"]
+    state = {"champ_feature_cols": feature_cols, "champ_values": {}, "n_rows": 0}
+    _accumulate_champ_values(state, _build_champ_long(df))
+    state["n_rows"] = len(df)
+    return state
+
+
+def _accumulate_champ_values(state, champ_long):
+    values = state["champ_values"]
+    for champ, grp in champ_long.groupby("champion"):
+        per_feat = values.setdefault(champ, {c: Counter() for c in state["champ_feature_cols"]})
+        for col in state["champ_feature_cols"]:
+            per_feat[col].update(grp[col].value_counts().to_dict())
+
+
+def _counter_median(counter):
+    """값 빈도 → 중앙값 (짝수 개면 가운데 두 값 평균, pandas median 과 동일)."""
+    keys = sorted(counter)
+    counts = np.cumsum([counter[k] for k in keys])
+    n = counts[-1]
+    lo = keys[int(np.searchsorted(counts, (n - 1) // 2, side="right"))]
+    hi = keys[int(np.searchsorted(counts, n // 2, side="right"))]
+    return (lo + hi) / 2.0
+
+
+def _grow(buf, n, extra):
+    """buf 앞 n 행을 유지하고 n + extra 행이 들어가는 버퍼. 모자라면 두 배 용량으로 새로 잡는다 (분할 상환 O(extra))."""
+    if n + extra <= len(buf):
+        return buf
+    out = np.empty((max(n + extra, 2 * len(buf), 1024),) + buf.shape[1:], dtype=buf.dtype)
+    out[:n] = buf[:n]
+    return out
+
+
+def _nan_dtype(dtype):
+    """빈 칸(NaN)을 담을 수 있는 dtype (pd.concat 이 빠진 열을 채울 때와 같은 승격)."""
+    if dtype.kind in "fcO":
+        return dtype
+    return np.dtype(object) if dtype.kind == "b" else np.dtype(np.float64)
+
+
+class _RowStore:
+    """
+    update_models 가 행을 이어 붙이는 누적 버퍼: 매치 df 열, incidence(CSR 배열), feats, valid.
+    용량을 두 배씩 늘려 두고 앞 n 행의 뷰만 내보내므로 갱신마다 새 행만 쓴다 (pd.concat / vstack 로 전체 복사 안 함).
+    이전 번들이 들고 있는 뷰는 자기 행 수까지만 보므로 뒤에 쓰는 행과 무관하다.
+    버퍼는 마지막으로 만든 번들(owner)에서 이어질 때만 쓰고, 다른 번들에서 갈라지면 그 번들로 새 버퍼를 연다.
+    """
+
+    def __init__(self, models, ctx):
+        df = models[8]
+        self.n = len(df)
+        # 처음 받는 배열은 남의 것일 수 있다: 길이 = n 이므로 첫 append 에서 _grow 가 새 버퍼로 옮긴다
+        self.columns = {c: df[c].to_numpy() for c in df.columns}
+        inc = ctx["incidence"].tocsr()
+        self.indptr = inc.indptr.astype(np.int32, copy=False)
+        self.indices = inc.indices.astype(np.int32, copy=False)
+        self.data = inc.data
+        self.nnz = inc.nnz
+        self.feats, self.valid = ctx["feats"], ctx["valid"]
+        self.feat_names = ctx["feat_names"]
+        self.owner = models
+
+    @staticmethod
+    def supports(df) -> bool:
+        """numpy dtype 열만 (확장 dtype 은 pd.concat 으로)."""
+        return all(isinstance(dt, np.dtype) and dt.kind in "biufO" for dt in df.dtypes)
+
+    def append(self, new_df, incidence, feats, valid, width):
+        """새 행 블록을 붙이고 (df, incidence, feats, valid) 전체 뷰를 돌려준다."""
+        n, k = self.n, len(new_df)
+        for c in new_df.columns:
+            if c not in self.columns:  # 새 열: 기존 행은 NaN
+                self.columns[c] = np.full(n, np.nan, dtype=_nan_dtype(new_df[c].to_numpy().dtype))
+        for c, buf in self.columns.items():
+            if c in new_df.columns:
+                col = new_df[c].to_numpy()
+                if not np.can_cast(col.dtype, buf.dtype, "same_kind"):
+                    buf = np.asarray(buf, dtype=np.result_type(buf.dtype, col.dtype))
+            else:  # 새 블록에 없는 열은 NaN
+                buf, col = np.asarray(buf, dtype=_nan_dtype(buf.dtype)), np.nan
+            buf = _grow(buf, n, k)
+            buf[n:n + k] = col
+            self.columns[c] = buf
+
+        self.indptr = _grow(self.indptr, n + 1, k)
+        self.indptr[n + 1:n + k + 1] = incidence.indptr[1:] + self.nnz
+        self.indices = _grow(self.indices, self.nnz, incidence.nnz)
+        self.indices[self.nnz:self.nnz + incidence.nnz] = incidence.indices
+        self.data = _grow(self.data, self.nnz, incidence.nnz)
+        self.data[self.nnz:self.nnz + incidence.nnz] = incidence.data
+        self.feats = _grow(self.feats, n, k)
+        self.feats[n:n + k] = feats
+        self.valid = _grow(self.valid, n, k)
+        self.valid[n:n + k] = valid
+        self.n, self.nnz = n + k, self.nnz + incidence.nnz
+
+        m = self.n
+        df = pd.DataFrame({c: buf[:m] for c, buf in self.columns.items()}, copy=False)
+        inc = sp.csr_matrix((self.data[:self.nnz], self.indices[:self.nnz], self.indptr[:m + 1]),
+                            shape=(m, width), copy=False)
+        return df, inc, self.feats[:m], self.valid[:m]
+
+
+def _widen_booster(booster, new_names):
+    """
+    부스터 입력 피처 수를 늘린다 (새 챔피언 컬럼을 뒤에 추가).
+    기존 트리는 새 컬럼을 쓰지 않으므로 예측은 그대로이고, 이어서 학습할 수 있게 된다.
+    """
+    raw = json.loads(booster.save_raw("json"))
+    learner = raw["learner"]
+    n = int(learner["learner_model_param"]["num_feature"]) + len(new_names)
+    learner["learner_model_param"]["num_feature"] = str(n)
+    for t in learner["gradient_booster"]["model"]["trees"]:
+        t["tree_param"]["num_feature"] = str(n)
+    if learner.get("feature_names"):
+        learner["feature_names"] = learner["feature_names"] + list(new_names)
+    if learner.get("feature_types"):
+        learner["feature_types"] = learner["feature_types"] + [learner["feature_types"][0]] * len(new_names)
+    widened = xgb.Booster()
+    widened.load_model(bytearray(json.dumps(raw, ensure_ascii=False).encode("utf-8")))
+    return widened
+
+
+def _continue_boosting(model, X, y, n_rounds, booster=None):
+    """기존 XGBClassifier 에서 n_rounds 만큼 트리를 더 쌓은 새 분류기."""
+    params = model.get_params()
+    params["n_estimators"] = n_rounds
+    cont = xgb.XGBClassifier(**params)
+    cont.fit(X, y, xgb_model=booster if booster is not None else model.get_booster())
+    return cont
+
+
+@timed("ml.update_models")
+def update_models(models, new_df, state=None, n_rounds: int = 20, verbose: bool = True):
+    """
+    새로 쌓인 매치 행(new_df)만으로 모델을 갱신. 반환: (새 models 튜플, state)
+      - 세 XGBoost 모델: 기존 부스터에서 n_rounds 만큼 이어서 학습 (xgb_model 웜스타트)
+      - mlb: 처음 보는 챔피언은 클래스 끝에 추가하고 synergy 부스터 입력 폭도 늘림
+      - champ_profile: state 의 값 빈도에 새 행만 더해 변경된 챔피언 중앙값만 다시 계산
+      - scaler / vectorizer: 트리 분기값이 이 공간에 묶여 있으므로 고정 (새 태그는 무시)
+      - 배치 스코어링 보조 테이블과 누적 df: 새 행 분량만 만들어 state 의 증가 버퍼(_RowStore) 뒤에 붙임
+        (용량 두 배 증가라 갱신 비용은 분할 상환으로 새 행 수에 비례, 버퍼는 최대 2배 메모리)
+    """
+    synergy_model, champ_model, mlb, champ_profile, stat_model, scaler, feature_cols, vectorizer, df, champ_cols = models
+    if state is None:
+        state = init_update_state(models)
+    new_df = new_df.reset_index(drop=True)
+    y = new_df["win"]
+
+    # 누적 버퍼는 이 번들에서 이어질 때만 재사용 (처음이거나 다른 번들에서 갈라지면 한 번 전체를 옮긴다)
+    rows = state.get("rows")
+    if rows is None or rows.owner is not models:
+        rows = state["rows"] = _RowStore(models, _batch_context(models)) if _RowStore.supports(df) else None
+
+    # --- Synergy (새 챔피언 확장) ---
+    seen = set(mlb.classes_)
+    new_champs = sorted({c for c in pd.unique(new_df[champ_cols].values.ravel("K")) if pd.notna(c)} - seen)
+    if new_champs:
+        mlb = MultiLabelBinarizer(classes=list(mlb.classes_) + new_champs)
+        mlb.fit([])
+        synergy_booster = _widen_booster(synergy_model.get_booster(), new_champs)
+    else:
+        synergy_booster = synergy_model.get_booster()
+    X_onehot = pd.DataFrame(mlb.transform(new_df[champ_cols].values.tolist()), columns=mlb.classes_)
+    # 갱신 전 모델로 새 행을 먼저 평가 (prequential 정확도)
+    synergy_acc = accuracy_score(y, synergy_model.predict(X_onehot.iloc[:, :len(seen)]))
+    new_synergy = _continue_boosting(synergy_model, X_onehot, y, n_rounds, booster=synergy_booster)
+
+    # --- Champion-wise ---
+    champ_long = _build_champ_long(new_df)
+    champ_feature_cols = state["champ_feature_cols"]
+    for col in champ_feature_cols:
+        if col not in champ_long.columns:
+            champ_long[col] = 0.0
+    champ_acc = accuracy_score(champ_long["win"], champ_model.predict(champ_long[champ_feature_cols]))
+    new_champ_model = _continue_boosting(champ_model, champ_long[champ_feature_cols], champ_long["win"], n_rounds)
+
+    _accumulate_champ_values(state, champ_long)
+    touched = set(champ_long["champion"])
+    profile = champ_profile[~champ_profile["champion"].isin(touched)]
+    updated = pd.DataFrame(
+        [{"champion": c, **{col: _counter_median(state["champ_values"][c][col]) for col in champ_feature_cols}}
+         for c in sorted(touched)]
+    )
+    new_profile = pd.concat([profile, updated], ignore_index=True).sort_values("champion").reset_index(drop=True)
+
+    # --- Stat/Tag (scaler/vectorizer 고정) ---
+    tag_cols = [f"champ{i}_tags" for i in range(1, 6)]
+    new_df["all_tags"] = new_df[tag_cols].fillna("").astype(str).agg(",".join, axis=1)
+    lvl_cols = [c for c in feature_cols if not c.startswith("tag_")]
+    tag_df = pd.DataFrame(vectorizer.transform(new_df["all_tags"]).toarray(),
+                          columns=[f"tag_{t}" for t in vectorizer.get_feature_names_out()])
+    X_stat = pd.concat([new_df[lvl_cols], tag_df], axis=1).reindex(columns=feature_cols, fill_value=0.0)
+    X_stat_scaled = scaler.transform(X_stat)
+    stat_acc = accuracy_score(y, stat_model.predict(X_stat_scaled))
+    new_stat_model = _continue_boosting(stat_model, X_stat_scaled, y, n_rounds)
+
+    # --- 누적 df + 배치 보조 테이블: 새 행만 계산해서 이어 붙임 ---
+    col_index = {c: i for i, c in enumerate(mlb.classes_)}
+    incidence, feats, valid = _row_tables(new_df, col_index, champ_cols, lvl_cols, vectorizer)
+    if rows is not None:
+        all_df, all_inc, all_feats, all_valid = rows.append(new_df, incidence, feats, valid, len(col_index))
+        feat_names = rows.feat_names  # scaler/vectorizer 고정이므로 그대로
+    else:  # 확장 dtype 열이 있는 df: 전체를 이어 붙인다
+        old_ctx = _batch_context(models)
+        old_inc = old_ctx["incidence"].copy()
+        old_inc.resize((old_inc.shape[0], len(col_index)))
+        all_df = pd.concat([df, new_df], ignore_index=True)
+        all_inc = sp.vstack([old_inc, incidence], format="csr")
+        all_feats, all_valid = np.vstack([old_ctx["feats"], feats]), np.vstack([old_ctx["valid"], valid])
+        feat_names = old_ctx["feat_names"]
+
+    new_models = (new_synergy, new_champ_model, mlb, new_profile, new_stat_model, scaler,
+                  feature_cols, vectorizer, all_df, champ_cols)
+    state["n_rows"] += len(new_df)
+    if rows is not None:
+        rows.owner = new_models
+    # 행 단위 테이블만 이어 쓰고 나머지는 새 모델 기준으로 만든다.
+    # (what_if LRU / champ_sums 같은 모델 의존 캐시는 옮기지 않는다 — 새 ctx 에서 지연 생성)
+    _remember_batch_context({
+        "models": new_models,
+        "col_index": col_index,
+        "champ_p": _champ_probs(new_champ_model, new_profile, col_index),
+        "incidence": all_inc,
+        "feats": all_feats,
+        "valid": all_valid,
+        "feat_names": feat_names,
+    })
+
+    if verbose:
+        print(f"[증분 학습] 새 행 {len(new_df):,}개, 새 챔피언 {len(new_champs)}명, 트리 +{n_rounds}")
+        print(f"[갱신 전 새 행 정확도] Synergy {synergy_acc:.2%} / 챔피언 {champ_acc:.2%} / 스탯 {stat_acc:.2%}")
+    return new_models, state
 
 
 def list_all_champs(models):
@@ -0,0 +1,287 @@
+# ml_stream.py — 메모리보다 큰 매치 CSV 로 train_models 와 같은 모델 세트를 학습
+"""
+ml.train_models 는 전체 DataFrame 과 그 복사본(all_tags 문자열, 원-핫, 태그 행렬, X_stat)을
+한꺼번에 메모리에 올린다. 여기서는 CSV 를 청크 단위로만 읽는다.
+
+  1) 스캔: 챔피언 목록, 태그 어휘, 스케일러 통계(학습 행), 챔피언 피처 값 빈도(중앙값용)
+  2) 학습: 모델마다 xgb.DataIter 가 CSV 를 다시 청크로 읽어 피처를 만들고
+           QuantileDMatrix(기본) 또는 외부 메모리 DMatrix(cache_dir 지정 시)로 넘김
+  3) 평가: 시험 행만 다시 읽어 정확도 계산 (evaluate=False 면 생략)
+
+반환 튜플 형식은 train_models 와 같다. 단 df 자리에는 get_team_winrate 가 쓰는
+챔피언/레벨 스탯 컬럼만 담은 축소 DataFrame 이 들어간다 (keep_rows=False 면 빈 DataFrame).
+"""
+from __future__ import annotations
+
+import os
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import MultiLabelBinarizer, StandardScaler
+
+from profiling import timed
+from ml import (
+    SEED, CHAMP_FEATURE_COLS, _build_champ_long, _split_tags, _accumulate_champ_values, _counter_median,
+)
+
+CHAMP_COLS = [f"champ{i}_name" for i in range(1, 6)]
+TAG_COLS = [f"champ{i}_tags" for i in range(1, 6)]
+STAT_TYPES = ["hp", "mp", "armor", "spellblock", "attackdamage", "attackspeed"]
+LVL_SUFFIXES = ["_lvl3", "_lvl6", "_lvl11", "_lvl16", "_lvl18"]
+
+# train_models 와 같은 하이퍼파라미터 (tree_method=hist 는 xgboost 2.x 기본값)
+SYNERGY_PARAMS = dict(n_estimators=200, max_depth=4, learning_rate=0.1)
+CHAMP_PARAMS = dict(n_estimators=150, max_depth=5, learning_rate=0.1)
+STAT_PARAMS = dict(n_estimators=200, max_depth=4, learning_rate=0.1)
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 청크 입력
+# ─────────────────────────────────────────────────────────────────────
+def _iter_chunks(path, chunksize, encoding):
+    return pd.read_csv(path, chunksize=chunksize, encoding=encoding, low_memory=False)
+
+
+def _detect_encoding(path):
+    for enc in ["utf-8-sig", "utf-8", "cp949", "euc-kr", "latin1"]:
+        try:
+            pd.read_csv(path, nrows=1000, encoding=enc)
+            return enc
+        except Exception:
+            continue
+    return None
+
+
+def _train_mask(n, chunk_no, test_size):
+    """청크 번호로 시드를 고정한 행 단위 학습/시험 분할 (패스마다 같은 결과)."""
+    rng = np.random.default_rng(SEED + chunk_no)
+    return rng.random(n) >= test_size
+
+
+def _all_tags(chunk):
+    return chunk[TAG_COLS].fillna("").astype(str).agg(",".join, axis=1)
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 청크별 피처
+# ─────────────────────────────────────────────────────────────────────
+def _synergy_features(chunk, mlb):
+    return mlb.transform(chunk[CHAMP_COLS].values.tolist()).astype(np.float32)
+
+
+def _champ_features(chunk, champ_feature_cols):
+    champ_long = _build_champ_long(chunk)
+    return champ_long[champ_feature_cols].to_numpy(dtype=np.float32), champ_long["win"].to_numpy()
+
+
+def _stat_features(chunk, lvl_cols, vectorizer):
+    tags = vectorizer.transform(_all_tags(chunk)).toarray()
+    return np.hstack([chunk[lvl_cols].to_numpy(dtype=np.float64), tags])
+
+
+class _ChunkIter(xgb.DataIter):
+    """CSV 를 청크로 다시 읽으며 make(chunk, chunk_no) → (X, y) 를 XGBoost 에 넘기는 반복자."""
+
+    def __init__(self, path, chunksize, encoding, make, cache_prefix=None):
+        self._path, self._chunksize, self._encoding, self._make = path, chunksize, encoding, make
+        self._reader, self._no = None, 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._reader is None:
+            self._reader = iter(_iter_chunks(self._path, self._chunksize, self._encoding))
+        while True:
+            chunk = next(self._reader, None)
+            if chunk is None:
+                return 0
+            X, y = self._make(chunk, self._no)
+            self._no += 1
+            if len(y):
+                input_data(data=X, label=y)
+                return 1
+
+    def reset(self):
+        self._reader, self._no = None, 0
+
+
+def _build_dmatrix(it, external_memory):
+    return xgb.DMatrix(it) if external_memory else xgb.QuantileDMatrix(it, max_bin=256)
+
+
+def _fit_booster(dtrain, params):
+    params = dict(params)
+    n_rounds = params.pop("n_estimators")
+    booster = xgb.train(
+        {"objective": "binary:logistic", "eval_metric": "logloss", "tree_method": "hist",
+         "seed": SEED, **params},
+        dtrain, num_boost_round=n_rounds,
+    )
+    # 기존 코드와 같은 XGBClassifier 인터페이스로 감싸기
+    clf = xgb.XGBClassifier(objective="binary:logistic", eval_metric="logloss",
+                            random_state=SEED, n_estimators=n_rounds, **params)
+    clf.load_model(bytearray(booster.save_raw("json")))
+    return clf
+
+
+def _scaler_from_moments(names, n, sums, sq_sums):
+    """청크별로 모은 개수/합/제곱합(피처별, NaN 제외)으로 StandardScaler 를 구성."""
+    mean = sums / n
+    var = np.maximum(sq_sums / n - mean ** 2, 0.0)
+    scale = np.sqrt(var)
+    scale[scale == 0.0] = 1.0
+    scaler = StandardScaler()
+    scaler.mean_, scaler.var_, scaler.scale_ = mean, var, scale
+    scaler.n_samples_seen_ = n.astype(np.int64)
+    scaler.n_features_in_ = len(names)
+    scaler.feature_names_in_ = np.asarray(names, dtype=object)
+    return scaler
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 학습
+# ─────────────────────────────────────────────────────────────────────
+@timed("ml_stream.train_models_streaming")
+def train_models_streaming(path, chunksize: int = 100_000, test_size: float = 0.2,
+                           cache_dir: str | None = None, keep_rows: bool = True,
+                           evaluate: bool = True, verbose: bool = True):
+    """
+    path 의 매치 CSV 를 청크 단위로 읽어 train_models 와 같은 형식의 모델 튜플을 만든다.
+    cache_dir 를 주면 XGBoost 외부 메모리(DMatrix + 디스크 캐시)를 쓰고,
+    아니면 양자화된 QuantileDMatrix 에 담는다(원본 dense 행렬 대비 수 배 작음).
+    """
+    path = str(path)
+    encoding = _detect_encoding(path)
+    header = pd.read_csv(path, nrows=0, encoding=encoding).columns
+    lvl_cols = [f"{s}{lvl}" for s in STAT_TYPES for lvl in LVL_SUFFIXES if f"{s}{lvl}" in header]
+
+    # ── 1) 스캔 ────────────────────────────────────────────────────────
+    champs, tag_vocab = set(), set()
+    analyzer = CountVectorizer(tokenizer=_split_tags).build_analyzer()
+    lvl_sum = np.zeros(len(lvl_cols)); lvl_sq = np.zeros(len(lvl_cols)); lvl_n = np.zeros(len(lvl_cols))
+    tag_sum, tag_sq = Counter(), Counter()
+    n_train = 0
+    state = None
+    canon = {}
+    kept = []
+
+    for no, chunk in enumerate(_iter_chunks(path, chunksize, encoding)):
+        champs.update(c for c in pd.unique(chunk[CHAMP_COLS].values.ravel("K")) if pd.notna(c))
+        train = _train_mask(len(chunk), no, test_size)
+
+        token_lists = [analyzer(t) for t in _all_tags(chunk)]
+        for toks in token_lists:
+            tag_vocab.update(toks)
+        for toks in (t for t, m in zip(token_lists, train) if m):
+            for tok, cnt in Counter(toks).items():
+                tag_sum[tok] += cnt
+                tag_sq[tok] += cnt * cnt
+        lvl = chunk.loc[train, lvl_cols].to_numpy(dtype=np.float64)
+        lvl_sum += np.nansum(lvl, axis=0)
+        lvl_sq += np.nansum(lvl ** 2, axis=0)
+        lvl_n += (~np.isnan(lvl)).sum(axis=0)
+        n_train += int(train.sum())
+
+        champ_long = _build_champ_long(chunk)
+        if state is None:
+            cols = [c for c in CHAMP_FEATURE_COLS if c in champ_long.columns]
+            state = {"champ_feature_cols": cols, "champ_values": {}, "n_rows": 0}
+        _accumulate_champ_values(state, champ_long)
+        state["n_rows"] += len(chunk)
+
+        if keep_rows:
+            slim = chunk[CHAMP_COLS + lvl_cols].copy()
+            for c in CHAMP_COLS:  # 같은 이름은 같은 문자열 객체를 가리키게 해서 메모리 절약
+                slim[c] = slim[c].map(lambda v: canon.setdefault(v, v) if isinstance(v, str) else v)
+            slim[lvl_cols] = slim[lvl_cols].astype(np.float32)
+            kept.append(slim)
+
+    all_champs = sorted(champs)
+    mlb = MultiLabelBinarizer(classes=all_champs)
+    mlb.fit([])
+    vectorizer = CountVectorizer(tokenizer=_split_tags, vocabulary=sorted(tag_vocab))
+    vectorizer.fit([""])
+    tag_names = list(vectorizer.get_feature_names_out())
+    feature_cols = lvl_cols + [f"tag_{t}" for t in tag_names]
+    scaler = _scaler_from_moments(
+        feature_cols, np.concatenate([lvl_n, np.full(len(tag_names), n_train)]),
+        np.concatenate([lvl_sum, [tag_sum[t] for t in tag_names]]),
+        np.concatenate([lvl_sq, [tag_sq[t] for t in tag_names]]),
+    )
+    champ_feature_cols = state["champ_feature_cols"]
+    champ_profile = pd.DataFrame(
+        [{"champion": c, **{col: _counter_median(v[col]) for col in champ_feature_cols}}
+         for c, v in sorted(state["champ_values"].items())]
+    )
+
+    # ── 2) 학습 ────────────────────────────────────────────────────────
+    def _cache(name):
+        if not cache_dir:
+            return None
+        os.makedirs(cache_dir, exist_ok=True)
+        return os.path.join(cache_dir, name)
+
+    def _synergy_make(chunk, no):
+        m = _train_mask(len(chunk), no, test_size)
+        return _synergy_features(chunk[m], mlb), chunk.loc[m, "win"].to_numpy()
+
+    def _champ_make(chunk, no):
+        return _champ_features(chunk, champ_feature_cols)
+
+    def _stat_make(chunk, no):
+        m = _train_mask(len(chunk), no, test_size)
+        X = scaler.transform(pd.DataFrame(_stat_features(chunk[m], lvl_cols, vectorizer), columns=feature_cols))
+        return X.astype(np.float32), chunk.loc[m, "win"].to_numpy()
+
+    external = bool(cache_dir)
+    synergy_model = _fit_booster(
+        _build_dmatrix(_ChunkIter(path, chunksize, encoding, _synergy_make, _cache("synergy")), external),
+        SYNERGY_PARAMS)
+    champ_model = _fit_booster(
+        _build_dmatrix(_ChunkIter(path, chunksize, encoding, _champ_make, _cache("champ")), external),
+        CHAMP_PARAMS)
+    stat_model = _fit_booster(
+        _build_dmatrix(_ChunkIter(path, chunksize, encoding, _stat_make, _cache("stat")), external),
+        STAT_PARAMS)
+
+    # ── 3) 평가 ────────────────────────────────────────────────────────
+    if evaluate:
+        hits = Counter()
+        for no, chunk in enumerate(_iter_chunks(path, chunksize, encoding)):
+            test = ~_train_mask(len(chunk), no, test_size)
+            y = chunk["win"].to_numpy()
+            t = chunk[test]
+            hits["n"] += int(test.sum())
+            hits["synergy"] += int((synergy_model.predict(_synergy_features(t, mlb)) == y[test]).sum())
+            X_stat = scaler.transform(pd.DataFrame(_stat_features(t, lvl_cols, vectorizer), columns=feature_cols))
+            hits["stat"] += int((stat_model.predict(X_stat) == y[test]).sum())
+            Xc, yc = _champ_features(chunk, champ_feature_cols)
+            hits["champ_n"] += len(yc)
+            hits["champ"] += int((champ_model.predict(Xc) == yc).sum())
+        if verbose:
+            print(f"[Synergy 모델 정확도]: {hits['synergy'] / max(hits['n'], 1):.2%}")
+            print(f"[챔피언 개별 모델 정확도]: {hits['champ'] / max(hits['champ_n'], 1):.2%}")
+            print(f"[스탯/태그 모델 정확도]: {hits['stat'] / max(hits['n'], 1):.2%}")
+
+    df = pd.concat(kept, ignore_index=True) if kept else pd.DataFrame(columns=CHAMP_COLS + lvl_cols)
+    return synergy_model, champ_model, mlb, champ_profile, stat_model, scaler, feature_cols, vectorizer, df, CHAMP_COLS
+
+
+if __name__ == "__main__":
+    # python ml_stream.py renamed_data.csv models.joblib [--chunksize N] [--cache-dir DIR]
+    import argparse
+    import joblib
+
+    ap = argparse.ArgumentParser(description="청크 단위(out-of-core) ARAM 모델 학습")
+    ap.add_argument("csv")
+    ap.add_argument("output", help="저장할 joblib 경로")
+    ap.add_argument("--chunksize", type=int, default=100_000)
+    ap.add_argument("--cache-dir", default=None, help="지정 시 XGBoost 외부 메모리 캐시 사용")
+    ap.add_argument("--no-rows", action="store_true", help="스탯 평균용 축소 df 를 저장하지 않음")
+    args = ap.parse_args()
+    models = train_models_streaming(args.csv, chunksize=args.chunksize, cache_dir=args.cache_dir,
+                                    keep_rows=not args.no_rows)
+    joblib.dump(models, args.output)
+    print(f"저장: {args.output}")
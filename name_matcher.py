@@ -0,0 +1,240 @@
+# name_matcher.py — OCR 텍스트 → 챔피언 이름 색인 매처 (Aho-Corasick 정확 매칭 + 자모 BK-tree 편집거리 보정)
+"""
+챔피언 이름 목록에서 한 번 만들어 두고 영역마다 match(text) 한 번으로 (이름, 점수) 를 낸다.
+
+  1) Aho-Corasick: 정규화한 OCR 텍스트를 한 번 훑어 모든 이름의 부분 문자열 출현을 찾고 가장 긴 것을 고른다
+     (예: '애니비아' 안의 '애니' 보다 '애니비아'). 점수 1.0
+  2) 정확 출현이 없으면 한글을 자모로 풀어 편집거리 최소 이름을 찾는다
+     ('오콩' → 'ㅇㅗㅋㅗㅇ' ~ 'ㅇㅗㄱㅗㅇ' = 1 → '오공'). 점수 = 1 - 거리 / 자모 길이
+     자모 bigram 역색인으로 겹치는 bigram 이 많은 후보 몇 개만 거리 계산,
+     겹치는 bigram 이 없으면 BK-tree 최근접 탐색.
+  min_score 미만이면 (None, 점수).
+
+  m = ChampionMatcher(CHAMPIONS.names)
+  m.match("리신\\n")      # ('리 신', 1.0)
+  m.match("오콩")          # ('오공', 0.8)
+"""
+from __future__ import annotations
+
+import re
+from collections import Counter, defaultdict, deque
+from functools import lru_cache
+
+from vocab import CHAMPIONS, norm
+
+# ─────────────────────────────────────────────────────────────────────
+# 한글 자모 분해
+# ─────────────────────────────────────────────────────────────────────
+_CHO = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONG = ("", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ", "ㄿ", "ㅀ",
+         "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ")
+
+
+def to_jamo(text: str) -> str:
+    """완성형 한글 음절을 초성/중성/종성 자모로 풀고 나머지 문자는 소문자로 그대로 둔다."""
+    out = []
+    for ch in text:
+        code = ord(ch) - 0xAC00
+        if 0 <= code < 11172:
+            out.append(_CHO[code // 588])
+            out.append(_JUNG[(code % 588) // 28])
+            out.append(_JONG[code % 28])
+        else:
+            out.append(ch.lower())
+    return "".join(out)
+
+
+def levenshtein(a: str, b: str, limit: int | None = None) -> int:
+    """편집거리. limit 이 주어지면 그보다 커지는 순간 limit + 1 을 반환 (조기 종료)."""
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if limit is not None and min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Aho-Corasick
+# ─────────────────────────────────────────────────────────────────────
+class AhoCorasick:
+    """패턴 목록 → 오토마톤. find(text) 는 (끝 위치, 패턴 인덱스) 를 텍스트 한 번 훑어 모두 낸다."""
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for k, p in enumerate(self.patterns):
+            node = 0
+            for ch in p:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            if p:
+                self._out[node].append(k)
+        # BFS 로 실패 링크
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str):
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for k in self._out[node]:
+                yield i, k
+
+
+# ─────────────────────────────────────────────────────────────────────
+# BK-tree
+# ─────────────────────────────────────────────────────────────────────
+class BKTree:
+    """편집거리 BK-tree. search(word, max_dist) → [(거리, 값)] (거리 오름차순), nearest → 최근접 하나."""
+
+    def __init__(self, items=()):
+        self._root = None  # (key, value, {거리: 자식})
+        for key, value in items:
+            self.add(key, value)
+
+    def add(self, key: str, value):
+        if self._root is None:
+            self._root = (key, value, {})
+            return
+        node = self._root
+        while True:
+            d = levenshtein(key, node[0])
+            if d == 0:
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = (key, value, {})
+                return
+            node = child
+
+    def search(self, word: str, max_dist: int):
+        out = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            key, value, children = stack.pop()
+            d = levenshtein(word, key, limit=max_dist + max(children, default=0))
+            if d <= max_dist:
+                out.append((d, value))
+            for cd, child in children.items():
+                if d - max_dist <= cd <= d + max_dist:
+                    stack.append(child)
+        return sorted(out, key=lambda x: x[0])
+
+    def nearest(self, word: str, max_dist: int):
+        """가장 가까운 (거리, 값) 하나 (max_dist 초과면 None). 찾을수록 탐색 반경을 줄인다."""
+        best = None
+        radius = max_dist
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            key, value, children = stack.pop()
+            d = levenshtein(word, key, limit=radius + max(children, default=0))
+            if d <= radius and (best is None or d < best[0]):
+                best, radius = (d, value), d
+                if d == 0:
+                    break
+            for cd, child in children.items():
+                if d - radius <= cd <= d + radius:
+                    stack.append(child)
+        return best
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 매처
+# ─────────────────────────────────────────────────────────────────────
+_SPLIT_RE = re.compile(r"[\s/|:·,.()\[\]]+")
+
+
+def _bigrams(jamo: str):
+    padded = f"^{jamo}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+class ChampionMatcher:
+    def __init__(self, names, min_score: float = 0.6, n_candidates: int = 12):
+        self.names = [str(n) for n in names]
+        self.min_score = min_score
+        self.n_candidates = n_candidates
+        keys = [norm(n) for n in self.names]
+        self._ac = AhoCorasick(keys)
+        self._key_len = [len(k) for k in keys]
+        self._jamo = [to_jamo(k) for k in keys]
+        self._bk = BKTree((j, i) for i, j in enumerate(self._jamo))
+        self._postings = defaultdict(list)  # 자모 bigram → 이름 인덱스
+        for i, j in enumerate(self._jamo):
+            for g in _bigrams(j):
+                self._postings[g].append(i)
+
+    def _nearest(self, jamo: str, max_dist: int):
+        """(거리, 이름 인덱스) 또는 None."""
+        shared = Counter()
+        for g in _bigrams(jamo):
+            shared.update(self._postings.get(g, ()))
+        if not shared:
+            return self._bk.nearest(jamo, max_dist)
+        best = None
+        for i, _ in shared.most_common(self.n_candidates):
+            d = levenshtein(jamo, self._jamo[i], limit=best[0] if best else max_dist)
+            if d <= max_dist and (best is None or d < best[0]):
+                best = (d, i)
+        return best
+
+    def match(self, text: str):
+        """OCR 텍스트 → (챔피언 이름 | None, 점수 0~1)."""
+        key = norm(text or "")
+        if not key:
+            return None, 0.0
+        # 1) 정확 부분 문자열: 가장 긴 이름 (같으면 먼저 끝나는 것)
+        best = None
+        for end, k in self._ac.find(key):
+            if best is None or self._key_len[k] > self._key_len[best]:
+                best = k
+        if best is not None:
+            return self.names[best], 1.0
+        # 2) 자모 편집거리: 전체 텍스트와 토큰별로 가장 가까운 이름
+        best_name, best_score = None, 0.0
+        tokens = {key, *(norm(t) for t in _SPLIT_RE.split(text) if norm(t))}
+        for tok in tokens:
+            jamo = to_jamo(tok)
+            max_dist = max(1, int(len(jamo) * (1.0 - self.min_score)))
+            hit = self._nearest(jamo, max_dist)
+            if hit is not None:
+                d, i = hit
+                score = 1.0 - d / max(len(jamo), len(self._jamo[i]))
+                if score > best_score:
+                    best_name, best_score = self.names[i], score
+        if best_score < self.min_score:
+            return None, round(best_score, 3)
+        return best_name, round(best_score, 3)
+
+
+@lru_cache(maxsize=1)
+def get_matcher() -> ChampionMatcher:
+    """lol_champions.csv 전체 챔피언 매처 (프로세스당 한 번 생성)."""
+    return ChampionMatcher(CHAMPIONS.names)
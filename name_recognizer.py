@@ -0,0 +1,335 @@
+# name_recognizer.py — 로딩 화면 챔피언 이름 칸 로컬 인식기 (참조 이름 이미지와 정규화 상호상관)
+"""
+이름은 고정 폰트로 거의 단색 배경 위에 그려지므로, 챔피언 약 170명의 참조 이미지(폰트 렌더 또는 실제 화면 크롭)를
+같은 방식으로 정규화해 두고 영역 크롭과의 정규화 상호상관(NCC)을 행렬 곱 한 번으로 구한다.
+
+  rec = get_recognizer()                               # 참조 은행: registry 'name_bank' → ARAM_NAME_FONT 렌더 → 빈 은행
+  rec.recognize_many(crops, scale=1080 / img_h)       # [(이름, NCC, 확신 여부), ...] 10칸에 수 ms
+  rec.learn(crop, "아리", scale=...)                    # Vision 이 확정한 이름을 참조로 추가 (메모리, 이름당 상한)
+
+정규화: 회색조 → 배경(중앙값)과의 절대차 = 글자 전경 → 기준 해상도(1080p)로 크기 맞춤 → 글자 외곽 상자로 잘라
+캔버스 왼쪽 위에 붙임 → 살짝 흐림 → 평균 0, 노름 1. 글자색/배경색/칸 안 위치/해상도가 달라도 같은 벡터에 가깝다.
+확신: 최고 NCC ≥ min_score 이고, NCC 거리 √(2-2·NCC) 가 두 번째 이름 거리의 max_ratio 배 이하 (비율 검사 —
+앞부분이 같은 이름끼리는 NCC 차이가 작아도 거리 비율은 분명히 갈린다). 빈 은행에서 시작해 learn() 으로 채우는
+인식기는 참조가 있는 몇 이름끼리만 비교하게 되므로, 어휘의 모든 이름에 참조가 생기기 전에는 확신으로 치지 않는다.
+아니면 rune_champion 이 Vision 으로 넘긴다 (Vision 도 없으면 빈 이름).
+
+  python -m name_recognizer render --font NanumGothicBold.ttf --size 18 --out name_bank.npz
+  python -m name_recognizer crops --labels labels.csv --out name_bank.npz    # 행: 파일,이름1,…,이름10
+  python -m name_recognizer eval --bank name_bank.npz --labels labels.csv
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+import registry
+from profiling import timed
+
+# 정규화 캔버스 (기준 해상도 1080p 픽셀 단위). 이름 칸은 약 244×26~30, 글자 높이는 20 안쪽
+CANVAS_H, CANVAS_W = 24, 240
+BASE_H = 1080
+# 글자 전경 판정: 배경과의 차가 최대 차의 이 비율 이상인 픽셀의 외곽 상자
+FG_RATIO = 0.3
+# 이보다 대비가 약하면 빈 칸 (글자 없음)
+BLANK_MAX_DIFF = 24.0
+MIN_SCORE = 0.80
+MAX_RATIO = 0.8
+# learn() 로 이름 하나에 쌓는 참조 수 상한
+MAX_PER_NAME = 4
+BACKENDS = ("auto", "local", "vision")
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 정규화
+# ─────────────────────────────────────────────────────────────────────
+def normalize_crop(crop: Image.Image, scale: float = 1.0):
+    """이름 칸 크롭 → (CANVAS_H * CANVAS_W,) float32 (평균 0, 노름 1). 글자가 없으면 None. scale = 1080 / 화면 높이."""
+    g = crop.convert("L")
+    if abs(scale - 1.0) > 0.02:
+        g = g.resize((max(1, round(g.width * scale)), max(1, round(g.height * scale))), Image.BILINEAR)
+    gray = np.asarray(g, dtype=np.float32)
+    fg = np.abs(gray - np.median(gray))
+    peak = float(fg.max()) if fg.size else 0.0
+    if peak < BLANK_MAX_DIFF:
+        return None
+    rows = np.flatnonzero((fg >= FG_RATIO * peak).any(axis=1))
+    cols = np.flatnonzero((fg >= FG_RATIO * peak).any(axis=0))
+    fg = fg[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1][:CANVAS_H, :CANVAS_W] / peak
+
+    canvas = np.zeros((CANVAS_H, CANVAS_W), dtype=np.float32)
+    canvas[:fg.shape[0], :fg.shape[1]] = fg
+    # 3×3 상자 흐림 (분리형): 1px 안팎의 위치/앤티에일리어싱 차이를 흡수
+    p = np.pad(canvas, 1, mode="edge")
+    p = p[:, :-2] + p[:, 1:-1] + p[:, 2:]
+    v = ((p[:-2] + p[1:-1] + p[2:]) / 9.0).ravel()
+    v = v - v.mean()
+    n = float(np.linalg.norm(v))
+    return v / n if n > 0 else None
+
+
+def render_name(name: str, font, fill=(230, 220, 180), bg=(20, 22, 28)) -> Image.Image:
+    """폰트로 이름 하나를 이름 칸 크기 근처 이미지로 그린다 (기준 해상도)."""
+    l, t, r, b = font.getbbox(name)
+    img = Image.new("RGB", (max(r - l, 1) + 16, max(b - t, 1) + 10), bg)
+    ImageDraw.Draw(img).text((8 - l, 5 - t), name, font=font, fill=fill)
+    return img
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 참조 은행
+# ─────────────────────────────────────────────────────────────────────
+class NameBank:
+    """참조 벡터 (K, D) 와 각 벡터의 이름 인덱스 (K,). 이름 하나에 참조가 여럿일 수 있다."""
+
+    def __init__(self, names, vectors=None, labels=None):
+        self.names = list(names)
+        d = CANVAS_H * CANVAS_W
+        self.vectors = np.zeros((0, d), dtype=np.float32) if vectors is None else np.asarray(vectors, dtype=np.float32)
+        self.labels = np.zeros(0, dtype=np.int32) if labels is None else np.asarray(labels, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.labels)
+
+    @classmethod
+    def render(cls, names, font_path, size: int = 18):
+        font = ImageFont.truetype(str(font_path), size)
+        vecs, labels = [], []
+        for i, name in enumerate(names):
+            v = normalize_crop(render_name(name, font))
+            if v is not None:
+                vecs.append(v)
+                labels.append(i)
+        return cls(names, np.stack(vecs) if vecs else None, labels)
+
+    @classmethod
+    def from_crops(cls, names, pairs):
+        """pairs: [(크롭, 이름, scale), ...] → 이름별 참조. names 에 없는 이름은 건너뛴다."""
+        index = {n: i for i, n in enumerate(names)}
+        vecs, labels = [], []
+        for crop, name, scale in pairs:
+            v = normalize_crop(crop, scale) if name in index else None
+            if v is not None:
+                vecs.append(v)
+                labels.append(index[name])
+        return cls(names, np.stack(vecs) if vecs else None, labels)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as z:
+            if tuple(z["canvas"]) != (CANVAS_H, CANVAS_W):
+                raise ValueError(f"캔버스 크기가 다른 은행입니다: {tuple(z['canvas'])} != {(CANVAS_H, CANVAS_W)}")
+            return cls([str(n) for n in z["names"]], z["vectors"], z["labels"])
+
+    def save(self, path):
+        np.savez_compressed(path, names=np.array(self.names), vectors=self.vectors.astype(np.float16),
+                            labels=self.labels, canvas=np.array([CANVAS_H, CANVAS_W]))
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 인식기
+# ─────────────────────────────────────────────────────────────────────
+class NameRecognizer:
+    def __init__(self, bank: NameBank, min_score: float = MIN_SCORE, max_ratio: float = MAX_RATIO,
+                 require_complete=None):
+        self.names = list(bank.names)
+        # 어휘 = 은행의 처음 이름 목록. require_complete (기본: 빈 은행으로 시작할 때) 면
+        # 이 이름들에 모두 참조가 생길 때까지 확신 판정을 하지 않는다
+        self._n_vocab = len(self.names)
+        self.require_complete = len(bank) == 0 if require_complete is None else bool(require_complete)
+        self.min_score = min_score
+        self.max_ratio = max_ratio
+        self._lock = threading.Lock()
+        self._set(bank.vectors.astype(np.float32), bank.labels.astype(np.int32))
+        self.counts = {"regions": 0, "confident": 0, "learned": 0}
+
+    def _set(self, vectors, labels):
+        # 이름 순으로 정렬해 두면 이름별 최대 NCC 를 reduceat 한 번으로 구한다
+        order = np.argsort(labels, kind="stable")
+        vectors, labels = vectors[order], labels[order]
+        present, starts = np.unique(labels, return_index=True)
+        self._state = (vectors, labels, present, starts)
+        self.complete = bool(np.isin(np.arange(self._n_vocab), present).all())
+
+    def __len__(self):
+        return len(self._state[1])
+
+    @timed("name_recognizer.recognize_many")
+    def recognize_many(self, crops, scale: float = 1.0):
+        """크롭 목록 → [(이름 또는 None, NCC, 확신 여부), ...]. 빈 칸/빈 은행은 (None, 0.0, False)."""
+        vectors, _, present, starts = self._state
+        gate = self.complete or not self.require_complete
+        vecs = [normalize_crop(c, scale) for c in crops]
+        out = [(None, 0.0, False)] * len(vecs)
+        rows = [i for i, v in enumerate(vecs) if v is not None]
+        if rows and len(present):
+            S = np.stack([vecs[i] for i in rows]) @ vectors.T          # (n, K) NCC
+            per_name = np.maximum.reduceat(S, starts, axis=1)          # (n, 이름 수)
+            best = per_name.argmax(axis=1)
+            top = per_name[np.arange(len(rows)), best]
+            if per_name.shape[1] > 1:
+                second = np.partition(per_name, -2, axis=1)[:, -2]
+            else:
+                second = np.full(len(rows), -1.0, dtype=np.float32)
+            d_top = np.sqrt(np.maximum(2.0 - 2.0 * top, 0.0))
+            d_second = np.sqrt(np.maximum(2.0 - 2.0 * second, 0.0))
+            for k, i in enumerate(rows):
+                ok = bool(gate and top[k] >= self.min_score and d_top[k] <= self.max_ratio * d_second[k])
+                out[i] = (self.names[present[best[k]]], float(top[k]), ok)
+        with self._lock:
+            self.counts["regions"] += len(out)
+            self.counts["confident"] += sum(ok for _, _, ok in out)
+        return out
+
+    def learn(self, crop, name: str, scale: float = 1.0) -> bool:
+        """확정된 이름의 크롭을 참조로 추가 (메모리만). 이름당 MAX_PER_NAME 개까지."""
+        v = normalize_crop(crop, scale)
+        if v is None:
+            return False
+        with self._lock:
+            if name not in self.names:
+                self.names.append(name)
+            i = self.names.index(name)
+            vectors, labels, _, _ = self._state
+            if int((labels == i).sum()) >= MAX_PER_NAME:
+                return False
+            self._set(np.vstack([vectors, v[None, :]]), np.append(labels, i).astype(np.int32))
+            self.counts["learned"] += 1
+        return True
+
+    def bank(self) -> NameBank:
+        vectors, labels, _, _ = self._state
+        return NameBank(self.names, vectors, labels)
+
+    def stats(self):
+        with self._lock:
+            c = dict(self.counts)
+        c["references"] = len(self)
+        c["names"] = len(np.unique(self._state[1]))
+        c["complete"] = self.complete
+        c["require_complete"] = self.require_complete
+        return c
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 프로세스 전역 인식기
+# ─────────────────────────────────────────────────────────────────────
+_RECOGNIZER = None
+_RECOGNIZER_LOCK = threading.Lock()
+
+
+def _load_bank():
+    from vocab import CHAMPIONS
+    if registry.path("name_bank") is not None:
+        return registry.get("name_bank")
+    font = os.environ.get("ARAM_NAME_FONT")
+    if font and Path(font).exists():
+        return NameBank.render(CHAMPIONS.names, font, int(os.environ.get("ARAM_NAME_FONT_SIZE", "18")))
+    return NameBank(CHAMPIONS.names)  # 빈 은행: 모든 이름이 learn 으로 채워질 때까지 확신 없음 (auto 는 Vision)
+
+
+def get_recognizer() -> NameRecognizer:
+    """
+    프로세스당 하나. 환경변수:
+      ARAM_NAME_MIN_SCORE (0.80), ARAM_NAME_MAX_RATIO (0.8),
+      ARAM_NAME_FONT / ARAM_NAME_FONT_SIZE (registry 'name_bank' 가 없을 때 폰트로 참조 렌더)
+    """
+    global _RECOGNIZER
+    if _RECOGNIZER is None:
+        with _RECOGNIZER_LOCK:
+            if _RECOGNIZER is None:
+                _RECOGNIZER = NameRecognizer(
+                    _load_bank(),
+                    min_score=float(os.environ.get("ARAM_NAME_MIN_SCORE", MIN_SCORE)),
+                    max_ratio=float(os.environ.get("ARAM_NAME_MAX_RATIO", MAX_RATIO)),
+                )
+    return _RECOGNIZER
+
+
+def ocr_backend() -> str:
+    """ARAM_OCR_BACKEND: auto (로컬 → 확신 없으면 Vision, 기본) / local (Vision 안 씀) / vision (기존 동작)."""
+    b = os.environ.get("ARAM_OCR_BACKEND", "auto").strip().lower()
+    return b if b in BACKENDS else "auto"
+
+
+# ─────────────────────────────────────────────────────────────────────
+# CLI
+# ─────────────────────────────────────────────────────────────────────
+def _name_regions():
+    root = Path(__file__).resolve().parent
+    if str(root / "시나리오2") not in sys.path:
+        sys.path.append(str(root / "시나리오2"))
+    from rune_champion import champion_name_regions, _scale_box
+    return champion_name_regions, _scale_box
+
+
+def _labeled_crops(labels_csv):
+    """labels.csv (파일,이름1,…,이름10; 상대 경로는 CSV 기준) → [(크롭, 이름, scale), ...]"""
+    regions, scale_box = _name_regions()
+    base = Path(labels_csv).resolve().parent
+    out = []
+    with open(labels_csv, encoding="utf-8", newline="") as f:
+        for row in csv.reader(f):
+            if not row or row[0].startswith("#"):
+                continue
+            with Image.open(base / row[0]) as im:
+                img = im.convert("RGB")
+            w, h = img.size
+            for region, name in zip(regions, row[1:]):
+                if name.strip():
+                    out.append((img.crop(scale_box(region, w, h)), name.strip(), BASE_H / h))
+    return out
+
+
+def main(argv=None):
+    from vocab import CHAMPIONS
+    ap = argparse.ArgumentParser(description="챔피언 이름 칸 참조 은행 만들기/평가")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("render", help="폰트로 전체 챔피언 이름을 렌더해 은행 생성")
+    r.add_argument("--font", required=True)
+    r.add_argument("--size", type=int, default=18, help="1080p 기준 글자 크기(px)")
+    r.add_argument("--out", default="name_bank.npz")
+    c = sub.add_parser("crops", help="이름을 아는 실제 로딩 화면 크롭으로 은행 생성")
+    c.add_argument("--labels", required=True)
+    c.add_argument("--out", default="name_bank.npz")
+    e = sub.add_parser("eval", help="라벨 있는 화면으로 정확도/확신 비율/시간 측정")
+    e.add_argument("--bank", required=True)
+    e.add_argument("--labels", required=True)
+    e.add_argument("--min-score", type=float, default=MIN_SCORE)
+    e.add_argument("--max-ratio", type=float, default=MAX_RATIO)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "render":
+        bank = NameBank.render(CHAMPIONS.names, args.font, args.size)
+    elif args.cmd == "crops":
+        bank = NameBank.from_crops(CHAMPIONS.names, _labeled_crops(args.labels))
+    else:
+        rec = NameRecognizer(NameBank.load(args.bank), args.min_score, args.max_ratio)
+        pairs = _labeled_crops(args.labels)
+        t0 = time.perf_counter()
+        res = [rec.recognize_many([crop], scale)[0] for crop, _, scale in pairs]
+        ms = (time.perf_counter() - t0) * 1000.0 / max(len(pairs), 1)
+        correct = sum(n == name for (n, _, _), (_, name, _) in zip(res, pairs))
+        conf = [(n == name) for (n, _, ok), (_, name, _) in zip(res, pairs) if ok]
+        print(f"영역 {len(pairs)}  정확도 {correct / max(len(pairs), 1):.1%}  확신 {len(conf) / max(len(pairs), 1):.1%} "
+              f"(그중 정확 {sum(conf) / max(len(conf), 1):.1%})  {ms:.2f} ms/영역")
+        return
+    bank.save(args.out)
+    covered = set(bank.labels.tolist())
+    print(f"저장: {args.out}  참조 {len(bank)}개 / 이름 {len(covered)}개")
+    missing = [n for i, n in enumerate(bank.names) if i not in covered]
+    if missing:
+        print(f"경고: 참조가 없는 이름 {len(missing)}개 — 이 이름은 인식하지 못하고 비슷한 이름으로 확신할 수 있습니다: "
+              + ", ".join(missing[:20]) + (" …" if len(missing) > 20 else ""), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
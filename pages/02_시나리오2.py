@@ -5,9 +5,12 @@ from pathlib import Path
 BASE2 = Path(__file__).resolve().parents[1] / "시나리오2"
 APP2  = BASE2 / "app.py"
 
-# 1) 이전에 로드된 동일 모듈 캐시 제거
+# 1) 다른 위치에서 로드된 같은 이름 모듈만 캐시에서 제거.
+#    시나리오2 폴더의 모듈은 그대로 둔다: 매 rerun 마다 빼면 다른 세션이 import 하는 도중에
+#    sys.modules 항목이 사라져 KeyError 가 난다 (동시 첫 import 는 파이썬 모듈별 import 락이 처리).
 for mod in ["item_recommender", "rune_champion"]:
-    if mod in sys.modules:
+    cached = sys.modules.get(mod)
+    if cached is not None and Path(getattr(cached, "__file__", "") or "").resolve().parent != BASE2:
         sys.modules.pop(mod, None)
 
 # 2) 시나리오2 폴더를 sys.path 최상단에
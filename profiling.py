@@ -0,0 +1,169 @@
+# profiling.py — 핫패스 구간 타이머 (프로세스 단위 집계 / Streamlit 패널 / JSON 내보내기)
+"""
+사용:
+  from profiling import timed, span
+
+  @timed("image.predict_image")
+  def predict_image(...): ...
+
+  with span("ml.get_team_winrate.stat"):
+      ...
+
+환경변수 ARAM_PROFILE=1 이거나 enable() 을 호출했을 때만 기록한다.
+꺼져 있으면 timed 래퍼는 플래그 확인 한 번 후 원래 함수를 그대로 호출한다.
+"""
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# 지연 시간 히스토그램 경계 (ms): 0.1ms ~ 60s 로그 간격
+BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+
+_ENABLED = os.environ.get("ARAM_PROFILE", "").strip().lower() in {"1", "true", "yes", "on"}
+_LOCK = threading.Lock()
+_STATS = {}
+
+
+def enable(on: bool = True):
+    global _ENABLED
+    _ENABLED = bool(on)
+
+
+def is_enabled() -> bool:
+    return _ENABLED
+
+
+def reset():
+    with _LOCK:
+        _STATS.clear()
+
+
+def record(name: str, elapsed_ms: float, error: bool = False):
+    with _LOCK:
+        s = _STATS.get(name)
+        if s is None:
+            s = _STATS[name] = {
+                "count": 0, "errors": 0, "total_ms": 0.0,
+                "min_ms": float("inf"), "max_ms": 0.0,
+                "hist": [0] * (len(BUCKETS_MS) + 1),
+            }
+        s["count"] += 1
+        s["errors"] += int(error)
+        s["total_ms"] += elapsed_ms
+        s["min_ms"] = min(s["min_ms"], elapsed_ms)
+        s["max_ms"] = max(s["max_ms"], elapsed_ms)
+        s["hist"][bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+
+
+@contextmanager
+def span(name: str):
+    if not _ENABLED:
+        yield
+        return
+    t0 = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        record(name, (time.perf_counter() - t0) * 1000.0, error)
+
+
+def timed(name: str | None = None):
+    """함수 전체를 구간으로 기록하는 데코레이터. name 생략 시 모듈.함수명."""
+    def deco(fn):
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _ENABLED:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            error = False
+            try:
+                return fn(*args, **kwargs)
+            except BaseException:
+                error = True
+                raise
+            finally:
+                record(label, (time.perf_counter() - t0) * 1000.0, error)
+        return wrapper
+    return deco
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 조회 / 내보내기
+# ─────────────────────────────────────────────────────────────────────
+def _quantile(hist, q):
+    """히스토그램 버킷 상한으로 근사한 분위수 (ms)."""
+    n = sum(hist)
+    if n == 0:
+        return 0.0
+    target, acc = q * n, 0
+    for i, c in enumerate(hist):
+        acc += c
+        if acc >= target:
+            return BUCKETS_MS[i] if i < len(BUCKETS_MS) else float("inf")
+    return float("inf")
+
+
+def snapshot():
+    """{구간명: {count, errors, mean_ms, min_ms, max_ms, p50_ms, p95_ms, p99_ms, hist}}"""
+    with _LOCK:
+        stats = {k: dict(v, hist=list(v["hist"])) for k, v in _STATS.items()}
+    out = {}
+    for name, s in sorted(stats.items()):
+        out[name] = {
+            "count": s["count"],
+            "errors": s["errors"],
+            "total_ms": round(s["total_ms"], 3),
+            "mean_ms": round(s["total_ms"] / s["count"], 3) if s["count"] else 0.0,
+            "min_ms": round(s["min_ms"], 3) if s["count"] else 0.0,
+            "max_ms": round(s["max_ms"], 3),
+            "p50_ms": _quantile(s["hist"], 0.50),
+            "p95_ms": _quantile(s["hist"], 0.95),
+            "p99_ms": _quantile(s["hist"], 0.99),
+            "hist": s["hist"],
+        }
+    return out
+
+
+def export_json(path=None) -> str:
+    payload = {"pid": os.getpid(), "time": time.time(), "buckets_ms": BUCKETS_MS, "spans": snapshot()}
+    text = json.dumps(payload, ensure_ascii=False, indent=2)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    return text
+
+
+def render_panel(container=None):
+    """Streamlit 사이드바(또는 지정 컨테이너)에 타이밍 표 + JSON 다운로드 버튼."""
+    import streamlit as st
+    import pandas as pd
+
+    box = container if container is not None else st.sidebar
+    with box.expander("⏱️ 타이밍", expanded=False):
+        # 계측은 프로세스 전역: 체크박스는 현재 전역 상태를 보여 주고, 사용자가 바꿀 때만 (on_change) 전역을 바꾼다.
+        # rerun 마다 세션 값으로 enable() 하면 상태가 다른 세션끼리 서로 켜고 끈다.
+        st.session_state["profiling_enabled"] = _ENABLED
+        st.checkbox("계측 켜기", key="profiling_enabled",
+                    on_change=lambda: enable(st.session_state["profiling_enabled"]))
+        snap = snapshot()
+        if not snap:
+            st.caption("기록된 구간이 없습니다.")
+            return
+        rows = [{"구간": k, **{c: v[c] for c in ("count", "errors", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")}}
+                for k, v in snap.items()]
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+        st.download_button("JSON 내보내기", export_json(), file_name="aram_timings.json", mime="application/json")
+        if st.button("초기화", key="profiling_reset"):
+            reset()
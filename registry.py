@@ -0,0 +1,249 @@
+# registry.py — 모델/참조 데이터 아티팩트 레지스트리 (경로 해석 · 체크섬 · 프로세스당 한 번 로드)
+"""
+두 시나리오와 Home 이 각자 후보 경로를 뒤지고 같은 파일을 따로 읽던 것을 한 곳으로 모은다.
+
+  import registry
+  model = registry.get("build_model")      # LGBM 빌드 모델 (처음 호출 때 로드, 이후 같은 객체)
+  store = registry.get("build_store")      # 컴파일된 빌드 저장소 (build_store.BuildStore)
+  registry.path("cc_table")               # 경로만 (없으면 None)
+  registry.info()                         # [{name, path, exists, bytes, sha256, verified, loaded}, ...]
+  python -m registry --write-manifest     # 현재 파일의 sha256 을 artifacts_manifest.json 에 기록
+
+- 후보 경로는 리포 루트 기준, 앞에서부터 처음 존재하는 파일을 쓴다.
+  ARAM_ARTIFACT_<이름 대문자> 환경변수로 경로를 직접 지정할 수 있다 (예: ARAM_ARTIFACT_BUILD_MODEL).
+- 로드는 지연 + 아티팩트별 락으로 한 번만. 돌려주는 객체는 모든 세션/페이지가 공유하므로 읽기 전용으로 쓴다
+  (DataFrame 을 고쳐야 하면 .copy()).
+- 체크섬: artifacts_manifest.json 에 {이름: {path, sha256}} 이 있고 해석된 경로가 그 path 이면,
+  get() 이 로드 전에 sha256 을 비교해 다르면 ChecksumMismatchError (모델/데이터를 바꾸고 매니페스트를 안 고친 경우).
+  매니페스트에 없거나 환경변수로 다른 파일을 지정한 아티팩트는 검사하지 않는다. ARAM_ARTIFACT_VERIFY=0 이면 끈다.
+- 이 모듈은 다른 리포 모듈을 최상단에서 import 하지 않는다 (vocab 등이 경로를 가져다 쓸 수 있게).
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+from profiling import span
+
+ROOT_DIR = Path(__file__).resolve().parent
+MANIFEST_PATH = ROOT_DIR / "artifacts_manifest.json"
+
+
+class ChecksumMismatchError(RuntimeError):
+    """아티팩트 파일의 sha256 이 매니페스트와 다름."""
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 로더 (무거운 import 는 호출 시점에)
+# ─────────────────────────────────────────────────────────────────────
+def _load_joblib(path):
+    import joblib
+    return joblib.load(path)
+
+
+def _load_csv(path):
+    import pandas as pd
+    return pd.read_csv(path, encoding="utf-8")
+
+
+def _load_match_csv(path):
+    from ml import read_csv_safe
+    return read_csv_safe(str(path))
+
+
+def _load_build_store(path):
+    from build_store import get_build_store
+    return get_build_store(path)
+
+
+def _load_name_bank(path):
+    from name_recognizer import NameBank
+    return NameBank.load(path)
+
+
+class Artifact:
+    """등록된 아티팩트 하나: 후보 경로, 로더, 로드된 값, 체크섬 캐시."""
+
+    def __init__(self, name: str, candidates, loader, description: str = ""):
+        self.name = name
+        self.candidates = tuple(candidates)
+        self.loader = loader
+        self.description = description
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded = False
+        self._checksum = None  # (path, size, mtime_ns, sha256)
+
+
+_ARTIFACTS = {a.name: a for a in [
+    Artifact("build_model", ("lgbm_model_tuned.joblib",), _load_joblib, "시나리오2 아이템 빌드 LGBM"),
+    Artifact("build_model_compact", ("lgbm_model_compact.joblib",), _load_joblib,
+             "빌드 모델 가지치기 소형 번들 (build_compact.py)"),
+    Artifact("build_store", ("템트리_converted_fixed.json",), _load_build_store, "아이템 빌드 (컴파일 저장소)"),
+    Artifact("cc_table", ("champ_job_cc.csv",), _load_csv, "챔피언 역할군/CC 개수"),
+    Artifact("champions", ("lol_champions.csv",), _load_csv, "챔피언 목록"),
+    Artifact("rune_roles", ("champion_rune_roles.csv",), _load_csv, "챔피언×룬 → 역할군"),
+    Artifact("name_bank", ("name_bank.npz", "data/name_bank.npz"), _load_name_bank, "챔피언 이름 칸 참조 (로컬 OCR)"),
+    Artifact("match_data", ("data/renamed_data.csv", "renamed_data.csv",
+                            "data/renamed_data_sample.csv", "renamed_data_sample.csv"),
+             _load_match_csv, "시나리오1 매치 CSV"),
+]}
+
+
+def _artifact(name) -> Artifact:
+    try:
+        return _ARTIFACTS[name]
+    except KeyError:
+        raise KeyError(f"등록되지 않은 아티팩트: {name} (가능: {', '.join(_ARTIFACTS)})") from None
+
+
+def names():
+    return list(_ARTIFACTS)
+
+
+def candidates(name):
+    """해석 순서대로의 후보 경로 (환경변수 지정이 있으면 그것이 맨 앞)."""
+    a = _artifact(name)
+    out = [ROOT_DIR / rel for rel in a.candidates]
+    env = os.environ.get(f"ARAM_ARTIFACT_{name.upper()}")
+    return ([Path(env)] if env else []) + out
+
+
+def path(name):
+    """처음 존재하는 후보 경로 (없으면 None)."""
+    return next((p for p in candidates(name) if p.exists()), None)
+
+
+def checksum(name):
+    """sha256 hex (파일 크기/수정시각이 같으면 다시 계산하지 않음). 파일이 없으면 None."""
+    a = _artifact(name)
+    p = path(name)
+    if p is None:
+        return None
+    st = p.stat()
+    with a._lock:
+        c = a._checksum
+        if c is not None and c[:3] == (str(p), st.st_size, st.st_mtime_ns):
+            return c[3]
+    h = hashlib.sha256()
+    with open(p, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    with a._lock:
+        a._checksum = (str(p), st.st_size, st.st_mtime_ns, h.hexdigest())
+    return a._checksum[3]
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 매니페스트 (기대 sha256)
+# ─────────────────────────────────────────────────────────────────────
+def _read_manifest():
+    try:
+        return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+
+
+def _rel(p: Path) -> str:
+    try:
+        return p.resolve().relative_to(ROOT_DIR).as_posix()
+    except ValueError:
+        return str(p)
+
+
+def expected(name):
+    """해석된 경로에 대한 매니페스트 sha256 (항목이 없거나 다른 파일을 가리키면 None)."""
+    p = path(name)
+    entry = _read_manifest().get(name)
+    if p is None or not entry or entry.get("path") != _rel(p):
+        return None
+    return entry.get("sha256")
+
+
+def verify(name):
+    """True/False = 매니페스트와 일치/불일치, None = 검사 대상 아님."""
+    exp = expected(name)
+    return None if exp is None else checksum(name) == exp
+
+
+def write_manifest(names_=None):
+    """지금 해석되는 파일들의 sha256 을 매니페스트에 기록 (환경변수로 지정한 바깥 파일은 제외)."""
+    manifest = _read_manifest()
+    for name in names_ or names():
+        p = path(name)
+        if p is None or _rel(p) == str(p):
+            continue
+        manifest[name] = {"path": _rel(p), "sha256": checksum(name)}
+    MANIFEST_PATH.write_text(json.dumps(manifest, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return manifest
+
+
+def get(name):
+    """
+    아티팩트를 로드해 공유 객체를 반환 (프로세스당 한 번).
+    파일이 없으면 FileNotFoundError, 매니페스트 sha256 과 다르면 ChecksumMismatchError.
+    """
+    a = _artifact(name)
+    if a._loaded:
+        return a._value
+    # 검사는 락 밖에서 (checksum 이 같은 락을 쓴다). 동시에 처음 부른 세션은 캐시된 sha256 을 같이 쓴다
+    if os.environ.get("ARAM_ARTIFACT_VERIFY", "1") != "0" and verify(name) is False:
+        raise ChecksumMismatchError(
+            f"{name} ({_rel(path(name))}) sha256 이 매니페스트와 다릅니다 "
+            f"(파일을 의도적으로 바꿨다면 python -m registry --write-manifest)")
+    with a._lock:
+        if not a._loaded:
+            p = path(name)
+            if p is None:
+                tried = ", ".join(str(c) for c in candidates(name))
+                raise FileNotFoundError(f"{name} 아티팩트를 찾을 수 없습니다: {tried}")
+            with span(f"registry.load.{name}"):
+                a._value = a.loader(p)
+            a._loaded = True
+    return a._value
+
+
+def is_loaded(name) -> bool:
+    return _artifact(name)._loaded
+
+
+def info(with_checksum: bool = True):
+    """디버그/상태 표시용 요약."""
+    out = []
+    for name, a in _ARTIFACTS.items():
+        p = path(name)
+        out.append({
+            "name": name,
+            "description": a.description,
+            "path": str(p) if p else None,
+            "exists": p is not None,
+            "bytes": p.stat().st_size if p else 0,
+            "sha256": (checksum(name) or "")[:12] if (with_checksum and p) else "",
+            "verified": verify(name) if (with_checksum and p) else None,
+            "loaded": a._loaded,
+        })
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="아티팩트 경로/체크섬 확인")
+    ap.add_argument("--write-manifest", action="store_true", help="현재 파일의 sha256 을 매니페스트에 기록")
+    args = ap.parse_args(argv)
+    if args.write_manifest:
+        write_manifest()
+        print(f"저장: {MANIFEST_PATH}")
+    bad = False
+    for art in info():
+        mark = {True: "ok", False: "불일치", None: "-"}[art["verified"]]
+        bad |= art["verified"] is False
+        print(f"{art['name']:20s} {mark:6s} {art['sha256']:12s} {art['path'] or '없음'}")
+    if bad:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+# synergy.py — 챔피언×챔피언 시너지 행렬과 근사 팀 스코어러
+"""
+synergy_model 은 약 170명 챔피언의 5-hot 벡터만 입력받는다. 학습 시점에 이 모델의 마진을
+  b + Σ_i u_i + Σ_{i<j} W_ij
+꼴(개별 기여 + 쌍 시너지)로 근사해 C×C float32 행렬 하나에 담는다 (대각 = u_i).
+스탯 모델은 챔피언별 가산 기여로, 챔피언 개별 모델은 원래 값 그대로 쓴다.
+
+  sm = build_synergy_matrix(models)          # 학습 직후 1회
+  approx_scores(encode_teams(teams, sm), sm) # 수백만 팀을 행렬 인덱싱으로 채점
+  rerank_top(teams_idx, sm, models, top_n)   # 근사 상위 N 개만 정확한 앙상블로 재정렬
+  slot_heatmap(team, sm)                     # 5 슬롯 × 후보 챔피언 근사 승률
+  multi_swap_teams(team, sm, n_swap=2)       # 여러 명 동시 교체 후보 팀 생성
+"""
+from __future__ import annotations
+
+from itertools import combinations
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import lsqr
+
+from ml import SEED, blend, get_team_winrate_batch, _champ_probs
+from profiling import timed
+
+_PAIRS = list(combinations(range(5), 2))
+_CHUNK = 200_000
+
+
+def _synergy_margin(model, X):
+    if hasattr(model, "decision_function"):  # tree_eval.CompiledTrees
+        return model.decision_function(X)
+    return model.predict(X, output_margin=True)
+
+
+def _onehot(team_idx, n_cols):
+    X = np.zeros((len(team_idx), n_cols), dtype=np.float32)
+    np.put_along_axis(X, team_idx, 1.0, axis=1)
+    return X
+
+
+def _design(team_idx, C):
+    """팀 인덱스 (n,5) → [단일 C | 쌍 C(C-1)/2] 희소 설계 행렬."""
+    n = len(team_idx)
+    t = np.sort(team_idx, axis=1)
+    i, j = np.triu_indices(C, k=1)
+    pair_id = np.full((C, C), -1, dtype=np.int64)
+    pair_id[i, j] = np.arange(len(i))
+    rows = np.repeat(np.arange(n), 5 + len(_PAIRS))
+    cols = np.concatenate(
+        [t] + [C + pair_id[t[:, a], t[:, b]][:, None] for a, b in _PAIRS], axis=1
+    ).ravel()
+    return sp.csr_matrix((np.ones(len(cols)), (rows, cols)), shape=(n, C + len(i))), (i, j)
+
+
+def _random_teams(n, C, rng):
+    return np.argsort(rng.random((n, C)), axis=1)[:, :5]
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 구축
+# ─────────────────────────────────────────────────────────────────────
+@timed("synergy.build_synergy_matrix")
+def build_synergy_matrix(models, n_random: int = 50_000, n_stat: int = 3_000,
+                         ridge: float = 1.0, seed: int = SEED):
+    """
+    학습 데이터의 팀 + 무작위 팀에 대한 synergy_model 마진을 최소제곱(ridge)으로 맞춘다.
+    반환 dict (np.savez 로 그대로 저장 가능):
+      classes, pair(C+1×C+1 float32, 마지막 행/열은 모르는 챔피언용 0), bias,
+      stat_u, stat_bias, champ_p, fit_r2
+    """
+    synergy_model, champ_model, mlb, champ_profile, stat_model, scaler, feature_cols, vectorizer, df, champ_cols = models
+    classes = np.asarray(mlb.classes_).astype(str)
+    C = len(classes)
+    col_index = {c: i for i, c in enumerate(classes)}
+    rng = np.random.default_rng(seed)
+
+    # 학습 데이터 팀 (모르는 챔피언/중복이 있는 행 제외) + 무작위 팀
+    names = df[champ_cols].to_numpy()
+    idx = np.vectorize(lambda c: col_index.get(c, -1), otypes=[np.int64])(names)
+    ok = (idx >= 0).all(axis=1) & (np.sort(idx, axis=1)[:, 1:] != np.sort(idx, axis=1)[:, :-1]).all(axis=1)
+    teams = np.vstack([idx[ok], _random_teams(n_random, C, rng)])
+
+    margins = np.concatenate([
+        _synergy_margin(synergy_model, _onehot(teams[s:s + _CHUNK], C))
+        for s in range(0, len(teams), _CHUNK)
+    ])
+
+    # 훈련/검증 분할 후 ridge 회귀 (lsqr damp)
+    holdout = rng.random(len(teams)) < 0.1
+    A, (pi, pj) = _design(teams, C)
+    bias = float(margins[~holdout].mean())
+    coef = lsqr(A[~holdout], margins[~holdout] - bias, damp=np.sqrt(ridge), atol=1e-6, btol=1e-6)[0]
+    pred = A[holdout] @ coef + bias
+    resid = margins[holdout] - pred
+    r2 = 1.0 - resid.var() / max(margins[holdout].var(), 1e-12)
+
+    pair = np.zeros((C + 1, C + 1), dtype=np.float32)
+    pair[np.arange(C), np.arange(C)] = coef[:C]
+    pair[pi, pj] = coef[C:]
+    pair[pj, pi] = coef[C:]
+
+    # 스탯/태그 모델: 챔피언별 가산 근사 (정확한 배치 스코어러로 표본 채점)
+    sample = _random_teams(n_stat, C, rng)
+    _, _, p_stat, _ = get_team_winrate_batch(classes[sample].tolist(), models, parts=True)
+    S = _onehot(sample, C)
+    stat_bias = float(p_stat.mean())
+    stat_u = lsqr(sp.csr_matrix(S), p_stat - stat_bias, damp=np.sqrt(ridge))[0]
+
+    champ_p = _champ_probs(champ_model, champ_profile, col_index)
+    return {
+        "classes": classes,
+        "pair": pair,
+        "bias": np.float32(bias),
+        "stat_u": np.append(stat_u, 0.0).astype(np.float32),
+        "stat_bias": np.float32(stat_bias),
+        "champ_p": np.append(champ_p, 0.5).astype(np.float32),
+        "fit_r2": np.float32(r2),
+    }
+
+
+def save_synergy_matrix(sm, path):
+    np.savez_compressed(path, **{k: v for k, v in sm.items() if not k.startswith("_")})
+
+
+def load_synergy_matrix(path):
+    with np.load(path, allow_pickle=False) as z:
+        return {k: z[k] for k in z.files}
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 근사 채점
+# ─────────────────────────────────────────────────────────────────────
+def encode_teams(teams, sm):
+    """챔피언 이름 팀 목록 → (n,5) 인덱스. 모르는 챔피언은 C (기여 0 인 패딩 칸)."""
+    index = sm.get("_index")
+    if index is None:
+        index = sm["_index"] = {c: i for i, c in enumerate(sm["classes"].tolist())}
+    unknown = len(sm["classes"])
+    return np.array([[index.get(c, unknown) for c in t] for t in teams], dtype=np.int64).reshape(len(teams), 5)
+
+
+def _combine(margin, stat, champ_mean):
+    p_synergy = 1.0 / (1.0 + np.exp(-margin))
+    return blend(p_synergy, np.clip(stat, 0.0, 1.0), champ_mean).astype(np.float32)
+
+
+def approx_scores(team_idx, sm):
+    """(n,5) 인덱스 팀들의 근사 승률 (float32). 메모리는 청크 단위로 제한."""
+    W, u, cp = sm["pair"], sm["stat_u"], sm["champ_p"]
+    out = np.empty(len(team_idx), dtype=np.float32)
+    for s in range(0, len(team_idx), _CHUNK):
+        t = team_idx[s:s + _CHUNK]
+        margin = sm["bias"] + W[t, t].sum(axis=1)
+        for a, b in _PAIRS:
+            margin = margin + W[t[:, a], t[:, b]]
+        stat = sm["stat_bias"] + u[t].sum(axis=1)
+        out[s:s + _CHUNK] = _combine(margin, stat, cp[t].mean(axis=1))
+    return out
+
+
+def rerank_top(team_idx, sm, models, top_n: int = 50):
+    """
+    근사 점수로 상위 top_n 개를 고른 뒤 정확한 앙상블로 다시 채점.
+    모르는 챔피언(패딩 칸 C)이 든 조합은 이름을 되살릴 수 없으므로 정확 채점에서 뺀다.
+    반환: [(팀 이름 목록, 근사 승률, 정확한 승률)] 정확한 승률 내림차순
+    """
+    team_idx = team_idx[(team_idx < len(sm["classes"])).all(axis=1)]
+    if not len(team_idx):
+        return []
+    approx = approx_scores(team_idx, sm)
+    k = min(top_n, len(approx))
+    top = np.argpartition(-approx, k - 1)[:k] if k < len(approx) else np.arange(len(approx))
+    teams = sm["classes"][team_idx[top]].tolist()
+    exact = get_team_winrate_batch(teams, models)
+    order = np.argsort(-exact)
+    return [(teams[i], float(approx[top[i]]), float(exact[i])) for i in order]
+
+
+def multi_swap_teams(team, sm, n_swap: int = 2, candidates=None):
+    """현재 팀에서 n_swap 명을 후보 챔피언으로 동시에 바꾼 모든 팀의 (m,5) 인덱스 배열."""
+    t = encode_teams([team], sm)[0]
+    cand_names = list(candidates) if candidates is not None else sm["classes"].tolist()
+    c = encode_teams([[x] * 5 for x in cand_names], sm)[:, 0] if cand_names else np.zeros(0, dtype=np.int64)
+    c = c[~np.isin(c, t) & (c < len(sm["classes"]))]
+    if len(c) < n_swap:
+        return np.zeros((0, 5), dtype=np.int64)
+    picks = np.array(list(combinations(range(len(c)), n_swap)), dtype=np.int64)
+    blocks = []
+    for slots in combinations(range(5), n_swap):
+        block = np.repeat(t[None, :], len(picks), axis=0)
+        block[:, list(slots)] = c[picks]
+        blocks.append(block)
+    return np.vstack(blocks)
+
+
+def slot_heatmap(team, sm, candidates=None):
+    """
+    현재 팀의 각 슬롯(5)을 각 후보 챔피언으로 바꿨을 때의 근사 승률 행렬 (5 × N).
+    candidates 생략 시 전체 챔피언. 이미 팀에 있는 챔피언 칸은 NaN.
+    반환: (matrix, candidate_names)
+    """
+    W, u, cp = sm["pair"], sm["stat_u"], sm["champ_p"]
+    t = encode_teams([team], sm)[0]
+    cand_names = list(candidates) if candidates is not None else sm["classes"].tolist()
+    c = encode_teams([[x] * 5 for x in cand_names], sm)[:, 0] if cand_names else np.zeros(0, dtype=np.int64)
+
+    out = np.empty((5, len(c)), dtype=np.float32)
+    for s in range(5):
+        rest = np.delete(t, s)
+        base = sm["bias"] + W[rest, rest].sum() + sum(W[rest[a], rest[b]] for a, b in combinations(range(4), 2))
+        margin = base + W[c, c] + W[np.ix_(c, rest)].sum(axis=1)
+        stat = sm["stat_bias"] + u[rest].sum() + u[c]
+        champ_mean = (cp[rest].sum() + cp[c]) / 5.0
+        out[s] = _combine(margin, stat, champ_mean)
+    out[:, np.isin(c, t) & (c < len(sm["classes"]))] = np.nan
+    return out, cand_names
@@ -0,0 +1,247 @@
+# team_cache.py — 세션과 무관한 팀 승률 결과 캐시 (프로세스 LRU + 선택적 sqlite 디스크 계층)
+"""
+get_team_winrate 는 팀 구성(순서 무관)과 모델 번들만으로 값이 정해지므로
+  키 = (모델 버전 지문, 정렬한 5인 팀)
+으로 프로세스 전체에서 공유한다. Streamlit 은 모든 사용자 세션을 한 프로세스에서 돌리므로
+같은 인기 조합은 사용자가 달라도 딕셔너리 조회로 끝난다.
+
+  from team_cache import cached_team_winrate, cached_team_winrate_batch, get_cache
+  wr = cached_team_winrate(team, models)
+  get_cache().stats()   # hits / misses / disk_hits / size ...
+
+환경변수:
+  ARAM_CACHE_SIZE  메모리 LRU 최대 항목 수 (기본 100000)
+  ARAM_CACHE_PATH  sqlite 파일 경로 (지정 시 재시작 후에도 유지되는 디스크 계층 사용)
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from ml import get_team_winrate, get_team_winrate_batch
+from profiling import timed
+
+_SEP = "\x1f"  # 챔피언 이름에 나오지 않는 구분자
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 모델 버전 지문
+# ─────────────────────────────────────────────────────────────────────
+_VERSIONS = OrderedDict()  # id(models) → (models, 지문), 최근 사용 순
+_VERSIONS_LOCK = threading.Lock()
+_MAX_VERSIONS = 4  # 세션마다 다른 번들 (예: update_models 전후) 을 들고 있어도 서로 밀어내지 않도록
+
+
+def _model_bytes(model):
+    booster = getattr(model, "get_booster", None)
+    if booster is not None:
+        try:
+            return bytes(booster().save_raw("ubj"))
+        except Exception:
+            pass
+    return pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def model_version(models) -> str:
+    """모델 번들 내용 기반 지문 (재시작해도 같은 번들이면 같은 값). 튜플 객체별로 한 번만 계산 (최근 번들 몇 개 보관)."""
+    with _VERSIONS_LOCK:
+        cached = _VERSIONS.get(id(models))
+        if cached is not None and cached[0] is models:
+            _VERSIONS.move_to_end(id(models))
+            return cached[1]
+
+    synergy_model, champ_model, mlb, champ_profile, stat_model, scaler, feature_cols, vectorizer, df, champ_cols = models
+    h = hashlib.sha1()
+    for m in (synergy_model, champ_model, stat_model):
+        h.update(_model_bytes(m))
+    h.update(_SEP.join(map(str, mlb.classes_)).encode("utf-8"))
+    h.update(np.asarray(scaler.mean_, dtype=np.float64).tobytes())
+    h.update(np.asarray(scaler.scale_, dtype=np.float64).tobytes())
+    h.update(_SEP.join(feature_cols).encode("utf-8"))
+    h.update(_SEP.join(vectorizer.get_feature_names_out()).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(champ_profile, index=False).to_numpy().tobytes())
+    lvl_cols = [c for c in feature_cols if not c.startswith("tag_")]
+    h.update(pd.util.hash_pandas_object(df[list(champ_cols) + lvl_cols], index=False).to_numpy().tobytes())
+    version = h.hexdigest()[:16]
+
+    with _VERSIONS_LOCK:
+        _VERSIONS[id(models)] = (models, version)
+        _VERSIONS.move_to_end(id(models))
+        while len(_VERSIONS) > _MAX_VERSIONS:
+            _VERSIONS.popitem(last=False)
+    return version
+
+
+def team_key(team) -> str:
+    """순서 무관 정규화 키."""
+    return _SEP.join(sorted(map(str, team)))
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 캐시
+# ─────────────────────────────────────────────────────────────────────
+class TeamWinrateCache:
+    """스레드 안전 LRU (+ 선택적 sqlite 디스크 계층)."""
+
+    def __init__(self, max_size: int = 100_000, path: str | None = None):
+        self.max_size = int(max_size)
+        self.path = path
+        self._lock = threading.Lock()
+        self._mem = OrderedDict()
+        self._db = None
+        self._counts = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS winrate ("
+                " version TEXT NOT NULL, team TEXT NOT NULL, value REAL NOT NULL, created REAL NOT NULL,"
+                " PRIMARY KEY (version, team))"
+            )
+
+    def _put_mem(self, key, value):
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_size:
+            self._mem.popitem(last=False)
+            self._counts["evictions"] += 1
+
+    def get_many(self, version, keys):
+        """{key: value} — 메모리 → 디스크 순서로 조회해 찾은 것만 반환."""
+        found, missing = {}, []
+        with self._lock:
+            for k in keys:
+                v = self._mem.get((version, k))
+                if v is None:
+                    missing.append(k)
+                else:
+                    self._mem.move_to_end((version, k))
+                    found[k] = v
+            self._counts["hits"] += len(found)
+            if missing and self._db is not None:
+                for start in range(0, len(missing), 500):
+                    part = missing[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT team, value FROM winrate WHERE version = ? AND team IN ({','.join('?' * len(part))})",
+                        [version, *part],
+                    ).fetchall()
+                    for k, v in rows:
+                        found[k] = v
+                        self._put_mem((version, k), v)
+                    self._counts["disk_hits"] += len(rows)
+            self._counts["misses"] += len(keys) - len(found)
+        return found
+
+    def put_many(self, version, items):
+        items = [(k, float(v)) for k, v in items]
+        with self._lock:
+            for k, v in items:
+                self._put_mem((version, k), v)
+            if self._db is not None and items:
+                now = time.time()
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO winrate (version, team, value, created) VALUES (?, ?, ?, ?)",
+                    [(version, k, v, now) for k, v in items],
+                )
+
+    def clear(self, disk: bool = False):
+        with self._lock:
+            self._mem.clear()
+            for k in self._counts:
+                self._counts[k] = 0
+            if disk and self._db is not None:
+                self._db.execute("DELETE FROM winrate")
+
+    def stats(self):
+        with self._lock:
+            c = dict(self._counts)
+            size = len(self._mem)
+        lookups = c["hits"] + c["disk_hits"] + c["misses"]
+        return {
+            **c,
+            "lookups": lookups,
+            "hit_rate": round((c["hits"] + c["disk_hits"]) / lookups, 4) if lookups else 0.0,
+            "size": size,
+            "max_size": self.max_size,
+            "disk_path": self.path,
+        }
+
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_cache() -> TeamWinrateCache:
+    """프로세스 전역 캐시 (환경변수로 크기/디스크 경로 설정)."""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = TeamWinrateCache(
+                max_size=int(os.environ.get("ARAM_CACHE_SIZE", 100_000)),
+                path=os.environ.get("ARAM_CACHE_PATH") or None,
+            )
+        return _CACHE
+
+
+def configure_cache(max_size: int = 100_000, path: str | None = None) -> TeamWinrateCache:
+    """전역 캐시를 새 설정으로 교체."""
+    global _CACHE
+    with _CACHE_LOCK:
+        _CACHE = TeamWinrateCache(max_size=max_size, path=path)
+        return _CACHE
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 캐시 경유 스코어링
+# ─────────────────────────────────────────────────────────────────────
+@timed("team_cache.cached_team_winrate")
+def cached_team_winrate(team, models, cache=None):
+    cache = cache or get_cache()
+    version, key = model_version(models), team_key(team)
+    hit = cache.get_many(version, [key])
+    if key in hit:
+        return hit[key]
+    value = float(get_team_winrate(list(team), models))
+    cache.put_many(version, [(key, value)])
+    return value
+
+
+@timed("team_cache.cached_team_winrate_batch")
+def cached_team_winrate_batch(teams, models, cache=None):
+    """캐시에 없는 팀만 get_team_winrate_batch 로 계산. 반환 np.ndarray (len(teams),)"""
+    cache = cache or get_cache()
+    version = model_version(models)
+    keys = [team_key(t) for t in teams]
+    found = cache.get_many(version, list(dict.fromkeys(keys)))
+    todo = list(dict.fromkeys(k for k in keys if k not in found))
+    if todo:
+        values = get_team_winrate_batch([k.split(_SEP) for k in todo], models)
+        cache.put_many(version, zip(todo, values))
+        found.update(zip(todo, map(float, values)))
+    return np.array([found[k] for k in keys])
+
+
+def render_cache_panel(container=None):
+    """Streamlit 사이드바에 캐시 적중/실패 지표."""
+    import streamlit as st
+
+    box = container if container is not None else st.sidebar
+    with box.expander("🗃️ 승률 캐시", expanded=False):
+        s = get_cache().stats()
+        c1, c2, c3 = st.columns(3)
+        c1.metric("적중률", f"{s['hit_rate'] * 100:.1f}%")
+        c2.metric("적중", f"{s['hits'] + s['disk_hits']:,}")
+        c3.metric("계산", f"{s['misses']:,}")
+        st.caption(f"메모리 {s['size']:,}/{s['max_size']:,} · 디스크 적중 {s['disk_hits']:,} · "
+                   f"퇴출 {s['evictions']:,} · 디스크 {s['disk_path'] or '사용 안 함'}")
+        if st.button("캐시 비우기", key="team_cache_clear"):
+            get_cache().clear()
@@ -0,0 +1,431 @@
+# tree_eval.py — XGBoost 앙상블을 평탄한 노드 배열로 내보내고 NumPy 로만 평가
+"""
+get_team_winrate 한 번에 XGBoost 예측이 3번 필요한데, 트리는 작고(깊이 4~5, 150~200개)
+DMatrix 생성 비용이 실제 계산보다 크다. 여기서는 학습된 부스터를 노드 배열로 바꾸고
+모든 트리를 한꺼번에 (행 × 트리) 인덱스 배열로 내려가며 평가한다.
+
+  compile_models(models)  → synergy/champ/stat 모델을 CompiledTrees 로 바꾼 models 튜플
+  save_compiled / load_compiled → joblib 번들 (서빙 시 xgboost import 불필요)
+
+CompiledTrees 는 predict_proba / predict 를 제공하므로 ml.get_team_winrate 등에 그대로 쓸 수 있다.
+LightGBM 모델도 from_lightgbm 으로 같은 형식이 된다 (build_compact.py 의 가지치기 빌드 모델).
+깊은 트리는 원-핫 같은 희소 입력이면 비트벡터 표 (_sparse_plan), 아니면 남은 (행, 트리) 쌍만 순회한다.
+"""
+from __future__ import annotations
+
+import json
+
+import joblib
+import numpy as np
+
+_CHUNK_ROWS = 2_048
+_MAX_PERFECT_DEPTH = 10  # 이 깊이 이하면 완전 이진트리 배치로 펼쳐 리프 판정 없이 내려간다
+_MAX_SPARSE_TABLE_BYTES = 64 << 20  # 희소 평가 (특징 구간 × 트리) 마스크 표 상한
+
+
+class CompiledTrees:
+    """
+    이진 분류 트리 앙상블의 배열 표현.
+      feature/threshold/left/right/default_left/value: 전체 트리의 노드를 이어 붙인 배열
+      roots: 트리별 루트 노드 인덱스, left == -1 이면 리프
+      op: "lt" (x < thr 이면 왼쪽, XGBoost) 또는 "le" (x <= thr, LightGBM)
+      zero_missing: 노드별로 0 을 결측으로 취급할지 (LightGBM missing_type=Zero)
+      feature_names: 입력 컬럼 이름 (주면 feature_names_in_ 으로, sklearn 모델처럼 컬럼 순서를 알려 준다)
+    """
+
+    def __init__(self, feature, threshold, left, right, default_left, value, roots,
+                 base_margin: float = 0.0, op: str = "lt", zero_missing=None, n_features: int | None = None,
+                 feature_names=None):
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.value = np.asarray(value, dtype=np.float32)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.base_margin = float(base_margin)
+        self.op = op
+        self.zero_missing = None if zero_missing is None else np.asarray(zero_missing, dtype=bool)
+        self.is_leaf = self.left < 0
+        # 리프의 feature 는 0 으로 두어 gather 시 인덱스 오류가 없도록
+        self.feature[self.is_leaf] = 0
+        self.n_features_in_ = int(n_features if n_features is not None else self.feature.max() + 1)
+        self.max_depth = _max_depth(self.left, self.right, self.roots)
+        self.classes_ = np.array([0, 1])
+        if feature_names is not None:
+            self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        self._perfect = self._build_perfect() if self.max_depth <= _MAX_PERFECT_DEPTH else None
+
+    def __getstate__(self):
+        # 희소 평가 계획은 첫 사용 때 다시 만든다 (번들 크기/로드 시간에 넣지 않음)
+        state = dict(self.__dict__)
+        state.pop("_sparse", None)
+        return state
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def _build_perfect(self):
+        """
+        모든 트리를 깊이 D 의 완전 이진트리(힙 순서)로 펼친다.
+        얕은 리프 아래는 thr=+inf, default_left 인 더미 분기로 채워 항상 왼쪽으로 내려가게 하고,
+        리프 값은 최종 깊이의 해당 구간 전체에 복제한다.
+        """
+        D, T = self.max_depth, self.n_trees
+        n_inner, n_leaf = 2 ** D - 1, 2 ** D
+        feat = np.zeros((T, max(n_inner, 1)), dtype=np.int32)
+        thr = np.full((T, max(n_inner, 1)), np.inf, dtype=np.float32)
+        dleft = np.ones((T, max(n_inner, 1)), dtype=bool)
+        zmiss = np.zeros((T, max(n_inner, 1)), dtype=bool)
+        val = np.zeros((T, n_leaf), dtype=np.float32)
+        for t, root in enumerate(self.roots):
+            stack = [(int(root), 0, 0)]  # (노드, 깊이, 해당 깊이에서의 위치)
+            while stack:
+                node, d, pos = stack.pop()
+                if self.is_leaf[node]:
+                    span = 2 ** (D - d)
+                    val[t, pos * span:(pos + 1) * span] = self.value[node]
+                    continue
+                h = 2 ** d - 1 + pos
+                feat[t, h] = self.feature[node]
+                thr[t, h] = self.threshold[node]
+                dleft[t, h] = self.default_left[node]
+                if self.zero_missing is not None:
+                    zmiss[t, h] = self.zero_missing[node]
+                stack.append((int(self.left[node]), d + 1, 2 * pos))
+                stack.append((int(self.right[node]), d + 1, 2 * pos + 1))
+        return {
+            "feat": feat.ravel(), "thr": thr.ravel(), "dleft": dleft.ravel(),
+            "zmiss": zmiss.ravel() if zmiss.any() else None,
+            "val": val.ravel(),
+            "inner_off": (np.arange(T) * max(n_inner, 1)).astype(np.int32),
+            "leaf_off": (np.arange(T) * n_leaf).astype(np.int32),
+        }
+
+    # ── 평가 ───────────────────────────────────────────────────────────
+    def _leaves_perfect(self, X):
+        P, D = self._perfect, self.max_depth
+        i = np.zeros((X.shape[0], self.n_trees), dtype=np.int32)
+        has_nan = np.isnan(X).any()
+        for _ in range(D):
+            flat = P["inner_off"] + i
+            x = np.take_along_axis(X, P["feat"][flat], axis=1)
+            thr = P["thr"][flat]
+            go_right = x >= thr if self.op == "lt" else x > thr
+            if has_nan or P["zmiss"] is not None:
+                missing = np.isnan(x)
+                if P["zmiss"] is not None:
+                    missing |= P["zmiss"][flat] & (x == 0)
+                if missing.any():
+                    go_right[missing] = ~P["dleft"][flat[missing]]
+            i = 2 * i + 1 + go_right
+        leaf = i - (2 ** D - 1)
+        return P["val"][P["leaf_off"] + leaf]
+
+    def _leaves_active(self, X):
+        """일반 경로: 아직 리프에 닿지 않은 (행, 트리) 쌍만 모아 한 단계씩 내려간다."""
+        R, T = X.shape[0], self.n_trees
+        node = np.tile(self.roots, R)
+        row = np.repeat(np.arange(R, dtype=np.int32), T)
+        idx = np.flatnonzero(~self.is_leaf[node])
+        while idx.size:
+            n = node[idx]
+            x = X[row[idx], self.feature[n]]
+            go_left = x < self.threshold[n] if self.op == "lt" else x <= self.threshold[n]
+            missing = np.isnan(x)
+            if self.zero_missing is not None:
+                missing |= self.zero_missing[n] & (x == 0)
+            if missing.any():
+                go_left[missing] = self.default_left[n[missing]]
+            nxt = np.where(go_left, self.left[n], self.right[n])
+            node[idx] = nxt
+            idx = idx[~self.is_leaf[nxt]]
+        return self.value[node].reshape(R, T)
+
+    def _sparse_plan(self):
+        """
+        희소 입력용 비트벡터 평가 계획 (QuickScorer 방식). 조건이 안 맞으면 None.
+          - 트리마다 리프를 왼→오 순서로 번호 매기고 (최대 64개), 분기 노드마다
+            "오른쪽으로 가면 못 가는 리프" (= 왼쪽 서브트리 리프) 를 지운 64비트 마스크를 둔다.
+          - 0 은 모든 분기에서 왼쪽으로 가야 한다 (thr >= 0, zero 결측이면 default_left).
+            그러면 오른쪽 분기는 0 이 아닌 특징에서만 생기므로, 행의 nonzero 만 보고
+            해당 노드 마스크를 AND 한 뒤 가장 낮은 비트가 도착 리프가 된다.
+          - (특징, 임계값 구간) 마다 그 구간 값이 오른쪽으로 보내는 노드 마스크를 트리별로 미리 AND 해 둔
+            표 (구간 수 × 트리) 를 만든다. 행 평가는 nonzero 마다 표 한 줄을 AND 하는 것으로 끝난다.
+        트리 순회와 결과가 비트 단위로 같다. 깊은 트리 (가지치기한 빌드 모델) 에서 쓴다.
+        """
+        if "_sparse" in self.__dict__:
+            return self._sparse
+        self._sparse = None
+        inner = np.flatnonzero(~self.is_leaf)
+        thr = self.threshold[inner]
+        zero_left = thr >= 0 if self.op == "le" else thr > 0
+        if self.zero_missing is not None:
+            zero_left = np.where(self.zero_missing[inner], self.default_left[inner], zero_left)
+        if not zero_left.all():
+            return None
+
+        T = self.n_trees
+        tree = np.zeros(self.feature.size, dtype=np.int64)
+        rank = np.zeros(self.feature.size, dtype=np.int64)
+        mask = np.zeros(self.feature.size, dtype=np.uint64)
+        n_leaves = np.zeros(T, dtype=np.int64)
+        full = (1 << 64) - 1
+
+        def walk(node, t, first):
+            # 반환: 이 서브트리 다음 리프 번호
+            tree[node] = t
+            if self.is_leaf[node]:
+                rank[node] = first
+                return first + 1
+            mid = walk(int(self.left[node]), t, first)
+            mask[node] = ~(((1 << (mid - first)) - 1) << first) & full
+            return walk(int(self.right[node]), t, mid)
+
+        for t, root in enumerate(self.roots):
+            n_leaves[t] = walk(int(root), t, 0)
+            if n_leaves[t] > 64:
+                return None
+
+        # 구간 = 특징별 서로 다른 임계값 (특징, 임계값 순). 구간 j 는 "임계값 <= 구간 j 의 임계값" 인 노드 전부
+        # 마지막 줄은 전부 1 (영향 없는 nonzero / 빈 칸 채우기용)
+        keys, bucket = np.unique(np.rec.fromarrays([self.feature[inner], thr]), return_inverse=True)
+        if (keys.size + 1) * T * 8 > _MAX_SPARSE_TABLE_BYTES:
+            return None
+        ufeat = keys.f0.astype(np.int32)
+        fstart = np.searchsorted(ufeat, np.arange(self.n_features_in_ + 1))
+        table = np.full((keys.size + 1, T), np.uint64(full))
+        np.bitwise_and.at(table, (bucket.ravel(), tree[inner]), mask[inner])
+        for f in np.flatnonzero(np.diff(fstart)):
+            np.bitwise_and.accumulate(table[fstart[f]:fstart[f + 1]], axis=0, out=table[fstart[f]:fstart[f + 1]])
+
+        leaf_off = np.concatenate([[0], np.cumsum(n_leaves)[:-1]])
+        leaves = np.flatnonzero(self.is_leaf)
+        val = np.zeros(int(n_leaves.sum()), dtype=np.float32)
+        val[leaf_off[tree[leaves]] + rank[leaves]] = self.value[leaves]
+        self._sparse = {"feat": ufeat, "thr": keys.f1.astype(np.float32), "fstart": fstart, "table": table,
+                        "val": val, "leaf_off": leaf_off}
+        return self._sparse
+
+    def _leaves_sparse(self, S, X, r, f):
+        R = X.shape[0]
+        v = X[r, f]
+        # nonzero (특징 f, 값 v) 마다 구간 번호 = 그 특징에서 "값이 오른쪽으로 가는" 마지막 임계값.
+        # 임계값과 값을 한 번에 정렬해 센다. le: thr < v 면 오른쪽 (같으면 값이 먼저), lt: thr <= v (같으면 임계값이 먼저)
+        n = S["thr"].size
+        thr_first = self.op == "lt"
+        kind = np.concatenate([np.full(n, 0 if thr_first else 1, np.int8),
+                               np.full(v.size, 1 if thr_first else 0, np.int8)])
+        order = np.lexsort((kind, np.concatenate([S["thr"], v]), np.concatenate([S["feat"], f])))
+        is_thr = order < n
+        before = np.cumsum(is_thr) - is_thr
+        qpos = np.flatnonzero(~is_thr)
+        q = order[qpos] - n
+        bucket = np.empty(v.size, dtype=np.int64)
+        bucket[q] = before[qpos] - 1
+        bucket[bucket < S["fstart"][f]] = n  # 오른쪽으로 가는 분기가 하나도 없으면 전부 1 인 줄
+
+        # np.nonzero 는 행 순서: (행 × 행당 nonzero 최대) 구간 번호 표로 펼쳐 열마다 AND
+        # (nonzero 가 없는 행은 전부 1 = 가장 왼쪽 리프)
+        counts = np.bincount(r, minlength=R)
+        B = np.full((R, max(int(counts.max(initial=0)), 1)), n, dtype=np.int64)
+        B[r, np.arange(r.size) - np.repeat(np.cumsum(counts) - counts, counts)] = bucket
+        bits = S["table"][B[:, 0]]
+        for k in range(1, B.shape[1]):
+            bits &= S["table"][B[:, k]]
+        # 가장 낮은 비트 = 도착 리프 (2 의 거듭제곱은 float64 로 정확)
+        low = bits & (~bits + np.uint64(1))
+        leaf = np.frexp(low.astype(np.float64))[1] - 1
+        return S["val"][S["leaf_off"] + leaf]
+
+    def _leaves_chunk(self, X):
+        """(행 × 트리) 리프 값."""
+        if self._perfect is not None:
+            return self._leaves_perfect(X)
+        S = self._sparse_plan()
+        if S is not None and not np.isnan(X).any():
+            r, f = np.nonzero(X)
+            # nonzero 하나가 표 한 줄 (트리 수) 이므로, 행당 nonzero 가 깊이보다 많은 밀집 입력은 순회가 낫다
+            if r.size <= X.shape[0] * self.max_depth:
+                return self._leaves_sparse(S, X, r, f)
+        return self._leaves_active(X)
+
+    def _margin_chunk(self, X):
+        return self._leaves_chunk(X).sum(axis=1, dtype=np.float64) + self.base_margin
+
+    def leaf_values(self, X):
+        """(행 × 트리) 트리별 기여 (마진 = 행 합 + base_margin). 트리 가지치기/중요도 분석용."""
+        X = _as_float32(X)
+        return np.concatenate([self._leaves_chunk(X[i:i + _CHUNK_ROWS])
+                               for i in range(0, max(X.shape[0], 1), _CHUNK_ROWS)])
+
+    def decision_function(self, X):
+        """원시 마진(logit) 값."""
+        X = _as_float32(X)
+        if X.shape[0] <= _CHUNK_ROWS:
+            return self._margin_chunk(X)
+        return np.concatenate([self._margin_chunk(X[i:i + _CHUNK_ROWS])
+                               for i in range(0, X.shape[0], _CHUNK_ROWS)])
+
+    def predict_proba(self, X):
+        p = 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(int)
+
+    # ── 생성 ───────────────────────────────────────────────────────────
+    @classmethod
+    def from_xgboost(cls, model):
+        """XGBClassifier 또는 Booster(binary:logistic) → CompiledTrees."""
+        booster = model.get_booster() if hasattr(model, "get_booster") else model
+        learner = json.loads(booster.save_raw("json"))["learner"]
+        objective = learner["objective"]["name"]
+        if objective != "binary:logistic":
+            raise ValueError(f"지원하지 않는 objective: {objective}")
+
+        trees = learner["gradient_booster"]["model"]["trees"]
+        feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+        offset = 0
+        for t in trees:
+            lc = np.asarray(t["left_children"], dtype=np.int64)
+            rc = np.asarray(t["right_children"], dtype=np.int64)
+            leaf = lc < 0
+            roots.append(offset)
+            feature.append(np.asarray(t["split_indices"]))
+            cond = np.asarray(t["split_conditions"], dtype=np.float32)
+            threshold.append(cond)
+            left.append(np.where(leaf, -1, lc + offset))
+            right.append(np.where(leaf, -1, rc + offset))
+            default_left.append(np.asarray(t["default_left"], dtype=bool))
+            value.append(np.where(leaf, cond, 0.0))  # 리프 값은 split_conditions 에 저장됨
+            offset += len(lc)
+
+        base_score = float(learner["learner_model_param"]["base_score"])
+        return cls(
+            np.concatenate(feature), np.concatenate(threshold),
+            np.concatenate(left), np.concatenate(right),
+            np.concatenate(default_left), np.concatenate(value), roots,
+            base_margin=float(np.log(base_score / (1.0 - base_score))),
+            op="lt",
+            n_features=int(learner["learner_model_param"]["num_feature"]),
+        )
+
+
+    @classmethod
+    def from_lightgbm(cls, model):
+        """LGBMClassifier 또는 Booster(binary, 수치 분기) → CompiledTrees (x <= thr 이면 왼쪽)."""
+        booster = model.booster_ if hasattr(model, "booster_") else model
+        dump = booster.dump_model()
+        if not str(dump.get("objective", "")).startswith("binary") or dump.get("num_class", 1) != 1:
+            raise ValueError(f"지원하지 않는 objective: {dump.get('objective')}")
+        return cls.from_lightgbm_trees([t["tree_structure"] for t in dump["tree_info"]],
+                                       n_features=dump["max_feature_idx"] + 1,
+                                       feature_names=dump.get("feature_names"))
+
+    @classmethod
+    def from_lightgbm_trees(cls, trees, n_features: int, feature_names=None, base_margin: float = 0.0):
+        """LightGBM dump_model 의 tree_structure 목록 → CompiledTrees. 노드는 트리별 전위 순서."""
+        feature, threshold, left, right, default_left, value, zero_missing, roots = [], [], [], [], [], [], [], []
+
+        def add(node):
+            i = len(feature)
+            feature.append(node.get("split_feature", 0))
+            threshold.append(node.get("threshold", 0.0))
+            value.append(node.get("leaf_value", 0.0))
+            left.append(-1)
+            right.append(-1)
+            if "split_feature" not in node:
+                default_left.append(True)
+                zero_missing.append(False)
+                return i
+            if node.get("decision_type", "<=") != "<=":
+                raise ValueError("범주형 분기는 지원하지 않습니다.")
+            missing = node.get("missing_type", "None")
+            # missing_type=None 이면 LightGBM 은 NaN 을 0 으로 본다 → 0 이 가는 쪽을 기본 방향으로
+            default_left.append(bool(node.get("default_left", True)) if missing != "None" else 0.0 <= node["threshold"])
+            zero_missing.append(missing == "Zero")
+            left[i] = add(node["left_child"])
+            right[i] = add(node["right_child"])
+            return i
+
+        for t in trees:
+            roots.append(add(t))
+        return cls(feature, threshold, left, right, default_left, value, roots,
+                   base_margin=base_margin, op="le",
+                   zero_missing=zero_missing if any(zero_missing) else None,
+                   n_features=n_features, feature_names=feature_names)
+
+
+def _as_float32(X):
+    if hasattr(X, "to_numpy"):
+        X = X.to_numpy(dtype=np.float32)
+    X = np.asarray(X, dtype=np.float32)
+    return X.reshape(1, -1) if X.ndim == 1 else X
+
+
+def _max_depth(left, right, roots):
+    depth, frontier = 0, np.asarray(roots)
+    while True:
+        frontier = frontier[left[frontier] >= 0]
+        if frontier.size == 0:
+            return depth
+        frontier = np.concatenate([left[frontier], right[frontier]])
+        depth += 1
+
+
+# ─────────────────────────────────────────────────────────────────────
+# models 튜플 변환 / 저장
+# ─────────────────────────────────────────────────────────────────────
+def compile_models(models):
+    """train_models 결과 튜플의 XGBoost 3종을 CompiledTrees 로 교체한 새 튜플."""
+    synergy_model, champ_model, mlb, champ_profile, stat_model, scaler, feature_cols, vectorizer, df, champ_cols = models
+    return (
+        _compile(synergy_model), _compile(champ_model), mlb, champ_profile,
+        _compile(stat_model), scaler, feature_cols, vectorizer, df, champ_cols,
+    )
+
+
+def _compile(model):
+    return model if isinstance(model, CompiledTrees) else CompiledTrees.from_xgboost(model)
+
+
+def check_compiled(models, compiled, X_by_model=None, atol: float = 1e-5):
+    """
+    원본과 컴파일 모델의 확률 최대 오차를 {"synergy": .., "champ": .., "stat": ..} 로 반환.
+    X_by_model 이 없으면 synergy 는 0/1, 나머지는 표준정규 난수 행렬로 비교한다.
+    """
+    names = {"synergy": 0, "champ": 1, "stat": 4}
+    rng = np.random.default_rng(0)
+    report = {}
+    for name, i in names.items():
+        X = (X_by_model or {}).get(name)
+        if X is None:
+            shape = (256, compiled[i].n_features_in_)
+            X = rng.integers(0, 2, size=shape) if name == "synergy" else rng.standard_normal(shape)
+            X = X.astype(np.float32)
+        a = models[i].predict_proba(X)[:, 1]
+        b = compiled[i].predict_proba(X)[:, 1]
+        report[name] = float(np.abs(a - b).max())
+    report["ok"] = all(v <= atol for k, v in report.items())
+    return report
+
+
+def save_compiled(models, path):
+    joblib.dump(compile_models(models), path)
+
+
+def load_compiled(path):
+    return joblib.load(path)
+
+
+if __name__ == "__main__":
+    # python tree_eval.py models.joblib compiled.joblib  → 변환 + 오차 확인
+    import sys
+    src, dst = sys.argv[1], sys.argv[2]
+    models = joblib.load(src)
+    compiled = compile_models(models)
+    print(check_compiled(models, compiled))
+    joblib.dump(compiled, dst)
+    print(f"저장: {dst}")
@@ -0,0 +1,358 @@
+# tune.py — 앙상블 세 모델 하이퍼파라미터 탐색 (프로세스 풀 · successive halving · 조기 종료) + 가중합 가중치 탐색
+"""
+synergy / champ / stat XGBoost 모델의 설정을 병렬로 탐색하고, get_team_winrate 의 가중합
+가중치(BLEND_WEIGHTS)도 함께 고른다. 결과(시도별 설정·점수·소요 시간, 모델별 최적 설정)는 JSON 으로 남긴다.
+
+예)
+  python -m tune --csv renamed_data.csv --workers 4 --out tune_results.json
+  python -m tune --csv renamed_data.csv --search random --configs 20 --models stat
+
+  models = train_models(df, params=tune.load_best("tune_results.json"))
+  get_team_winrate(team, models, weights=tune.load_blend_weights("tune_results.json"))
+
+절차:
+  1) 매치 행을 train_models 와 같은 분할로 학습 80% / 평가 20% 로 나누고, 학습 80% 를 다시 fit / val 로 나눈다.
+  2) 모델별로 무작위 설정 n 개. successive halving 이면 fit 행 일부로 학습해 val logloss 상위 1/eta 만
+     다음 단계(행 eta 배)로 올리고, 마지막 단계는 fit 전체. 모든 시도는 tree_method="hist" 에
+     val logloss 조기 종료라 트리 수는 최대값까지 가지 않는다.
+  3) 모델별 최적 설정은 트리 수를 best_iteration 으로 고정해 다시 학습하고,
+     기본값(ml.MODEL_PARAMS) 과 평가 20% 에서 정확도 · logloss · 모델 크기 · 예측 시간을 비교한다.
+  4) 가중치: 학습 80% 로 최적 설정 train_models → 평가 20% 팀의 (p_synergy, p_stat, p_champ) 를
+     get_team_winrate_batch(parts=True) 로 구해, 합이 1 인 격자에서 절반으로 고르고 나머지 절반으로 보고한다.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from sklearn.metrics import accuracy_score, log_loss
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from ml import (
+    BLEND_WEIGHTS, CHAMP_FEATURE_COLS, MODEL_PARAMS, SEED,
+    _build_champ_long, get_team_winrate_batch, make_classifier, prepare_training_data,
+    read_csv_safe, split_rows, train_models,
+)
+
+KINDS = tuple(MODEL_PARAMS)
+
+# 탐색 공간: 리스트 = 그중 하나, (lo, hi) = 균등, (lo, hi, "log") = 로그 균등
+SPACE = {
+    "max_depth": [3, 4, 5, 6, 8],
+    "learning_rate": (0.02, 0.3, "log"),
+    "min_child_weight": [1, 2, 5, 10],
+    "subsample": (0.6, 1.0),
+    "colsample_bytree": (0.5, 1.0),
+    "reg_lambda": (0.1, 10.0, "log"),
+    "max_bin": [64, 128, 256],
+}
+
+
+def sample_config(rng, space=SPACE):
+    out = {}
+    for name, spec in space.items():
+        if isinstance(spec, list):
+            v = spec[int(rng.integers(len(spec)))]
+        elif len(spec) == 3 and spec[2] == "log":
+            v = float(math.exp(rng.uniform(math.log(spec[0]), math.log(spec[1]))))
+        else:
+            v = float(rng.uniform(spec[0], spec[1]))
+        out[name] = round(v, 4) if isinstance(v, float) else v
+    return out
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 데이터
+# ─────────────────────────────────────────────────────────────────────
+def build_splits(df, val_size: float = 0.2, seed: int = SEED):
+    """
+    모델별 (X_fit, y_fit, X_val, y_val, X_test, y_test) float32 배열과 행 번호.
+    평가 20% 는 train_models 와 같은 분할이고, val 은 그 나머지 학습 행에서 다시 뗀다.
+    """
+    data = prepare_training_data(df)
+    y = data["y"].astype(int).values
+    train_rows, test_rows = split_rows(data["y"])
+    fit_rows, val_rows = train_test_split(train_rows, test_size=val_size, random_state=seed, stratify=y[train_rows])
+    rows = {"train": train_rows, "fit": fit_rows, "val": val_rows, "test": test_rows}
+
+    def _take(X, r):
+        return np.ascontiguousarray(X[r], dtype=np.float32)
+
+    splits = {}
+    X = data["X_onehot"].values
+    splits["synergy"] = tuple(a for r in (fit_rows, val_rows, test_rows) for a in (_take(X, r), y[r]))
+
+    scaler = StandardScaler().fit(data["X_stat"].values[fit_rows])
+    X = scaler.transform(data["X_stat"].values)
+    splits["stat"] = tuple(a for r in (fit_rows, val_rows, test_rows) for a in (_take(X, r), y[r]))
+
+    # 챔피언 개별 모델: 매치 행 단위로 나눈 뒤 챔피언 행으로 펼친다 (같은 매치가 양쪽에 걸치지 않게)
+    parts = []
+    for r in (fit_rows, val_rows, test_rows):
+        long = _build_champ_long(df.iloc[r].reset_index(drop=True))
+        cols = [c for c in CHAMP_FEATURE_COLS if c in long.columns]
+        parts += [np.ascontiguousarray(long[cols].values, dtype=np.float32), long["win"].astype(int).values]
+    splits["champ"] = tuple(parts)
+    return splits, rows
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 워커
+# ─────────────────────────────────────────────────────────────────────
+_WORKER_SPLITS = None
+
+
+def _init_worker(splits):
+    global _WORKER_SPLITS
+    _WORKER_SPLITS = splits
+
+
+def run_trial(spec):
+    """
+    시도 하나: spec = {model, trial, rung, params, n_rows, max_estimators, early_stopping, n_jobs}
+    fit 행 앞 n_rows 개로 학습 (val logloss 조기 종료), 결과 dict 에 점수와 소요 시간을 더해 반환.
+    """
+    X, y, Xv, yv = _WORKER_SPLITS[spec["model"]][:4]
+    n = spec["n_rows"]
+    t0 = time.perf_counter()
+    model = make_classifier(spec["model"], spec["params"], n_estimators=spec["max_estimators"],
+                            early_stopping_rounds=spec["early_stopping"], n_jobs=spec["n_jobs"])
+    model.fit(X[:n], y[:n], eval_set=[(Xv, yv)], verbose=False)
+    wall = time.perf_counter() - t0
+    p = model.predict_proba(Xv)[:, 1]  # 조기 종료한 모델은 best_iteration 까지만 쓴다
+    return {**spec, "best_iteration": int(model.best_iteration), "val_logloss": float(log_loss(yv, p)),
+            "val_acc": float(accuracy_score(yv, p >= 0.5)), "wall_s": round(wall, 4)}
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 탐색
+# ─────────────────────────────────────────────────────────────────────
+def halving_rungs(n_configs: int, n_rows: int, eta: int = 3, min_rows: int = 500):
+    """[(설정 수, 행 수), ...] — 설정은 단계마다 1/eta, 행은 eta 배, 마지막 단계는 fit 전체."""
+    n_rungs = 1 + int(math.floor(math.log(max(n_configs, 1)) / math.log(eta) + 1e-9))
+    n_rungs = max(1, min(n_rungs, 1 + int(math.floor(math.log(max(n_rows / min_rows, 1)) / math.log(eta) + 1e-9))))
+    out, k = [], n_configs
+    for r in range(n_rungs):
+        out.append((k, max(1, int(n_rows / eta ** (n_rungs - 1 - r)))))
+        k = max(1, math.ceil(k / eta))
+    return out
+
+
+def search(splits, kinds=KINDS, n_configs: int = 27, method: str = "halving", eta: int = 3,
+           min_rows: int = 500, max_estimators: int = 1000, early_stopping: int = 30,
+           workers: int = 1, n_jobs=None, seed: int = SEED, log=sys.stderr):
+    """
+    모델별 설정 탐색. 반환: (전체 시도 목록, {모델: 최종 단계 최고 시도})
+    단계마다 모든 모델의 시도를 한꺼번에 풀에 넣어 워커가 놀지 않게 한다.
+    """
+    rng = np.random.default_rng(seed)
+    configs = {k: [dict(MODEL_PARAMS[k])] + [sample_config(rng) for _ in range(n_configs - 1)] for k in kinds}
+    for k in kinds:  # 0번 시도는 기본값 (트리 수는 조기 종료가 정한다)
+        configs[k][0].pop("n_estimators", None)
+    plans = {k: (halving_rungs(n_configs, len(splits[k][1]), eta, min_rows) if method == "halving"
+                 else [(n_configs, len(splits[k][1]))]) for k in kinds}
+    alive = {k: list(range(n_configs)) for k in kinds}
+    trials, t0 = [], time.perf_counter()
+
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(splits,)) if workers > 1 else None
+    if pool is None:
+        _init_worker(splits)
+    try:
+        for rung in range(max(len(p) for p in plans.values())):
+            specs = []
+            for k in kinds:
+                if rung >= len(plans[k]):
+                    continue
+                n_rows = plans[k][rung][1]
+                specs += [{"model": k, "trial": i, "rung": rung, "params": configs[k][i], "n_rows": n_rows,
+                           "max_estimators": max_estimators, "early_stopping": early_stopping, "n_jobs": n_jobs}
+                          for i in alive[k]]
+            results = list(pool.map(run_trial, specs)) if pool else [run_trial(s) for s in specs]
+            trials += results
+            for k in kinds:
+                if rung >= len(plans[k]):
+                    continue
+                done = sorted((r for r in results if r["model"] == k), key=lambda r: r["val_logloss"])
+                keep = plans[k][rung + 1][0] if rung + 1 < len(plans[k]) else 1
+                alive[k] = [r["trial"] for r in done[:keep]]
+                if log:
+                    print(f"[tune] {k} 단계 {rung}: {len(done)}개 × {done[0]['n_rows']:,}행  "
+                          f"최고 logloss {done[0]['val_logloss']:.4f}  ({time.perf_counter() - t0:.1f}s)",
+                          file=log, flush=True)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    best = {}
+    for k in kinds:
+        last = len(plans[k]) - 1
+        best[k] = min((r for r in trials if r["model"] == k and r["rung"] == last), key=lambda r: r["val_logloss"])
+    return trials, best
+
+
+def tuned_params(best):
+    """최고 시도 → train_models(params=...) 용 설정 (트리 수 = best_iteration + 1)."""
+    return {k: {**r["params"], "n_estimators": r["best_iteration"] + 1} for k, r in best.items()}
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 비교 · 가중치
+# ─────────────────────────────────────────────────────────────────────
+def _evaluate(kind, params, split, n_jobs=None):
+    X, y, _, _, Xt, yt = split
+    t0 = time.perf_counter()
+    model = make_classifier(kind, params, n_jobs=n_jobs).fit(X, y)
+    fit_s = time.perf_counter() - t0
+    predict_s = []
+    for _ in range(3):
+        t0 = time.perf_counter()
+        p = model.predict_proba(Xt)[:, 1]
+        predict_s.append(time.perf_counter() - t0)
+    booster = model.get_booster()
+    return {"test_acc": float(accuracy_score(yt, p >= 0.5)), "test_logloss": float(log_loss(yt, p)),
+            "n_trees": booster.num_boosted_rounds(), "model_bytes": len(booster.save_raw("ubj")),
+            "fit_s": round(fit_s, 4), "predict_us_per_row": round(min(predict_s) / max(len(yt), 1) * 1e6, 3)}
+
+
+def compare_defaults(splits, params, n_jobs=None):
+    """모델별 기본값 vs 최적 설정: fit 행으로 학습, 평가 20% 에서 측정."""
+    return {k: {"default": _evaluate(k, None, splits[k], n_jobs), "tuned": _evaluate(k, p, splits[k], n_jobs)}
+            for k, p in params.items()}
+
+
+def weight_grid(step: float = 0.05):
+    n = int(round(1.0 / step))
+    return np.array([(a / n, b / n, (n - a - b) / n) for a in range(n + 1) for b in range(n + 1 - a)])
+
+
+def _blend_scores(W, P, y):
+    """W (k,3) 가중치 × P (3,n) 부분 확률 → 가중치별 (logloss, 정확도)."""
+    p = np.clip(W @ P, 1e-7, 1 - 1e-7)
+    ll = -(y * np.log(p) + (1 - y) * np.log(1 - p)).mean(axis=1)
+    acc = ((p >= 0.5) == y).mean(axis=1)
+    return ll, acc
+
+
+def search_blend_weights(df, rows, params=None, step: float = 0.05, seed: int = SEED):
+    """
+    학습 80% 로 train_models → 평가 20% 팀의 세 부분 확률로 가중치 격자 탐색.
+    평가 행 절반(select)에서 logloss 최소 가중치를 고르고 나머지 절반(report)에서 기본 가중치와 비교.
+    """
+    t0 = time.perf_counter()
+    models = train_models(df.iloc[rows["train"]].reset_index(drop=True), verbose=False, params=params)
+    champ_cols = models[9]
+    test = df.iloc[rows["test"]]
+    teams = test[champ_cols].astype(str).values.tolist()
+    y = test["win"].astype(int).values
+    _, *parts = get_team_winrate_batch(teams, models, parts=True)
+    P = np.vstack(parts)
+
+    sel, rep = train_test_split(np.arange(len(y)), test_size=0.5, random_state=seed, stratify=y)
+    W = weight_grid(step)
+    ll, _ = _blend_scores(W, P[:, sel], y[sel])
+    w_best = W[int(np.argmin(ll))]
+
+    def _report(idx):
+        (ll_d, ll_b), (acc_d, acc_b) = _blend_scores(np.array([BLEND_WEIGHTS, w_best]), P[:, idx], y[idx])
+        return {"default": {"logloss": float(ll_d), "acc": float(acc_d)},
+                "tuned": {"logloss": float(ll_b), "acc": float(acc_b)}}
+
+    return {"weights": [round(float(w), 4) for w in w_best], "default_weights": list(BLEND_WEIGHTS),
+            "grid_step": step, "n_grid": len(W), "select": _report(sel), "report": _report(rep),
+            "wall_s": round(time.perf_counter() - t0, 3)}
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 결과 파일
+# ─────────────────────────────────────────────────────────────────────
+def load_best(path):
+    """tune 결과 JSON → train_models(params=...) 에 넣을 모델별 설정."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["best_params"]
+
+
+def load_blend_weights(path):
+    """tune 결과 JSON → get_team_winrate(weights=...) 용 (synergy, stat, champ). 탐색하지 않았으면 BLEND_WEIGHTS."""
+    with open(path, "r", encoding="utf-8") as f:
+        blend_result = json.load(f).get("blend")
+    return tuple(blend_result["weights"]) if blend_result else BLEND_WEIGHTS
+
+
+def _summary(result):
+    lines = []
+    for k, r in result["best"].items():
+        c = result["compare"].get(k, {})
+        d, t = c.get("default", {}), c.get("tuned", {})
+        lines.append(f"{k:8s} 최적 {result['best_params'][k]}")
+        if d:
+            lines.append(f"{'':8s} 평가 정확도 {d['test_acc']:.2%} → {t['test_acc']:.2%}  "
+                         f"logloss {d['test_logloss']:.4f} → {t['test_logloss']:.4f}  "
+                         f"트리 {d['n_trees']} → {t['n_trees']}  크기 {d['model_bytes']:,} → {t['model_bytes']:,} B  "
+                         f"예측 {d['predict_us_per_row']} → {t['predict_us_per_row']} µs/행")
+    b = result.get("blend")
+    if b:
+        lines.append(f"가중치 {b['default_weights']} → {b['weights']}  "
+                     f"report logloss {b['report']['default']['logloss']:.4f} → {b['report']['tuned']['logloss']:.4f}  "
+                     f"정확도 {b['report']['default']['acc']:.2%} → {b['report']['tuned']['acc']:.2%}")
+    lines.append(f"시도 {len(result['trials'])}개, 탐색 {result['wall_s']['search']:.1f}s, 전체 {result['wall_s']['total']:.1f}s")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ARAM 앙상블 하이퍼파라미터 / 가중치 탐색")
+    ap.add_argument("--csv", required=True, help="학습용 매치 CSV")
+    ap.add_argument("--models", nargs="*", choices=KINDS, default=list(KINDS))
+    ap.add_argument("--search", choices=["halving", "random"], default="halving")
+    ap.add_argument("--configs", type=int, default=27, help="모델별 무작위 설정 수 (0번은 기본값)")
+    ap.add_argument("--eta", type=int, default=3, help="successive halving 감소 비율")
+    ap.add_argument("--min-rows", type=int, default=500, help="첫 단계 최소 학습 행 수")
+    ap.add_argument("--max-estimators", type=int, default=1000)
+    ap.add_argument("--early-stopping", type=int, default=30, help="val logloss 개선 없이 허용할 라운드")
+    ap.add_argument("--workers", type=int, default=1, help="프로세스 수")
+    ap.add_argument("--threads", type=int, default=None, help="시도당 XGBoost 스레드 (기본: workers > 1 이면 1)")
+    ap.add_argument("--blend-step", type=float, default=0.05, help="가중치 격자 간격 (0 이면 가중치 탐색 생략)")
+    ap.add_argument("--seed", type=int, default=SEED)
+    ap.add_argument("--out", default="tune_results.json")
+    args = ap.parse_args(argv)
+
+    n_jobs = args.threads if args.threads is not None else (1 if args.workers > 1 else None)
+    t_start = time.perf_counter()
+    df = read_csv_safe(args.csv)
+    splits, rows = build_splits(df, seed=args.seed)
+
+    t0 = time.perf_counter()
+    trials, best = search(splits, args.models, n_configs=args.configs, method=args.search, eta=args.eta,
+                          min_rows=args.min_rows, max_estimators=args.max_estimators,
+                          early_stopping=args.early_stopping, workers=args.workers, n_jobs=n_jobs, seed=args.seed)
+    search_s = time.perf_counter() - t0
+    params = tuned_params(best)
+    compare = compare_defaults(splits, params, n_jobs)
+    blend_result = search_blend_weights(df, rows, params, args.blend_step, args.seed) if args.blend_step > 0 else None
+
+    result = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "csv": str(args.csv),
+        "rows": {k: len(v) for k, v in rows.items()},
+        "settings": {k: v for k, v in vars(args).items() if k not in ("csv", "out")},
+        "best_params": params,
+        "best": best,
+        "compare": compare,
+        "blend": blend_result,
+        "trials": trials,
+        "wall_s": {"search": round(search_s, 3), "total": round(time.perf_counter() - t_start, 3)},
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(_summary(result))
+    print(f"→ {args.out}")
+
+
+if __name__ == "__main__":
+    main()
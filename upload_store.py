@@ -0,0 +1,156 @@
+# upload_store.py — 업로드 스크린샷 메모리 저장소 (내용 해시 키 / 한 번만 디코드 / 선택적 디스크 spill)
+"""
+업로드 바이트를 임시 파일로 쓰고 단계마다 다시 여는 대신, 내용 해시를 키로 한 번 디코드한
+PIL 이미지를 프로세스 전체에서 공유한다 (미리보기 · OCR · 룬 인식 작업이 같은 객체를 읽는다).
+
+  key, image = get_upload_store().put(uploaded.getvalue())
+  image = get_upload_store().get(key)      # 없으면 None
+
+- 같은 내용은 세션/파일명과 무관하게 같은 키 → 이름 충돌 없음.
+- 메모리 계층은 (원본 바이트 + 디코드 픽셀) 합계 기준 LRU. 밀려난 항목은 spill 디렉터리가 설정돼 있으면
+  <키>.bin 으로 내려가고 (역시 용량 상한, 오래된 파일부터 삭제), 다시 get 하면 디코드해 올린다.
+
+환경변수:
+  ARAM_UPLOAD_MEM_MB     메모리 계층 상한 (원본 + 픽셀 바이트, 기본 256)
+  ARAM_UPLOAD_SPILL_DIR  spill 디렉터리 (지정 시에만 디스크 사용)
+  ARAM_UPLOAD_SPILL_MB   spill 디렉터리 상한 (기본 256)
+"""
+from __future__ import annotations
+
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+from inference_jobs import upload_hash
+from profiling import span
+
+_MB = 1024 * 1024
+
+
+def decode_image(data: bytes) -> Image.Image:
+    """바이트 → 픽셀까지 로드된 RGB 이미지 (여러 스레드가 읽기 전용으로 공유 가능)."""
+    with span("upload_store.decode"):
+        with Image.open(io.BytesIO(data)) as im:
+            image = im.convert("RGB")
+        image.load()
+    return image
+
+
+class UploadStore:
+    """스레드 안전 업로드 저장소."""
+
+    def __init__(self, max_mem_bytes: int = 256 * _MB, spill_dir: str | None = None, max_spill_bytes: int = 256 * _MB):
+        self.max_mem_bytes = int(max_mem_bytes)
+        self.spill_dir = spill_dir
+        self.max_spill_bytes = int(max_spill_bytes)
+        self._lock = threading.Lock()
+        self._mem = OrderedDict()  # key -> (data, image, 차지하는 바이트)
+        self._mem_bytes = 0
+        self._counts = {"puts": 0, "hits": 0, "spill_hits": 0, "misses": 0, "spilled": 0}
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, f"{key}.bin")
+
+    def _insert(self, key, data, image):
+        if key in self._mem:
+            self._mem.move_to_end(key)
+            return
+        size = len(data) + image.width * image.height * len(image.getbands())
+        self._mem[key] = (data, image, size)
+        self._mem_bytes += size
+        # 방금 넣은 항목은 상한을 넘어도 유지 (진행 중 작업의 입력)
+        while self._mem_bytes > self.max_mem_bytes and len(self._mem) > 1:
+            old, (old_data, _, old_size) = self._mem.popitem(last=False)
+            self._mem_bytes -= old_size
+            self._spill(old, old_data)
+
+    def _spill(self, key, data):
+        if not self.spill_dir:
+            return
+        path = self._spill_path(key)
+        if not os.path.exists(path):
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            self._counts["spilled"] += 1
+        self._trim_spill()
+
+    def _trim_spill(self):
+        entries = []
+        for name in os.listdir(self.spill_dir):
+            if name.endswith(".bin"):
+                st = os.stat(os.path.join(self.spill_dir, name))
+                entries.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_spill_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.spill_dir, name))
+            except OSError:
+                pass
+            total -= size
+
+    def put(self, data: bytes):
+        """(키, 디코드된 이미지). 이미 있는 내용이면 디코드하지 않고 기존 이미지를 돌려준다."""
+        key = upload_hash(data)
+        with self._lock:
+            self._counts["puts"] += 1
+            hit = self._mem.get(key)
+            if hit is not None:
+                self._mem.move_to_end(key)
+                return key, hit[1]
+        image = decode_image(data)
+        with self._lock:
+            if key in self._mem:  # 다른 스레드가 먼저 넣음
+                return key, self._mem[key][1]
+            self._insert(key, data, image)
+        return key, image
+
+    def get(self, key):
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                self._mem.move_to_end(key)
+                self._counts["hits"] += 1
+                return hit[1]
+            path = self._spill_path(key) if self.spill_dir else None
+        if path is None or not os.path.exists(path):
+            with self._lock:
+                self._counts["misses"] += 1
+            return None
+        with open(path, "rb") as f:
+            data = f.read()
+        image = decode_image(data)
+        with self._lock:
+            self._counts["spill_hits"] += 1
+            self._insert(key, data, image)
+        return image
+
+    def stats(self):
+        with self._lock:
+            return {**self._counts, "items": len(self._mem), "mem_bytes": self._mem_bytes,
+                    "max_mem_bytes": self.max_mem_bytes, "spill_dir": self.spill_dir}
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_upload_store() -> UploadStore:
+    """프로세스 전역 저장소 (환경변수로 메모리/spill 상한 설정)."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = UploadStore(
+                max_mem_bytes=int(float(os.environ.get("ARAM_UPLOAD_MEM_MB", 256)) * _MB),
+                spill_dir=os.environ.get("ARAM_UPLOAD_SPILL_DIR") or None,
+                max_spill_bytes=int(float(os.environ.get("ARAM_UPLOAD_SPILL_MB", 256)) * _MB),
+            )
+        return _STORE
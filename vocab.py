@@ -0,0 +1,183 @@
+# vocab.py — 챔피언 / 룬 / 역할군 정수 id 어휘 (EN↔KO 매핑 포함, 배열 기반 조회 테이블)
+"""
+챔피언 이름(한글 문자열)을 모듈마다 문자열 비교·pandas 필터로 찾던 것을 한 곳의 정수 id 로 통일한다.
+
+  from vocab import CHAMPIONS, RUNES, ROLES, role_table, cc_counts
+  cid = CHAMPIONS.id("리신")            # 공백/밑줄 무시 별칭, 영문명("Lee Sin")도 같은 id
+  rid = RUNES.id("Electrocute")         # 룬도 영문 라벨/한글 이름 모두 허용
+  ROLES.name(role_table()[cid, rid])    # 'AD전사' ...
+
+- id 는 lol_champions.csv 순서 (챔피언), RUNE_EN2KO 순서 (룬), ROLE_NAMES 순서 (역할군) 로 고정.
+- 모르는 이름은 -1. 데이터 파일마다 다른 표기('리 신'/'리신'/'리_신')는 norm() 으로 같은 키가 된다.
+- CSV 는 registry 에서 받아 (프로세스당 한 번 로드) role_table / cc_counts 정수 배열로 만든 뒤 캐시한다.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import registry
+
+_NORM_RE = re.compile(r"[\s_]+")
+
+
+def norm(name) -> str:
+    """표기 정규화 키: NFC + 공백/밑줄 제거 ('리 신' == '리신' == '리_신')."""
+    return _NORM_RE.sub("", unicodedata.normalize("NFC", str(name)))
+
+
+class Vocab:
+    """이름 ↔ 정수 id. names[id] 가 대표 이름, 별칭/정규화 키로도 같은 id 를 찾는다."""
+
+    def __init__(self, names, aliases=None):
+        self.names = np.array(list(names), dtype=object)
+        self._index = {}
+        for i, n in enumerate(self.names):
+            self._index.setdefault(n, i)
+            self._index.setdefault(norm(n), i)
+        for alias, target in (aliases or {}).items():
+            i = self.id(target)
+            if i >= 0:
+                self._index.setdefault(alias, i)
+                self._index.setdefault(norm(alias), i)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return self.id(name) >= 0
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def id(self, name, default: int = -1) -> int:
+        i = self._index.get(name)
+        if i is None:
+            i = self._index.get(norm(name), default)
+        return i
+
+    def ids(self, names) -> np.ndarray:
+        """이름 목록 → int32 id 배열 (모르는 이름은 -1)."""
+        return np.fromiter((self.id(n) for n in names), dtype=np.int32)
+
+    def name(self, i, default=None):
+        """id → 대표 이름 (-1 이나 범위 밖이면 default)."""
+        return self.names[i] if 0 <= i < len(self.names) else default
+
+    def canonical(self, name):
+        """알려진 이름이면 대표 이름, 아니면 입력 그대로."""
+        i = self.id(name)
+        return self.names[i] if i >= 0 else name
+
+
+# ─────────────────────────────────────────────────────────────────────
+# EN → KO 매핑
+# ─────────────────────────────────────────────────────────────────────
+EN2KO = {
+    "Aatrox":"아트록스","Ahri":"아리","Akali":"아칼리","Akshan":"아크샨","Alistar":"알리스타",
+    "Amumu":"아무무","Anivia":"애니비아","Annie":"애니","Aphelios":"아펠리오스","Ashe":"애쉬",
+    "Aurelion Sol":"아우렐리온 솔","Aurora":"오로라","Azir":"아지르",
+    "Bard":"바드","Bel'Veth":"벨베스","Blitzcrank":"블리츠크랭크","Brand":"브랜드","Braum":"브라움",
+    "Caitlyn":"케이틀린","Camille":"카밀","Cassiopeia":"카시오페아","Cho'Gath":"초가스","Corki":"코르키",
+    "Darius":"다리우스","Diana":"다이애나","Dr. Mundo":"문도 박사","Draven":"드레이븐",
+    "Ekko":"에코","Elise":"엘리스","Evelynn":"이블린","Ezreal":"이즈리얼",
+    "Fiddlesticks":"피들스틱","Fiora":"피오라","Fizz":"피즈",
+    "Galio":"갈리오","Gangplank":"갱플랭크","Garen":"가렌","Gnar":"나르","Gragas":"그라가스","Graves":"그레이브즈","Gwen":"그웬",
+    "Hecarim":"헤카림","Heimerdinger":"하이머딩거",
+    "Illaoi":"일라오이","Irelia":"이렐리아","Ivern":"아이번",
+    "Janna":"잔나","Jarvan IV":"자르반 4세","Jax":"잭스","Jayce":"제이스","Jhin":"진","Jinx":"징크스",
+    "K'Sante":"크산테","Kai'Sa":"카이사","Kalista":"칼리스타","Karma":"카르마","Karthus":"카서스","Kassadin":"카사딘",
+    "Katarina":"카타리나","Kayle":"케일","Kayn":"케인","Kennen":"케넨","Kha'Zix":"카직스","Kindred":"킨드레드",
+    "Kled":"클레드","Kog'Maw":"코그모",
+    "LeBlanc":"르블랑","Lee Sin":"리 신","Leona":"레오나","Lillia":"릴리아","Lissandra":"리산드라",
+    "Lucian":"루시안","Lulu":"룰루","Lux":"럭스",
+    "Malphite":"말파이트","Malzahar":"말자하","Maokai":"마오카이","Master Yi":"마스터 이",
+    "Milio":"밀리오","Miss Fortune":"미스 포츈","Mordekaiser":"모데카이저","Morgana":"모르가나",
+    "Naafiri":"나피리","Nami":"나미","Nasus":"나서스","Nautilus":"노틸러스","Neeko":"니코","Nidalee":"니달리","Nilah":"닐라",
+    "Nocturne":"녹턴","Nunu & Willump":"누누와 윌럼프",
+    "Olaf":"올라프","Orianna":"오리아나","Ornn":"오른",
+    "Pantheon":"판테온","Poppy":"뽀삐","Pyke":"파이크",
+    "Qiyana":"키아나","Quinn":"퀸",
+    "Rakan":"라칸","Rammus":"람머스","Rek'Sai":"렉사이","Rell":"렐","Renata Glasc":"레나타 글라스크",
+    "Renekton":"레넥톤","Rengar":"렝가","Riven":"리븐","Rumble":"럼블","Ryze":"라이즈",
+    "Samira":"사미라","Sejuani":"세주아니","Senna":"세나","Seraphine":"세라핀","Sett":"세트","Shaco":"샤코","Shen":"쉔",
+    "Shyvana":"쉬바나","Singed":"신지드","Sion":"사이온","Sivir":"시비르","Skarner":"스카너","Smolder":"스몰더","Sona":"소나",
+    "Soraka":"소라카","Swain":"스웨인","Sylas":"사일러스","Syndra":"신드라",
+    "Tahm Kench":"탐 켄치","Taliyah":"탈리야","Talon":"탈론","Taric":"타릭","Teemo":"티모","Thresh":"쓰레쉬",
+    "Tristana":"트리스타나","Trundle":"트런들","Tryndamere":"트린다미어","Twisted Fate":"트위스티드 페이트","Twitch":"트위치",
+    "Udyr":"우디르","Urgot":"우르곳",
+    "Varus":"바루스","Vayne":"베인","Veigar":"베이가","Vel'Koz":"벨코즈","Vex":"벡스","Vi":"바이","Viego":"비에고",
+    "Viktor":"빅토르","Vladimir":"블라디미르","Volibear":"볼리베어",
+    "Warwick":"워윅","Wukong":"오공","Xayah":"자야","Xerath":"제라스","Xin Zhao":"신 짜오",
+    "Yasuo":"야스오","Yone":"요네","Yorick":"요릭","Yuumi":"유미",
+    "Zac":"자크","Zed":"제드","Zeri":"제리","Ziggs":"직스","Zilean":"질리언","Zoe":"조이","Zyra":"자이라",
+}
+
+# 룬 모델 라벨(영문) → 한글 룬 이름
+RUNE_EN2KO = {
+    "Electrocute": "감전", "Predator": "포식자", "DarkHarvest": "어둠의 수확",
+    "HailOfBlades": "칼날비", "GlacialAugment": "빙결 강화",
+    "UnsealedSpellbook": "봉인 풀린 주문서", "FirstStrike": "선제공격",
+    "PressTheAttack": "집중 공격", "LethalTempo": "치명적 속도",
+    "FleetFootwork": "기민한 발놀림", "Conqueror": "정복자",
+    "GraspOfTheUndying": "착취의 손아귀", "Aftershock": "여진",
+    "Guardian": "수호자", "SummonAery": "콩콩이 소환",
+    "ArcaneComet": "신비로운 유성", "PhaseRush": "난입",
+}
+
+ROLE_NAMES = ["AD전사", "AP전사", "AD암살자", "AP암살자", "AD원딜", "서포터", "탱커"]
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 어휘
+# ─────────────────────────────────────────────────────────────────────
+CHAMPIONS = Vocab(registry.get("champions")["name"].astype(str), aliases=EN2KO)
+RUNES = Vocab(RUNE_EN2KO.values(), aliases=RUNE_EN2KO)
+ROLES = Vocab(ROLE_NAMES)
+
+# 챔피언 id → 영문명 (없으면 "")
+CHAMPION_EN = np.array([""] * len(CHAMPIONS), dtype=object)
+for _en, _ko in EN2KO.items():
+    if CHAMPIONS.id(_ko) >= 0:
+        CHAMPION_EN[CHAMPIONS.id(_ko)] = _en
+
+
+# ─────────────────────────────────────────────────────────────────────
+# 배열 조회 테이블
+# ─────────────────────────────────────────────────────────────────────
+def _frame(artifact, path):
+    return registry.get(artifact) if path is None else pd.read_csv(path, encoding="utf-8")
+
+
+@lru_cache(maxsize=None)
+def role_table(path: str | Path | None = None) -> np.ndarray:
+    """(챔피언 id, 룬 id) → 역할군 id. int8 (len(CHAMPIONS), len(RUNES)), 정보 없으면 -1. 기본은 registry 'rune_roles'."""
+    df = _frame("rune_roles", path)
+    table = np.full((len(CHAMPIONS), len(RUNES)), -1, dtype=np.int8)
+    rune_ids = RUNES.ids(df.columns[1:])
+    champ_ids = CHAMPIONS.ids(df["name"])
+    roles = df.iloc[:, 1:].to_numpy()
+    for r, cid in enumerate(champ_ids):
+        if cid < 0:
+            continue
+        for c, rid in enumerate(rune_ids):
+            if rid >= 0:
+                table[cid, rid] = ROLES.id(roles[r, c])
+    return table
+
+
+@lru_cache(maxsize=None)
+def cc_counts(path: str | Path | None = None) -> np.ndarray:
+    """챔피언 id → CC 개수. int16 (len(CHAMPIONS),), 정보 없으면 0. 기본은 registry 'cc_table'."""
+    df = _frame("cc_table", path)
+    counts = np.zeros(len(CHAMPIONS), dtype=np.int16)
+    ids = CHAMPIONS.ids(df["name"])
+    values = pd.to_numeric(df["CCcount"], errors="coerce").fillna(0).astype(int).to_numpy()
+    keep = ids >= 0
+    counts[ids[keep]] = values[keep]
+    return counts
@@ -1,23 +1,18 @@
 # app.py (시나리오2/kdh용 · 예상 승률 제거판, GitHub/Streamlit 배포용)
 # -*- coding: utf-8 -*-
 import os
-import io
 import sys
 import importlib
 from pathlib import Path
 
 import streamlit as st
-from PIL import Image
 from item_recommender import (
     initialize_recommender,
-    get_all_build_recommendations,
-    get_cc_df,
+    get_cc_counts,
 )
 
 # === 고정 경로 제거: 현재 파일 기준으로 BASE_DIR 설정 ===
 BASE_DIR = Path(__file__).resolve().parent
-TEMP_DIR = BASE_DIR / "temp"
-TEMP_DIR.mkdir(exist_ok=True)
 
 # rune_champion.py 가 같은 폴더(또는 하위 폴더)에 있을 때 import 보장
 if str(BASE_DIR) not in sys.path:
@@ -28,18 +23,36 @@ st.set_page_config(page_title="AI 기반 LoL 아이템 빌드 추천",
 st.title("AI 기반 LoL 아이템 빌드 추천")
 st.markdown("---")
 
+from profiling import render_panel, span  # item_recommender 가 루트 경로를 sys.path 에 추가함
+from inference_jobs import get_job_manager, render_job_progress
+from inference_service import get_service
+from upload_store import get_upload_store
+from vocab import CHAMPIONS
+render_panel()
+
 # 0) 추천 엔진 초기화
 if not initialize_recommender():
     st.error("추천 시스템 초기화 실패 (모델/데이터 경로를 확인하세요)")
     st.stop()
 
 
+# 0-1) Vision/Vertex 채널 예열: rune_champion 을 처음 로드할 때 공유 클라이언트가 만들어지고 예열된다
+@st.cache_resource(show_spinner=False)
+def _warm_inference_clients():
+    try:
+        importlib.import_module("rune_champion")
+    except Exception:
+        pass
+
+
+_warm_inference_clients()
+
+
 # ──────────────────────────────────────────────
 # 적 조합 요약 + 추천 이유
 # ──────────────────────────────────────────────
 def summarize_enemy(enemy_team):
-    num_ad = num_ap = num_tanks = num_support = num_cc = 0
-    cc_df = get_cc_df()
+    num_ad = num_ap = num_tanks = num_support = 0
 
     for champ_name, _, role_name in enemy_team:
         role_name = str(role_name or "")
@@ -48,13 +61,9 @@ def summarize_enemy(enemy_team):
         elif role_name.startswith("탱커"):    num_tanks += 1
         elif role_name.startswith("서포터"):  num_support += 1
 
-        # CC 계산
-        row = cc_df[cc_df["name"] == champ_name]
-        if not row.empty:
-            try:
-                num_cc += int(row.iloc[0]["CCcount"])
-            except Exception:
-                pass
+    # CC 계산 (챔피언 id → CC 개수 배열)
+    ids = CHAMPIONS.ids([c for c, _, _ in enemy_team])
+    num_cc = int(get_cc_counts()[ids[ids >= 0]].sum())
 
     return num_ad, num_ap, num_tanks, num_support, num_cc
 
@@ -83,26 +92,44 @@ def render_reasons(num_ad, num_ap, num_tanks, num_support, num_cc):
 # ──────────────────────────────────────────────
 # 1) 스크린샷 업로드
 # ──────────────────────────────────────────────
+def _render_champ_partial(partial):
+    st.caption("인식 중: " + " · ".join(p if p is not None else "…" for p in partial))
+
+
+def _render_rune_partial(partial):
+    st.caption("룬: " + " · ".join(p[0] if p is not None else "…" for p in partial))
+
+
 st.header("1. 정보 입력")
 uploaded = st.file_uploader("게임 로딩 화면 스크린샷 업로드", type=["png", "jpg", "jpeg"])
-temp_path, champs10 = None, []
+shot, champs10, upload_key, rc = None, [], None, None
 
 if uploaded:
-    temp_path = TEMP_DIR / uploaded.name
-    with open(temp_path, "wb") as f:
-        f.write(uploaded.getvalue())
-    st.image(Image.open(io.BytesIO(uploaded.getvalue())),
-             caption=uploaded.name, use_container_width=True)
+    # 임시 파일 없이 내용 해시 키로 한 번만 디코드: 미리보기/OCR/룬 작업이 같은 이미지 객체를 공유
+    with span("app2.decode_upload"):
+        upload_key, shot = get_upload_store().put(uploaded.getvalue())
+    st.image(shot, caption=uploaded.name, use_container_width=True)
 
-    # rune_champion 모듈 로드
+    # rune_champion 모듈 로드 후 OCR/룬 인식을 백그라운드로 동시에 시작 (같은 업로드면 재사용)
     try:
         rc = importlib.import_module("rune_champion")
-        with st.spinner("챔피언 10명 인식 중…"):
-            champs10 = rc.extract_champions(str(temp_path))
-        if champs10:
-            st.success("인식된 챔피언: " + ", ".join(champs10))
+        jobs = get_job_manager()
+        champ_job = jobs.submit(("champions", upload_key), rc.extract_champions, shot, total=10, with_scores=True)
+        jobs.submit(("runes", upload_key), rc.crop_and_predict_RUNEs, shot, total=10)
+        st.session_state.upload_key = upload_key
+        if champ_job.status == "done":
+            champs10 = [n for n, _ in champ_job.result]
+            if champs10:
+                st.success("인식된 챔피언: " + ", ".join(champs10))
+                fuzzy = [f"{n} ({score:.0%})" for n, score in champ_job.result if score < 1.0]
+                if fuzzy:
+                    st.caption("OCR 보정/미확인: " + ", ".join(fuzzy))
+            else:
+                st.warning("챔피언을 인식하지 못했습니다. ROI/해상도를 확인하세요.")
+        elif champ_job.status == "error":
+            st.exception(champ_job.error)
         else:
-            st.warning("챔피언을 인식하지 못했습니다. ROI/해상도를 확인하세요.")
+            render_job_progress(champ_job, "챔피언 10명 인식 중…", _render_champ_partial)
     except Exception as e:
         st.exception(e)
 
@@ -114,9 +141,8 @@ st.markdown("---")
 # ROI 디버그 토글
 if uploaded and champs10:
     try:
-        rc = rc if "rc" in locals() else importlib.import_module("rune_champion")
         if st.checkbox("디버그: ROI 박스 표시"):
-            img = rc.draw_rois(str(temp_path))
+            img = rc.draw_rois(shot)
             st.image(img, caption="스케일된 ROI", use_container_width=True)
     except Exception as e:
         st.info(f"ROI 디버그 실패: {e}")
@@ -124,16 +150,23 @@ if uploaded and champs10:
 # ──────────────────────────────────────────────
 # 3) 분석 시작
 # ──────────────────────────────────────────────
-go = st.button("분석 시작", disabled=not (temp_path and my_champion))
+# 버튼은 한 번만 True 이므로, 룬 작업을 기다리는 동안의 rerun 에도 분석 요청을 유지
+if st.button("분석 시작", disabled=not (upload_key and my_champion)):
+    st.session_state.analyze_key = upload_key
+go = bool(upload_key) and st.session_state.get("analyze_key") == upload_key
 
 # ──────────────────────────────────────────────
 # 4) 팀/적 정보 + 추천 이유 + 아이템 추천 표시
 # ──────────────────────────────────────────────
-if go:  # 분석 시작 버튼 클릭 시
-    with st.spinner("분석 중…"):
+if go and my_champion:  # 분석 시작 버튼 클릭 시
+    rune_job = get_job_manager().get(("runes", upload_key))
+    if rune_job is not None and rune_job.active:
+        render_job_progress(rune_job, "룬 인식 중…", _render_rune_partial)
+    else:
         try:
-            rc = rc if "rc" in locals() else importlib.import_module("rune_champion")
-            my_team, enemy_team = rc.extract_champions_and_runes(str(temp_path), my_champion)
+            if rune_job is None or rune_job.status == "error":
+                raise rune_job.error if rune_job is not None else RuntimeError("룬 인식 작업이 없습니다. 다시 업로드하세요.")
+            my_team, enemy_team = rc.assemble_teams(champs10, rune_job.result, my_champion)
 
             st.subheader("팀/적 정보 확인")
             st.text(f"내 팀: {', '.join([c for c, _, _ in my_team])}")
@@ -149,7 +182,8 @@ if go:  # 분석 시작 버튼 클릭 시
 
             # === 아이템 빌드 추천 ===
             st.subheader("권장 아이템 빌드")
-            recs = get_all_build_recommendations(my_champion, enemy_team)
+            # 공유 추론 서비스: 동시 세션의 추천 요청을 모아 LGBM 예측 한 번으로
+            recs = get_service().build_recommendations(my_champion, enemy_team)
 
             if not recs:
                 st.info("해당 조합/역할에 대한 빌드가 없어요. (빌드 JSON 확인 필요)")
@@ -1,8 +1,8 @@
 # item_recommender.py — GitHub/Streamlit 배포용
 # -*- coding: utf-8 -*-
 import os
-import json
-import joblib
+import sys
+import numpy as np
 import pandas as pd
 import warnings
 from pathlib import Path
@@ -14,54 +14,100 @@ warnings.filterwarnings("ignore")
 # ===============================
 BASE_DIR = Path(__file__).resolve().parent  # kdh 폴더
 ROOT_DIR = BASE_DIR.parent                  # 시나리오2 루트
+if str(ROOT_DIR) not in sys.path:           # 루트 공용 모듈(profiling 등)
+    sys.path.append(str(ROOT_DIR))
 
-def _resolve(*relative_paths):
-    """
-    여러 후보 경로를 받아, 존재하는 첫 번째 파일을 반환.
-    relative_paths: BASE_DIR 또는 ROOT_DIR 기준 상대경로
-    """
-    for rel in relative_paths:
-        candidate = BASE_DIR / rel
-        if candidate.exists():
-            return candidate
-        candidate2 = ROOT_DIR / rel
-        if candidate2.exists():
-            return candidate2
-    return None
-
-MODEL_PATH = _resolve("lgbm_model_tuned.joblib")
-BUILD_JSON = _resolve("템트리_converted_fixed.json")
-CC_CSV     = _resolve("champ_job_cc.csv")
+from profiling import timed, span
+from vocab import CHAMPIONS, ROLES, cc_counts, norm
+import registry
+
+# 모델/빌드/CC 표는 루트 registry 가 경로 해석과 로드를 맡는다 (페이지 재실행·다른 페이지와 같은 객체 공유)
+MODEL_PATH = registry.path("build_model")
+BUILD_JSON = registry.path("build_store")
+CC_CSV     = registry.path("cc_table")
 
 # ===============================
 # 초기화 함수
 # ===============================
+@timed("item_recommender.initialize_recommender")
 def initialize_recommender():
     try:
-        global model, build_data, trained_features, cc_df, champion_to_roles_map
+        global model, build_data, trained_features, cc_df, champion_to_roles_map, CC_COUNT, FEATURES
         if not (MODEL_PATH and BUILD_JSON and CC_CSV):
             raise FileNotFoundError("필요한 모델/데이터 파일을 찾을 수 없습니다.")
 
-        model = joblib.load(MODEL_PATH)
-        with open(BUILD_JSON, "r", encoding="utf-8") as f:
-            build_data = json.load(f)
+        model = _load_build_model()
+        # 컴파일된 빌드 저장소 (mmap, 챔피언별 지연 디코드)
+        build_data = registry.get("build_store")
         trained_features = model.feature_names_in_
-        cc_df = pd.read_csv(CC_CSV, encoding="utf-8")
+        cc_df = registry.get("cc_table")
 
-        # 빌드 JSON 구조: {챔피언: {역할군: {상황키: [아이템리스트]}}}
-        champion_to_roles_map = {
-            champ: list(roles.keys()) for champ, roles in build_data.items()
-        }
+        CC_COUNT = cc_counts()  # 챔피언 id → CC 개수
+
+        # 빌드 구조: {챔피언: {역할군: {상황키: [아이템리스트]}}}
+        champion_to_roles_map = build_data.roles_map()
+        FEATURES = _feature_index(trained_features)
         return True
     except Exception as e:
         print(f"초기화 실패: {e}")
         return False
 
+def _load_build_model():
+    """
+    빌드 점수 모델. build_compact.py 로 만든 소형 번들이 있고, 그 번들을 만든 원본 모델/빌드 저장소와
+    체크섬이 같으면 그것을 쓴다 (유효 입력에서 원본과 같은 값, 로드·메모리 부담이 작다).
+    ARAM_BUILD_MODEL=lgbm 이거나 번들이 없거나 낡았으면 원본 LGBM.
+    """
+    if os.environ.get("ARAM_BUILD_MODEL", "auto").lower() != "lgbm" and registry.path("build_model_compact"):
+        try:
+            bundle = registry.get("build_model_compact")
+        except registry.ChecksumMismatchError as e:
+            print(f"{e} → 원본 LGBM 을 씁니다")
+            return registry.get("build_model")
+        source = bundle.get("source", {})
+        if all(source.get(name) == registry.checksum(name) for name in ("build_model", "build_store")):
+            compact = bundle["model"]
+            compact.predict_proba(np.zeros((1, compact.n_features_in_)))  # 희소 평가 표를 첫 질의 전에 만든다
+            return compact
+        print("소형 빌드 모델이 현재 모델/빌드 저장소와 맞지 않아 원본 LGBM 을 씁니다 (build_compact.py 로 다시 생성)")
+    return registry.get("build_model")
+
+# ===============================
+# 모델 입력 컬럼 위치 (id 기반)
+# ===============================
+def _feature_index(features):
+    """
+    trained_features → 정수 위치 테이블.
+      champ[챔피언 id], team_role[역할군 id], enemy_role[역할군 id] : 컬럼 위치 (없으면 -1)
+      item{정규화 아이템명}                                       : 컬럼 위치
+    모델 컬럼은 공백 대신 밑줄을 쓰므로 ('championName_리_신') 정규화 키로 맞춘다.
+    """
+    champ = np.full(len(CHAMPIONS), -1, dtype=np.int32)
+    team_role = np.full(len(ROLES), -1, dtype=np.int32)
+    enemy_role = np.full(len(ROLES), -1, dtype=np.int32)
+    item = {}
+    for pos, col in enumerate(features):
+        if col.startswith("championName_"):
+            cid = CHAMPIONS.id(col[len("championName_"):])
+            if cid >= 0:
+                champ[cid] = pos
+        elif col.startswith("team_role_"):
+            rid = ROLES.id(col[len("team_role_"):])
+            if rid >= 0:
+                team_role[rid] = pos
+        elif col.startswith("enemy_role_"):
+            rid = ROLES.id(col[len("enemy_role_"):])
+            if rid >= 0:
+                enemy_role[rid] = pos
+        elif col.startswith("item_"):
+            item[norm(col[len("item_"):])] = pos
+    return {"champ": champ, "team_role": team_role, "enemy_role": enemy_role, "item": item}
+
 # ===============================
 # 상황 판단
 # ===============================
 def determine_situation(enemy_team):
-    num_ad = num_ap = num_cc = num_tanks = 0
+    num_ad = num_ap = num_tanks = 0
     for champ_name, _, role_name in enemy_team:
         if "AD" in role_name:
             num_ad += 1
@@ -69,12 +115,8 @@ def determine_situation(enemy_team):
             num_ap += 1
         if "탱커" in role_name:
             num_tanks += 1
-        cc_row = cc_df[cc_df["name"] == champ_name]
-        if not cc_row.empty:
-            try:
-                num_cc += int(cc_row.iloc[0]["CCcount"])
-            except Exception:
-                pass
+    ids = CHAMPIONS.ids([c for c, _, _ in enemy_team])
+    num_cc = int(CC_COUNT[ids[ids >= 0]].sum())
     damage_type_cond = "상대AP" if num_ap >= 3 else "상대AD"
     cc_cond = "CC많음" if num_cc >= 3 else "CC적음"
     tank_cond = "탱커많음" if num_tanks >= 2 else "탱커적음"
@@ -83,61 +125,92 @@ def determine_situation(enemy_team):
 # ===============================
 # 추천 함수
 # ===============================
-def get_all_build_recommendations(my_champion, enemy_team):
-    my_roles = champion_to_roles_map.get(my_champion, [])
+def _build_candidates(my_champion, enemy_team):
+    """(역할군, 전문가 빌드) 후보 목록과 각 후보의 모델 입력 행렬 (후보 수 × 피처 수)."""
+    cid = CHAMPIONS.id(my_champion)
+    champ_builds = build_data.get(cid if cid >= 0 else my_champion) or {}
     possible_situations = determine_situation(enemy_team)
-    recommendations_by_role = []
 
-    for role in my_roles:
+    # 상대 역할군 카운트 (역할군 id 별)
+    enemy_role_ids = ROLES.ids([role_name for _, _, role_name in enemy_team])
+    enemy_counts = np.bincount(enemy_role_ids[enemy_role_ids >= 0], minlength=len(ROLES))
+
+    candidates, rows = [], []
+    for role in champ_builds.keys():
         expert_build = None
         # 1순위: 상황키 정확 매칭
         for situation_key in possible_situations:
-            build = build_data.get(my_champion, {}).get(role, {}).get(situation_key)
+            build = champ_builds.get(role, {}).get(situation_key)
             if build:
                 expert_build = build
                 break
         # 2순위: 서포터일 때 CC 기준 대체 매칭
         if not expert_build and role == "서포터":
             cc_part = "CC많음" if "CC많음" in possible_situations[0] else "CC적음"
-            for k, build in build_data.get(my_champion, {}).get(role, {}).items():
+            for k, build in champ_builds.get(role, {}).items():
                 if cc_part in k:
                     expert_build = build
                     break
         if not expert_build:
             continue
 
-        # 모델 입력 벡터 생성
-        input_data = pd.DataFrame(columns=trained_features)
-        input_data.loc[0] = 0
-        champ_col = f"championName_{my_champion}"
-        if champ_col in input_data.columns:
-            input_data.loc[0, champ_col] = 1
-        team_col = f"team_role_{role}"
-        if team_col in input_data.columns:
-            input_data.loc[0, team_col] = 1
+        # 모델 입력 벡터 생성 (컬럼 위치 테이블로 바로 채움)
+        x = np.zeros(len(trained_features), dtype=np.float64)
+        if cid >= 0 and FEATURES["champ"][cid] >= 0:
+            x[FEATURES["champ"][cid]] = 1
+        rid = ROLES.id(role)
+        if rid >= 0 and FEATURES["team_role"][rid] >= 0:
+            x[FEATURES["team_role"][rid]] = 1
 
         # 상대 역할군 카운트 반영
-        enemy_role_counts = {}
-        for _, _, role_name in enemy_team:
-            enemy_role_counts[role_name] = enemy_role_counts.get(role_name, 0) + 1
-        for r, count in enemy_role_counts.items():
-            col = f"enemy_role_{r}"
-            if col in input_data.columns:
-                input_data.loc[0, col] = count
+        pos = FEATURES["enemy_role"]
+        x[pos[pos >= 0]] = enemy_counts[pos >= 0]
 
         # 아이템 원-핫
         for item in expert_build:
-            col = f"item_{item}"
-            if col in input_data.columns:
-                input_data.loc[0, col] = 1
+            p = FEATURES["item"].get(norm(item))
+            if p is not None:
+                x[p] = 1
+
+        candidates.append((role, expert_build))
+        rows.append(x)
+    X = np.vstack(rows) if rows else np.zeros((0, len(trained_features)))
+    return candidates, X
 
-        win_prob = model.predict_proba(input_data)[0][1]
-        recommendations_by_role.append(
-            {"role": role, "build": expert_build, "win_prob": win_prob}
-        )
 
-    return sorted(recommendations_by_role, key=lambda x: x["win_prob"], reverse=True)
+@timed("item_recommender.recommend_builds_batch")
+def recommend_builds_batch(queries):
+    """
+    [(내 챔피언, 적 팀), ...] → 질의별 추천 목록. 모든 질의의 후보를 한 행렬로 쌓아 LGBM 예측은 한 번.
+    (inference_service 가 여러 세션의 요청을 모아 이 함수로 넘긴다)
+    """
+    parts = [_build_candidates(my_champion, enemy_team) for my_champion, enemy_team in queries]
+    X = np.vstack([x for _, x in parts]) if parts else np.zeros((0, len(trained_features)))
+    probs = np.zeros(0)
+    if len(X):
+        # LGBM 은 학습 때 컬럼 이름을 확인하므로 DataFrame 으로, 소형 모델은 배열 그대로
+        input_data = pd.DataFrame(X, columns=trained_features) if hasattr(model, "booster_") else X
+        with span("item_recommender.lgbm_predict"):
+            probs = model.predict_proba(input_data)[:, 1]
+
+    out, start = [], 0
+    for candidates, _ in parts:
+        recs = [{"role": role, "build": build, "win_prob": p}
+                for (role, build), p in zip(candidates, probs[start:start + len(candidates)])]
+        start += len(candidates)
+        out.append(sorted(recs, key=lambda x: x["win_prob"], reverse=True))
+    return out
+
+
+@timed("item_recommender.get_all_build_recommendations")
+def get_all_build_recommendations(my_champion, enemy_team):
+    return recommend_builds_batch([(my_champion, enemy_team)])[0]
 
 
 def get_cc_df():
     return cc_df
+
+
+def get_cc_counts():
+    """챔피언 id → CC 개수 배열 (vocab.CHAMPIONS id 순서)."""
+    return CC_COUNT
@@ -1,9 +1,8 @@
 # rune_champion.py — Streamlit Cloud 안전 실행판
 # -*- coding: utf-8 -*-
-import os, io, base64, json
+import os, io, sys, base64
 from pathlib import Path
 from PIL import Image, ImageEnhance, ImageDraw
-import pandas as pd
 
 # ─────────────────────────────────────────────
 # Streamlit secrets 지원
@@ -21,62 +20,64 @@ def _get_secret(key, default=None):
 # Google SDK 임포트 (없어도 앱 죽지 않게)
 # ─────────────────────────────────────────────
 try:
-    from google.cloud import vision, aiplatform
-    from google.oauth2 import service_account
+    from google.cloud import vision
     _GOOGLE_OK = True
 except Exception:
     _GOOGLE_OK = False
-    vision = aiplatform = service_account = None
+    vision = None
 
 BASE_DIR = Path(__file__).resolve().parent
 ROOT_DIR = BASE_DIR.parent
+if str(ROOT_DIR) not in sys.path:  # 루트 공용 모듈(profiling 등)
+    sys.path.append(str(ROOT_DIR))
 
-# ─────────────────────────────────────────────
-# GCP 인증 로더
-# ─────────────────────────────────────────────
-def _load_creds_from_env_or_b64(b64_key: str = None, file_hint: str = None):
-    if not _GOOGLE_OK:
-        return None
-    try:
-        cred_path = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS")
-        if cred_path and Path(cred_path).exists():
-            return service_account.Credentials.from_service_account_file(cred_path)
-        if file_hint and Path(file_hint).exists():
-            return service_account.Credentials.from_service_account_file(file_hint)
-        if b64_key:
-            b64_val = _get_secret(b64_key)
-            if b64_val:
-                data = json.loads(base64.b64decode(b64_val))
-                return service_account.Credentials.from_service_account_info(data)
-    except Exception:
-        pass
-    return None
+from profiling import timed, span
+from crop_engine import crop_encode
+from vocab import CHAMPIONS, RUNES, ROLES, RUNE_EN2KO, role_table
+from name_matcher import get_matcher
+from name_recognizer import get_recognizer, ocr_backend
+from inference_clients import get_clients
+from inference_service import get_service
 
 # ─────────────────────────────────────────────
-# Vision / Vertex 안전 초기화
+# Vision / Vertex 안전 초기화 (공유 클라이언트 관리자)
+#   자격증명: GOOGLE_APPLICATION_CREDENTIALS → *_CRED_B64 시크릿 → ADC
 # ─────────────────────────────────────────────
-VISION_CRED = _load_creds_from_env_or_b64("VISION_CRED_B64")
-if _GOOGLE_OK:
+_clients = get_clients()
+
+def _vision():
     try:
-        vision_client = vision.ImageAnnotatorClient(credentials=VISION_CRED)
+        return _clients.vision(credentials_b64=_get_secret("VISION_CRED_B64")) if _GOOGLE_OK else None
     except Exception:
-        vision_client = None
-else:
-    vision_client = None
+        return None
+
+vision_client = _vision()
 
 RUNE_PROJECT_ID  = _get_secret("RUNE_PROJECT_ID",  "your-project-id")
 RUNE_LOCATION    = _get_secret("RUNE_LOCATION",    "us-central1")
 RUNE_ENDPOINT_ID = _get_secret("RUNE_ENDPOINT_ID", "0000000000000000000")
-RUNE_CRED        = _load_creds_from_env_or_b64("RUNE_CRED_B64")
 
-if _GOOGLE_OK:
+# 위 예시 기본값 그대로면 endpoint() 가 None → 룬은 "null" (기존 동작)
+def _rune_endpoint():
     try:
-        aiplatform.init(project=RUNE_PROJECT_ID, location=RUNE_LOCATION, credentials=RUNE_CRED)
-        RUNE_endpoint = aiplatform.Endpoint(RUNE_ENDPOINT_ID)
+        return _clients.endpoint(RUNE_PROJECT_ID, RUNE_LOCATION, RUNE_ENDPOINT_ID,
+                                 credentials_b64=_get_secret("RUNE_CRED_B64")) if _GOOGLE_OK else None
     except Exception:
-        RUNE_endpoint = None
-else:
-    RUNE_endpoint = None
+        return None
+
+RUNE_endpoint = _rune_endpoint()
+_clients.warm_up()
+
+def _refresh_clients():
+    """
+    생성에 실패해 None 인 클라이언트를 관리자에게 다시 묻는다. 이 모듈은 rerun 마다 다시 import 되지 않으므로
+    시작 때의 일시적 실패가 남지 않게 한다 (실패는 관리자가 reset_timeout 동안 캐시 → 그 사이엔 조회만).
+    """
+    global vision_client, RUNE_endpoint
+    if vision_client is None:
+        vision_client = _vision()
+    if RUNE_endpoint is None:
+        RUNE_endpoint = _rune_endpoint()
 
 # ─────────────────────────────────────────────
 # 기준 해상도 / 스케일
@@ -101,62 +102,122 @@ RUNE_boxes = [
     (1440, 971, 1466, 999)
 ]
 
-# 룬 이름 매핑
-RUNE_NAME_MAP = {
-    "Electrocute": "감전", "Predator": "포식자", "DarkHarvest": "어둠의 수확",
-    "HailOfBlades": "칼날비", "GlacialAugment": "빙결 강화",
-    "UnsealedSpellbook": "봉인 풀린 주문서", "FirstStrike": "선제공격",
-    "PressTheAttack": "집중 공격", "LethalTempo": "치명적 속도",
-    "FleetFootwork": "기민한 발놀림", "Conqueror": "정복자",
-    "GraspOfTheUndying": "착취의 손아귀", "Aftershock": "여진",
-    "Guardian": "수호자", "SummonAery": "콩콩이 소환",
-    "ArcaneComet": "신비로운 유성", "PhaseRush": "난입",
-}
-
-# CSV 로드
-champion_df = pd.read_csv(BASE_DIR / "lol_champions.csv", encoding="utf-8")
-champions_list = champion_df["name"].tolist()
-role_df = pd.read_csv(BASE_DIR / "champion_rune_roles.csv", encoding="utf-8")
+# 룬 이름 매핑 (모델 라벨 → 한글, vocab 과 공유)
+RUNE_NAME_MAP = RUNE_EN2KO
+
+# 참조 데이터 (registry 에서 프로세스당 한 번 로드한 CSV 로 만든 vocab 테이블)
+champions_list = list(CHAMPIONS.names)
+ROLE_TABLE = role_table()  # (챔피언 id, 룬 id) → 역할군 id
 
 def get_role(champ_name, rune_name):
-    row = role_df[role_df["name"] == champ_name]
-    if not row.empty and rune_name in row.columns:
-        return row.iloc[0][rune_name]
+    cid, rid = CHAMPIONS.id(champ_name), RUNES.id(rune_name)
+    if cid >= 0 and rid >= 0 and ROLE_TABLE[cid, rid] >= 0:
+        return ROLES.name(ROLE_TABLE[cid, rid])
     return "정보 없음"
 
+# ─────────────────────────────────────────────
+# 입력 이미지 (경로 / 바이트 / PIL 이미지)
+# ─────────────────────────────────────────────
+def load_image(source):
+    """
+    이미 디코드된 PIL 이미지는 그대로 (RGB 가 아니면 변환만), 바이트/파일 객체/경로는 한 번 디코드.
+    아래 함수들은 모두 source 를 받아 이 함수로 한 번만 풀고, 내부에서는 같은 이미지를 공유한다.
+    """
+    if isinstance(source, Image.Image):
+        return source if source.mode == "RGB" else source.convert("RGB")
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    with Image.open(source) as im:
+        img = im.convert("RGB")
+    img.load()
+    return img
+
 # ─────────────────────────────────────────────
 # OCR 함수
 # ─────────────────────────────────────────────
-def ocr_champion_region(image_path, region):
+def _vision_text(cropped):
+    """이름 칸 크롭 → Vision text_detection 텍스트 (클라이언트가 없으면 "")."""
     if vision_client is None:
         return ""
-    with Image.open(image_path) as img:
-        w, h = img.size
-        r = _scale_box(region, w, h)
-        cropped = ImageEnhance.Contrast(img.crop(r).convert("L")).enhance(2.0)
-        buf = io.BytesIO()
-        cropped.save(buf, format="PNG")
+    cropped = ImageEnhance.Contrast(cropped.convert("L")).enhance(2.0)
+    buf = io.BytesIO()
+    cropped.save(buf, format="PNG")
     image = vision.Image(content=buf.getvalue())
-    resp = vision_client.text_detection(image=image)
+    with span("rune_champion.vision_text_detection"):
+        resp = vision_client.text_detection(image=image)
     if resp.error.message:
         raise Exception(f"OCR Error: {resp.error.message}")
     texts = resp.text_annotations
     return texts[0].description.strip() if texts else ""
 
+@timed("rune_champion.ocr_champion_region")
+def ocr_champion_region(image, region, backend=None):
+    """
+    영역 하나의 이름 텍스트. backend (기본 ARAM_OCR_BACKEND):
+      auto = 로컬 인식기가 확신하면 그 이름, 아니면 Vision / local = 로컬만 / vision = Vision 만
+    로컬이 확신하지 못했는데 Vision 을 쓸 수 없으면 "" (못 맞춤).
+    """
+    _refresh_clients()
+    img = load_image(image)
+    w, h = img.size
+    cropped = img.crop(_scale_box(region, w, h))
+    backend = backend or ocr_backend()
+    if backend != "vision":
+        name, _, ok = get_recognizer().recognize_many([cropped], scale=BASE_H / h)[0]
+        if ok:
+            return name
+        if backend == "local" or vision_client is None:
+            return ""
+    return _vision_text(cropped)
+
 NAME_CORRECTION = {"오콩": "오공"}
 
-def extract_champions(image_path):
+def extract_champions(image, on_tile=None, with_scores=False):
+    """
+    영역별 이름 → 챔피언 이름 (name_matcher: 정확 부분 문자열, 없으면 자모 편집거리 보정).
+    로컬 인식기(name_recognizer)로 10칸을 한 번에 맞춰 보고, 확신하지 못한 칸만 Vision OCR 로 넘긴다.
+    Vision 결과가 정확히 맞은 칸은 인식기 참조로 추가된다. 확신하지 못한 칸은 Vision 이 없으면 ("", 0.0) —
+    최선 후보라도 확인된 이름으로 assemble_teams 에 넘기지 않는다.
+    못 맞춘 영역은 OCR 텍스트 그대로. with_scores=True 면 [(이름, 점수 0~1), ...].
+    """
+    _refresh_clients()
+    img = load_image(image)
+    w, h = img.size
+    scale = BASE_H / h
+    crops = [img.crop(_scale_box(region, w, h)) for region in champion_name_regions]
+    backend = ocr_backend()
+    recognizer = get_recognizer()
+    local = recognizer.recognize_many(crops, scale=scale) if backend != "vision" else [(None, 0.0, False)] * len(crops)
+    matcher = get_matcher()
     out = []
-    for region in champion_name_regions:
-        text = ocr_champion_region(image_path, region)
-        text = NAME_CORRECTION.get(text, text)
-        matched = [c for c in champions_list if c in text]
-        out.append(matched[0] if matched else text)
-    return out
+    for i, crop in enumerate(crops):
+        guess, _, ok = local[i]
+        if ok:
+            out.append((guess, 1.0))
+        elif backend == "local" or vision_client is None:
+            out.append(("", 0.0))
+        else:
+            text = _vision_text(crop)
+            text = NAME_CORRECTION.get(text, text)
+            name, score = matcher.match(text)
+            if name is not None and score >= 1.0:
+                recognizer.learn(crop, name, scale=scale)
+            out.append((name if name is not None else text, score))
+        if on_tile is not None:
+            on_tile(i, out[-1][0])
+    return out if with_scores else [n for n, _ in out]
 
 # ─────────────────────────────────────────────
 # 룬 예측 (Vertex)
 # ─────────────────────────────────────────────
+def _rune_result(name, conf, threshold=35.0):
+    """(모델 라벨, 신뢰도 %) → (한글 룬 이름 또는 "null", 신뢰도 %)."""
+    if not name:
+        return "null", 0.0
+    best = RUNE_NAME_MAP.get(name, name)
+    return (best if conf >= threshold else "null", conf)
+
+@timed("rune_champion.predict_RUNE")
 def predict_RUNE(endpoint, image_bytes, threshold=35.0):
     if endpoint is None:
         return "null", 0.0
@@ -179,23 +240,39 @@ def predict_RUNE(endpoint, image_bytes, threshold=35.0):
         print(f"예측 오류: {e}")
         return "null", 0.0
 
-def crop_and_predict_RUNEs(image_path):
+@timed("rune_champion.crop_and_predict_RUNEs")
+def crop_and_predict_RUNEs(image, on_tile=None):
+    _refresh_clients()
     results = []
-    with Image.open(image_path) as img:
-        w, h = img.size
-        for box in RUNE_boxes:
-            b = _scale_box(box, w, h)
-            cropped = img.crop(b).convert("RGB").resize((64,64), Image.Resampling.LANCZOS)
-            buf = io.BytesIO(); cropped.save(buf, format="JPEG", quality=90)
-            results.append(predict_RUNE(RUNE_endpoint, buf.getvalue()))
+    img = load_image(image)
+    w, h = img.size
+    with span("rune_champion.crop_runes"):
+        tiles = crop_encode(img, [_scale_box(box, w, h) for box in RUNE_boxes], (64, 64), quality=90)
+    # 10타일을 한꺼번에 공유 추론 서비스 큐로 (엔드포인트 동시성 한도 안에서 병렬, 다른 세션과 함께)
+    futures = get_service().submit_tiles(RUNE_endpoint, tiles) if RUNE_endpoint is not None else [None] * len(tiles)
+    for i, fut in enumerate(futures):
+        try:
+            results.append(_rune_result(*fut.result()) if fut is not None else ("null", 0.0))
+        except Exception as e:
+            print(f"예측 오류: {e}")
+            results.append(("null", 0.0))
+        if on_tile is not None:
+            on_tile(i, results[-1])
     return results
 
 # ─────────────────────────────────────────────
 # 팀/룬/역할군 추출
 # ─────────────────────────────────────────────
-def extract_champions_and_runes(image_path, my_champion):
-    champions = extract_champions(image_path)
-    runes = crop_and_predict_RUNEs(image_path)
+@timed("rune_champion.extract_champions_and_runes")
+def extract_champions_and_runes(image, my_champion, on_tile=None):
+    # on_tile 인덱스: 0~9 챔피언 OCR, 10~19 룬
+    img = load_image(image)
+    champions = extract_champions(img, on_tile=on_tile)
+    runes = crop_and_predict_RUNEs(img, on_tile=on_tile and (lambda i, v: on_tile(10 + i, v)))
+    return assemble_teams(champions, runes, my_champion)
+
+def assemble_teams(champions, runes, my_champion):
+    """인식된 10명 + 룬 10개 → (내 팀, 적 팀) [(챔피언, 룬, 역할), ...]"""
     try:
         my_index = champions.index(my_champion)
     except ValueError:
@@ -213,8 +290,8 @@ def extract_champions_and_runes(image_path, my_champion):
 # ─────────────────────────────────────────────
 # ROI 디버그
 # ─────────────────────────────────────────────
-def draw_rois(image_path, save_path=None):
-    img = Image.open(image_path).convert("RGB")
+def draw_rois(image, save_path=None):
+    img = load_image(image).copy()
     w, h = img.size; dr = ImageDraw.Draw(img)
     for r in champion_name_regions:
         x1,y1,x2,y2 = _scale_box(r,w,h); dr.rectangle([x1,y1,x2,y2], outline=(255,0,0), width=3)